@@ -12,8 +12,74 @@ class Settings(BaseSettings):
     database_url: str
     database_url_sync: str
 
+    db_echo: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache per connection; set to 0 behind pgbouncer in transaction mode
+    db_statement_cache_size: int = 100
+
     allowed_origins: List[str] = ["*"]
 
+    daily_credit_amount: int = 5
+    daily_credit_chunk_size: int = 10_000
+    # Snapshots only cover ledger entries at least this old, so no entry dated before a snapshot commits after it
+    snapshot_lag_seconds: int = 300
+
+    balance_cache_backend: str = "local"  # local, redis or none
+    balance_cache_size: int = 100_000
+    balance_cache_ttl_seconds: float = 5.0
+    redis_url: str = "redis://localhost:6379/0"
+
+    schema_cache_size: int = 1000
+    schema_cache_ttl_seconds: float = 300.0
+    schema_cache_verify_version: bool = True
+
+    ddl_lock_timeout_ms: int = 2000
+    ddl_statement_timeout_ms: int = 60_000
+    ddl_max_retries: int = 5
+    ddl_retry_backoff_ms: int = 200
+    ddl_backfill_batch_size: int = 5000
+
+    schema_job_workers: int = 2
+    schema_job_per_table: int = 1
+
+    user_bulk_batch_size: int = 5000
+    user_bulk_max_errors: int = 1000
+
+    hold_default_ttl_seconds: int = 15 * 60
+    hold_max_ttl_seconds: int = 24 * 60 * 60
+    hold_sweep_interval_minutes: int = 1
+    hold_sweep_batch_size: int = 1000
+
+    # Opt-in write-behind merging of unkeyed deducts per user; see DeductCoalescer
+    deduct_coalescing_enabled: bool = False
+    deduct_coalesce_window_ms: float = 2.0
+    deduct_coalesce_max_batch: int = 1000
+
+    # Opt-in token-bucket limits per user id and API key; see RateLimitMiddleware
+    rate_limit_enabled: bool = False
+    rate_limit_backend: str = "local"  # local or redis
+    rate_limit_max_keys: int = 100_000
+    # Token bucket per user id in the path: `rate` requests per second, bursts up to `burst`
+    rate_limit_user_rate: float = 50.0
+    rate_limit_user_burst: int = 100
+    rate_limit_api_key_header: str = "X-API-Key"
+    rate_limit_api_key_rate: float = 500.0
+    rate_limit_api_key_burst: int = 1000
+
+    request_metrics_enabled: bool = True
+    slow_request_ms: float = 500.0
+    # Development/CI only: check statements per request against each route's query_budget
+    query_audit_enabled: bool = False
+    query_audit_strict: bool = False  # raise QueryBudgetExceeded instead of only logging
+    query_audit_repeat_threshold: int = 3
+
+    idempotency_ttl_seconds: int = 24 * 60 * 60
+    idempotency_cache_size: int = 10_000
+
 
     model_config = SettingsConfigDict(env_file=".env")
 
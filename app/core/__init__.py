@@ -1,4 +1,4 @@
 from .database import  engine, AsyncSessionLocal
-from .scheduler import scheduler, start_scheduler, stop_scheduler, add_daily_job
+from .scheduler import scheduler, start_scheduler, stop_scheduler, add_daily_job, add_interval_job
 
-__all__ = [ "engine", "AsyncSessionLocal", "scheduler", "start_scheduler", "stop_scheduler", "add_daily_job"]
\ No newline at end of file
+__all__ = [ "engine", "AsyncSessionLocal", "scheduler", "start_scheduler", "stop_scheduler", "add_daily_job", "add_interval_job"]
\ No newline at end of file
@@ -0,0 +1,166 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.config import get_settings
+from app.schemas.credit import CreditResponse
+from app.utils.lru_cache import TTLLRUCache
+
+settings = get_settings()
+
+
+class BalanceCache(ABC):
+    """
+    Read-through cache for credit balances keyed by user_id.
+    Entries are bounded by a TTL, so a write missed by another process is only visible
+    for at most `ttl` seconds.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[CreditResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, balance: CreditResponse) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *user_ids: int) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class LocalBalanceCache(BalanceCache):
+    """
+    In-process LRU with TTL. Also serves as the fake backend in tests.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self._cache = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, user_id: int) -> Optional[CreditResponse]:
+        balance = self._cache.get(user_id)
+        if balance is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return balance
+
+    async def set(self, balance: CreditResponse) -> None:
+        self._cache.set(balance.user_id, balance)
+
+    async def delete(self, *user_ids: int) -> None:
+        for user_id in user_ids:
+            self._cache.delete(user_id)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "size": len(self._cache), "maxsize": self._cache.maxsize}
+
+
+class RedisBalanceCache(BalanceCache):
+    """
+    Shared backend for running several app processes. Needs the optional `redis` package.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "credits:balance:"):
+        super().__init__()
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for BALANCE_CACHE_BACKEND=redis") from e
+        self._client = aioredis.from_url(url)
+        self._ttl_ms = int(ttl * 1000)
+        self._prefix = prefix
+
+    def _key(self, user_id: int) -> str:
+        return f"{self._prefix}{user_id}"
+
+    async def get(self, user_id: int) -> Optional[CreditResponse]:
+        raw = await self._client.get(self._key(user_id))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CreditResponse.model_validate_json(raw)
+
+    async def set(self, balance: CreditResponse) -> None:
+        await self._client.set(self._key(balance.user_id), balance.model_dump_json(), px=self._ttl_ms)
+
+    async def delete(self, *user_ids: int) -> None:
+        if user_ids:
+            await self._client.delete(*(self._key(user_id) for user_id in user_ids))
+
+    async def clear(self) -> None:
+        batch = []
+        async for key in self._client.scan_iter(match=f"{self._prefix}*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                await self._client.unlink(*batch)
+                batch = []
+        if batch:
+            await self._client.unlink(*batch)
+
+
+class NullBalanceCache(BalanceCache):
+    async def get(self, user_id: int) -> Optional[CreditResponse]:
+        self.misses += 1
+        return None
+
+    async def set(self, balance: CreditResponse) -> None:
+        pass
+
+    async def delete(self, *user_ids: int) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+
+def create_balance_cache() -> BalanceCache:
+    backend = settings.balance_cache_backend
+    if backend == "local":
+        return LocalBalanceCache(settings.balance_cache_size, settings.balance_cache_ttl_seconds)
+    if backend == "redis":
+        return RedisBalanceCache(settings.redis_url, settings.balance_cache_ttl_seconds)
+    if backend != "none":
+        logging.warning(f"Unknown balance cache backend {backend!r}, caching disabled")
+    return NullBalanceCache()
+
+
+balance_cache = create_balance_cache()
+
+# Session.info key for users whose cached balance is dropped when the session commits.
+STALE_BALANCES = "stale_balances"
+
+
+def invalidate_on_commit(db, *user_ids: int) -> None:
+    """
+    Mark cached balances to delete once `db` commits through commit_and_invalidate. Deleting them
+    earlier would let a concurrent read cache the balance that is about to change.
+    """
+    db.info.setdefault(STALE_BALANCES, set()).update(user_ids)
+
+
+async def commit_and_invalidate(db) -> None:
+    await db.commit()
+    await balance_cache.delete(*db.info.pop(STALE_BALANCES, ()))
@@ -0,0 +1,74 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class JobMetrics:
+    """
+    In-process stats for the current or last run of a background job.
+    Only counters and a bounded window of chunk timings are kept, never rows.
+    """
+
+    def __init__(self, job_name: str, max_chunk_timings: int = 100):
+        self.job_name = job_name
+        self.total_runs = 0
+        self.total_failures = 0
+        self._max_chunk_timings = max_chunk_timings
+        self._reset_run(None)
+
+    def _reset_run(self, run_key: Optional[str]):
+        self.run_key = run_key
+        self.status = "idle" if run_key is None else "running"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self.rows_updated = 0
+        self.chunks = 0
+        self.chunk_ms_total = 0.0
+        self.chunk_ms_max = 0.0
+        self.recent_chunk_ms = deque(maxlen=self._max_chunk_timings)
+        self.last_error: Optional[str] = None
+        self._started = 0.0
+
+    def start(self, run_key: str):
+        self._reset_run(run_key)
+        self.total_runs += 1
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+
+    def record_chunk(self, rows: int, elapsed_seconds: float):
+        elapsed_ms = elapsed_seconds * 1000
+        self.rows_updated += rows
+        self.chunks += 1
+        self.chunk_ms_total += elapsed_ms
+        self.chunk_ms_max = max(self.chunk_ms_max, elapsed_ms)
+        self.recent_chunk_ms.append(round(elapsed_ms, 3))
+
+    def finish(self, status: str = "succeeded"):
+        self.status = status
+        self.finished_at = datetime.utcnow()
+        self.duration_seconds = time.perf_counter() - self._started if self._started else None
+
+    def fail(self, error: Exception):
+        self.total_failures += 1
+        self.last_error = str(error)
+        self.finish("failed")
+
+    def snapshot(self) -> Dict:
+        return {
+            "job_name": self.job_name,
+            "run_key": self.run_key,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration_seconds,
+            "rows_updated": self.rows_updated,
+            "chunks": self.chunks,
+            "chunk_ms_avg": self.chunk_ms_total / self.chunks if self.chunks else None,
+            "chunk_ms_max": self.chunk_ms_max if self.chunks else None,
+            "recent_chunk_ms": list(self.recent_chunk_ms),
+            "last_error": self.last_error,
+            "total_runs": self.total_runs,
+            "total_failures": self.total_failures,
+        }
@@ -0,0 +1,83 @@
+import json
+import logging
+from collections import deque
+from typing import Optional, List, Dict, Any
+
+from app.config import get_settings
+from app.core.request_metrics import RequestStats, fingerprint
+
+settings = get_settings()
+
+
+class QueryBudget:
+    __slots__ = ("max_queries", "allow_repeats")
+
+    def __init__(self, max_queries: Optional[int], allow_repeats: bool):
+        self.max_queries = max_queries
+        self.allow_repeats = allow_repeats
+
+
+def query_budget(max_queries: Optional[int], allow_repeats: bool = False):
+    """
+    Declare the most SQL statements a route may run per request, on its worst path.
+    `None` is for routes whose statement count grows with their input by design, which
+    should also set `allow_repeats`.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = QueryBudget(max_queries, allow_repeats)
+        return endpoint
+    return decorator
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryAuditor:
+    """
+    Checks each request's statements against its route's budget and flags statement shapes
+    repeated QUERY_AUDIT_REPEAT_THRESHOLD or more times, the usual sign of an N+1 loop.
+    Only active with QUERY_AUDIT_ENABLED; meant for development and CI.
+    """
+
+    def __init__(self, max_violations: int = 1000):
+        self.violations: deque = deque(maxlen=max_violations)
+        self.audited = 0
+
+    def check(self, route, method: str, stats: RequestStats) -> List[str]:
+        self.audited += 1
+        template = getattr(route, "path", None) or "unmatched"
+        budget: Optional[QueryBudget] = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        problems = []
+        if budget is None:
+            if route is not None and stats.queries:
+                problems.append(f"no query budget declared, ran {stats.queries} statements")
+        elif budget.max_queries is not None and stats.queries > budget.max_queries:
+            problems.append(f"ran {stats.queries} statements, budget is {budget.max_queries}")
+
+        if budget is None or not budget.allow_repeats:
+            shapes: Dict[str, int] = {}
+            for statement in stats.statements:
+                key = fingerprint(statement)
+                shapes[key] = shapes.get(key, 0) + 1
+            for sql, count in shapes.items():
+                if count >= settings.query_audit_repeat_threshold:
+                    problems.append(f"statement repeated {count} times: {sql}")
+
+        if problems:
+            violation = {"route": template, "method": method, "queries": stats.queries, "problems": problems}
+            self.violations.append(violation)
+            logging.warning(json.dumps({"event": "query_audit", **violation}))
+            if settings.query_audit_strict:
+                raise QueryBudgetExceeded(f"{method} {template}: " + "; ".join(problems))
+        return problems
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"audited": self.audited, "violations": list(self.violations)}
+
+    def reset(self):
+        self.violations.clear()
+        self.audited = 0
+
+
+query_auditor = QueryAuditor()
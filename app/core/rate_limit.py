@@ -0,0 +1,168 @@
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+
+from app.config import get_settings
+from app.core.responses import FastJSONResponse, envelope
+
+settings = get_settings()
+
+# Routes addressed by user id, e.g. /api/credits/42/deduct or /api/users/42.
+USER_PATH = re.compile(r"^/api/(?:credits|users)/(\d+)(?:/|$)")
+
+
+class RateLimitStore(ABC):
+    """
+    Token buckets keyed by an arbitrary string. `acquire` takes one token and returns 0 when
+    the request is allowed, otherwise the number of seconds until a token is available.
+    """
+
+    def __init__(self):
+        self.allowed = 0
+        self.limited = 0
+
+    @abstractmethod
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "allowed": self.allowed, "limited": self.limited}
+
+
+class LocalRateLimitStore(RateLimitStore):
+    """
+    In-process buckets with O(1) updates. Limits are per process, so with N processes a client
+    can get up to N times the configured rate. The least recently used bucket is dropped past
+    `max_keys`; a dropped bucket comes back full.
+    """
+
+    def __init__(self, max_keys: int):
+        super().__init__()
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed += 1
+            return 0.0
+        self.limited += 1
+        return (1 - bucket[0]) / rate
+
+    def stats(self) -> dict:
+        return {**super().stats(), "keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+# Refill and take a token atomically; the retry delay is returned as a string because Redis
+# truncates Lua numbers to integers.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry)
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Buckets shared by every app process. Needs the optional `redis` package and costs one
+    round trip per check.
+    """
+
+    def __init__(self, url: str, prefix: str = "credits:ratelimit:"):
+        super().__init__()
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for RATE_LIMIT_BACKEND=redis") from e
+        self._client = aioredis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+        self._prefix = prefix
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        retry_after = float(await self._script(keys=[f"{self._prefix}{key}"], args=[rate, burst, time.time()]))
+        if retry_after > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    backend = settings.rate_limit_backend
+    if backend == "redis":
+        return RedisRateLimitStore(settings.redis_url)
+    if backend != "local":
+        logging.warning(f"Unknown rate limit backend {backend!r}, using local")
+    return LocalRateLimitStore(settings.rate_limit_max_keys)
+
+
+rate_limit_store = create_rate_limit_store()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware limiting requests per user id in the path and per API key header,
+    answering 429 with Retry-After once either bucket is empty.
+    """
+
+    def __init__(self, app, store: Optional[RateLimitStore] = None):
+        self.app = app
+        self.store = store or rate_limit_store
+        self.api_key_header = settings.rate_limit_api_key_header.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        for key, rate, burst in self._keys(scope):
+            retry_after = await self.store.acquire(key, rate, burst)
+            if retry_after > 0:
+                response = FastJSONResponse(
+                    envelope("Rate limit exceeded", success=False, error=f"Too many requests for {key}"),
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    def _keys(self, scope) -> List[Tuple[str, float, int]]:
+        keys = []
+        match = USER_PATH.match(scope["path"])
+        if match:
+            keys.append((f"user:{match.group(1)}", settings.rate_limit_user_rate, settings.rate_limit_user_burst))
+        for name, value in scope["headers"]:
+            if name == self.api_key_header:
+                keys.append((f"key:{value.decode('latin-1')}", settings.rate_limit_api_key_rate,
+                             settings.rate_limit_api_key_burst))
+                break
+        return keys
@@ -0,0 +1,193 @@
+import json
+import logging
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MAX_RECORDED_STATEMENTS = 100
+
+
+class RequestStats:
+    """
+    Database work done on behalf of one request. The engine and pool hooks add to the
+    instance in `current_request`, which SQLAlchemy's greenlet bridge carries into the
+    sync driver calls.
+    """
+    __slots__ = ("db_seconds", "queries", "pool_wait_seconds", "statements")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.pool_wait_seconds = 0.0
+        self.statements: List[str] = []
+
+    def record_query(self, statement: str, seconds: float):
+        self.db_seconds += seconds
+        self.queries += 1
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append(statement)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Statement with literals and bind parameters replaced by `?` and whitespace collapsed,
+    so the same query with different values groups together.
+    """
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", statement)).strip()[:300]
+
+
+class Histogram:
+    """
+    Prometheus histogram with one label set per observed (route, method).
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, str], list] = {}
+
+    def observe(self, labels: Tuple[str, str], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # Per-bucket counts (the last slot is +Inf), then sum and count.
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for (route, method), (counts, total, count) in sorted(self._series.items()):
+            labels = f'route="{_escape(route)}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Total request latency.", LATENCY_BUCKETS)
+        self.db_time = Histogram(
+            "http_request_db_seconds", "Time spent executing SQL per request.", LATENCY_BUCKETS)
+        self.queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", QUERY_COUNT_BUCKETS)
+        self.pool_wait = Histogram(
+            "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request.",
+            LATENCY_BUCKETS)
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, route: str, method: str, status: int, seconds: float, stats: RequestStats):
+        labels = (route, method)
+        self.latency.observe(labels, seconds)
+        self.db_time.observe(labels, stats.db_seconds)
+        self.queries.observe(labels, stats.queries)
+        self.pool_wait.observe(labels, stats.pool_wait_seconds)
+        key = (route, method, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self, pool_snapshot: Optional[dict] = None) -> str:
+        lines = ["# HELP http_requests_total Requests by route template, method and status.",
+                 "# TYPE http_requests_total counter"]
+        for (route, method, status), count in sorted(self.responses.items()):
+            lines.append(f'http_requests_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {count}')
+        for histogram in (self.latency, self.db_time, self.queries, self.pool_wait):
+            lines.extend(histogram.render())
+        if pool_snapshot is not None:
+            for name in ("pool_size", "checked_out", "overflow"):
+                lines.append(f"# TYPE db_pool_{name} gauge")
+                lines.append(f"db_pool_{name} {pool_snapshot[name]}")
+            lines.append("# TYPE db_pool_checkout_timeouts_total counter")
+            lines.append(f"db_pool_checkout_timeouts_total {pool_snapshot['timeouts']}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording latency, DB time, query count and pool wait per route template,
+    and logging requests slower than SLOW_REQUEST_MS with their query fingerprints.
+    With QUERY_AUDIT_ENABLED it also checks each request against its route's query budget.
+    """
+
+    def __init__(self, app):
+        from app.core.query_audit import query_auditor
+        self.app = app
+        self.auditor = query_auditor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (settings.request_metrics_enabled or settings.query_audit_enabled):
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            # The router stores the matched route in the scope, so the path template is known here.
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            request_metrics.observe(template, scope["method"], status, elapsed, stats)
+            if elapsed * 1000 >= settings.slow_request_ms:
+                _log_slow_request(template, scope, status, elapsed, stats)
+
+        # Outside the finally block, so a strict audit failure never masks an error from the app.
+        if settings.query_audit_enabled:
+            self.auditor.check(route, scope["method"], stats)
+
+
+def _log_slow_request(template: str, scope, status: int, elapsed: float, stats: RequestStats):
+    fingerprints: Dict[str, int] = {}
+    for statement in stats.statements:
+        key = fingerprint(statement)
+        fingerprints[key] = fingerprints.get(key, 0) + 1
+    logging.warning(json.dumps({
+        "event": "slow_request",
+        "route": template,
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 2),
+        "db_ms": round(stats.db_seconds * 1000, 2),
+        "pool_wait_ms": round(stats.pool_wait_seconds * 1000, 2),
+        "queries": stats.queries,
+        "fingerprints": [{"sql": sql, "count": count} for sql, count in fingerprints.items()],
+    }))
@@ -0,0 +1,17 @@
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
+
+
+def envelope(message: str, data: Any = None, success: bool = True, error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The ApiResponse shape as a plain dict, for routes that return FastJSONResponse directly
+    and skip response_model validation.
+    """
+    return {"success": success, "message": message, "data": data, "error": error}
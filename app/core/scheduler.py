@@ -1,5 +1,6 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
 
 scheduler = AsyncIOScheduler()
@@ -17,4 +18,12 @@ def add_daily_job(func, hour=0, minute=0):
         func,
         CronTrigger(hour=hour, minute=minute, timezone='UTC'),
         id='daily_credit_update'
-    )
\ No newline at end of file
+    )
+
+def add_interval_job(func, job_id, minutes=60):
+    scheduler.add_job(
+        func,
+        IntervalTrigger(minutes=minutes, timezone='UTC'),
+        id=job_id,
+        replace_existing=True
+    )
@@ -1,9 +1,18 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from .core.database import engine, Base
+from .core.database import engine, Base, pool_metrics
+from .core.request_metrics import RequestMetricsMiddleware, request_metrics
+from .core.rate_limit import RateLimitMiddleware
+from .core.scheduler import scheduler, start_scheduler, stop_scheduler, add_interval_job
 from app.config import get_settings
-from app.routes import credits, users, schema
+from app.routes import credits, users, schema, admin
+from app.services.background_service import BackgroundService
+from app.services.deduct_coalescer import deduct_coalescer
+from app.services.hold_service import HoldService
+from app.services.idempotency_service import IdempotencyService
+from app.services.schema_job_service import SchemaJobService
 
 settings=get_settings()
 
@@ -12,8 +21,17 @@ async def lifespan(app: FastAPI):
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+    BackgroundService.start_daily_task()
+    BackgroundService.start_snapshot_task()
+    HoldService.start_sweeper()
+    add_interval_job(IdempotencyService.purge_expired, "purge_idempotency_keys", minutes=60)
+    scheduler.add_job(SchemaJobService.recover_jobs, id="recover_schema_jobs")
+    start_scheduler()
     yield
 
+    await deduct_coalescer.drain()
+    stop_scheduler()
     await engine.dispose()
 
 app = FastAPI(
@@ -23,6 +41,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting; added first so CORS wraps it and 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,10 +53,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics; added last so it is outermost and times everything below it
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(credits.router)
 app.include_router(users.router)
 app.include_router(schema.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -48,4 +73,11 @@ async def read_root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "postgresql"}
\ No newline at end of file
+    return {"status": "healthy", "database": "postgresql"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        request_metrics.render(pool_metrics.snapshot(engine.pool)),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -1,4 +1,9 @@
 from .user import User
 from .credit import Credit
+from .credit_transaction import CreditTransaction, CreditSnapshot
+from .credit_hold import CreditHold
+from .idempotency import IdempotencyKey
+from .job_checkpoint import JobCheckpoint
+from .schema_job import SchemaJob
 
-__all__ = ["User", "Credit"]
\ No newline at end of file
+__all__ = ["User", "Credit", "CreditTransaction", "CreditSnapshot", "CreditHold", "IdempotencyKey", "JobCheckpoint", "SchemaJob"]
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import Column, Integer, DateTime, ForeignKey
-from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import Mapped, relationship
 
 from app.core.database import Base
 
@@ -12,4 +12,7 @@ class Credit(Base):
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     credits: Mapped[int] = Column(Integer, default=0)
-    last_updated = Column(DateTime, default=datetime.now)
\ No newline at end of file
+    # Total of the user's active holds; the available balance is credits - held.
+    held: Mapped[int] = Column(Integer, nullable=False, default=0, server_default="0")
+    last_updated = Column(DateTime, default=datetime.now)
+    user = relationship("User", back_populates="credit", lazy="raise")
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import Mapped
+
+from app.core.database import Base
+
+
+class CreditHold(Base):
+    """
+    Credits reserved for a user until they are captured, released or the hold expires.
+    The sum of a user's active holds is kept in `credits.held`, so the available balance
+    never needs to scan this table.
+    """
+    __tablename__ = "credit_holds"
+
+    id: Mapped[int] = Column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    amount: Mapped[int] = Column(Integer, nullable=False)
+    captured: Mapped[int] = Column(Integer, nullable=False, default=0)
+    status: Mapped[str] = Column(String(20), nullable=False, default="active")
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    settled_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_credit_holds_active_expires_at", "expires_at", postgresql_where=text("status = 'active'")),
+    )
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped
+
+from app.core.database import Base
+
+
+class CreditTransaction(Base):
+    """
+    Append-only ledger of every change to a user's balance. `amount` is the signed delta.
+    """
+    __tablename__ = "credit_transactions"
+
+    id: Mapped[int] = Column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    op: Mapped[str] = Column(String(20), nullable=False)
+    amount: Mapped[int] = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_credit_transactions_user_id_id", "user_id", "id"),
+        Index("ix_credit_transactions_created_at", "created_at"),
+    )
+
+
+class CreditSnapshot(Base):
+    """
+    Balance of a user as of `taken_at`: the sum of their ledger entries created at or before it.
+    """
+    __tablename__ = "credit_snapshots"
+
+    id: Mapped[int] = Column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    balance: Mapped[int] = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_credit_snapshots_user_id_taken_at", "user_id", "taken_at"),
+        Index("ix_credit_snapshots_taken_at", "taken_at"),
+    )
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.orm import Mapped
+
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = Column(String(255), primary_key=True)
+    scope: Mapped[str] = Column(String(255), nullable=False)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
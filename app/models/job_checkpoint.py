@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.orm import Mapped
+
+from app.core.database import Base
+
+
+class JobCheckpoint(Base):
+    """
+    Progress of the current run of a chunked background job, keyed by job name.
+    """
+    __tablename__ = "job_checkpoints"
+
+    job_name: Mapped[str] = Column(String(100), primary_key=True)
+    run_key: Mapped[str] = Column(String(100), nullable=False)
+    last_id: Mapped[int] = Column(BigInteger, nullable=False, default=0)
+    rows_processed: Mapped[int] = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
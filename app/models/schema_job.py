@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy.orm import Mapped
+
+from app.core.database import Base
+
+
+class SchemaJob(Base):
+    __tablename__ = "schema_jobs"
+
+    id: Mapped[str] = Column(String(32), primary_key=True)
+    kind: Mapped[str] = Column(String(20), nullable=False)
+    tables = Column(JSON, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status: Mapped[str] = Column(String(20), nullable=False, default="queued", index=True)
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts: Mapped[int] = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import Mapped, relationship
 
 from app.core.database import Base
 
@@ -12,4 +12,7 @@ class User(Base):
     user_id: Mapped[int] = Column(Integer, primary_key=True, index=True)
     email: Mapped[str] = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Loaded explicitly with joinedload/selectinload; lazy loading would issue hidden
+    # queries, which AsyncSession cannot run implicitly anyway.
+    credit = relationship("Credit", back_populates="user", uselist=False, lazy="raise")
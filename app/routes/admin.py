@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.balance_cache import balance_cache
+from app.core.database import engine, pool_metrics
+from app.core.query_audit import query_budget, query_auditor
+from app.core.rate_limit import rate_limit_store
+from app.dependencies import get_db
+from app.models import JobCheckpoint
+from app.schemas.job import JobCheckpointResponse
+from app.schemas.response import ApiResponse
+from app.services.background_service import DAILY_CREDIT_JOB, daily_credit_metrics
+from app.services.deduct_coalescer import deduct_coalescer
+from app.utils.schema_catalog import SchemaCatalog
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/jobs/daily-credits", response_model=ApiResponse)
+@query_budget(1)
+async def get_daily_credit_job(db: AsyncSession = Depends(get_db)):
+    checkpoint = await db.get(JobCheckpoint, DAILY_CREDIT_JOB)
+    data = {
+        "last_run": daily_credit_metrics.snapshot(),
+        "checkpoint": JobCheckpointResponse.model_validate(checkpoint) if checkpoint else None,
+    }
+    return ApiResponse(success=True, message="Daily credit job stats retrieved successfully", data=data)
+
+
+@router.get("/cache/balances", response_model=ApiResponse)
+@query_budget(0)
+async def get_balance_cache_stats():
+    return ApiResponse(success=True, message="Balance cache stats retrieved successfully", data=balance_cache.stats())
+
+
+@router.get("/cache/schema", response_model=ApiResponse)
+@query_budget(0)
+async def get_schema_cache_stats():
+    return ApiResponse(success=True, message="Schema cache stats retrieved successfully", data=SchemaCatalog.stats())
+
+
+@router.get("/db/pool", response_model=ApiResponse)
+@query_budget(0)
+async def get_pool_stats():
+    data = pool_metrics.snapshot(engine.pool)
+    return ApiResponse(success=True, message="Connection pool stats retrieved successfully", data=data)
+
+
+@router.get("/credits/coalescer", response_model=ApiResponse)
+@query_budget(0)
+async def get_deduct_coalescer_stats():
+    return ApiResponse(success=True, message="Deduct coalescer stats retrieved successfully", data=deduct_coalescer.stats())
+
+
+@router.get("/rate-limit", response_model=ApiResponse)
+@query_budget(0)
+async def get_rate_limit_stats():
+    return ApiResponse(success=True, message="Rate limit stats retrieved successfully", data=rate_limit_store.stats())
+
+
+@router.get("/query-audit", response_model=ApiResponse)
+@query_budget(0)
+async def get_query_audit():
+    return ApiResponse(success=True, message="Query audit results retrieved successfully", data=query_auditor.snapshot())
@@ -1,35 +1,182 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional, List
+
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_audit import query_budget
+from app.config import get_settings
+from app.core.responses import FastJSONResponse, envelope
 from app.dependencies import get_db
 from app.schemas import CreditUpdate
 from app.services.credit_service import CreditService
-from app.schemas.credit import CreditAmount, CreditResponse
-from app.schemas.response import  ApiResponse
+from app.services.deduct_coalescer import deduct_coalescer
+from app.services.hold_service import HoldService
+from app.services.idempotency_service import IdempotencyService
+from app.schemas.credit import CreditAmount, CreditResponse, CreditBatchRequest, CreditTransactionResponse, \
+    CreditHistoryPage, CreditBalanceAt, CreditBatchItemResult, HoldRequest, HoldCapture, HoldResponse
+from app.schemas.response import ApiResponse
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/credits", tags=["credits"])
 
+
+def _credit_update(row) -> dict:
+    # Built straight from the RETURNING row; response_model only documents the shape.
+    return {"credits": row.credits, "held": row.held, "last_updated": row.last_updated.isoformat()}
+
+
+def _hold_response(row) -> dict:
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "amount": row.amount,
+        "captured": row.captured,
+        "status": row.status,
+        "expires_at": row.expires_at.isoformat(),
+        "created_at": row.created_at.isoformat(),
+        "settled_at": row.settled_at.isoformat() if row.settled_at else None,
+    }
+
+
+@router.get("/holds/{hold_id}", response_model=ApiResponse[HoldResponse])
+@query_budget(1)
+async def get_hold(hold_id: int, db: AsyncSession = Depends(get_db)):
+    service = HoldService(db)
+    hold = await service.get_hold(hold_id)
+    return FastJSONResponse(envelope("Hold retrieved successfully", _hold_response(hold)))
+
+@router.post("/holds/{hold_id}/capture", response_model=ApiResponse[HoldResponse])
+@query_budget(2)
+async def capture_hold(hold_id: int, capture: HoldCapture, db: AsyncSession = Depends(get_db)):
+    service = HoldService(db)
+    hold = await service.capture(hold_id, capture.amount)
+    return FastJSONResponse(envelope("Hold captured successfully", _hold_response(hold)))
+
+@router.post("/holds/{hold_id}/release", response_model=ApiResponse[HoldResponse])
+@query_budget(2)
+async def release_hold(hold_id: int, db: AsyncSession = Depends(get_db)):
+    service = HoldService(db)
+    hold = await service.release(hold_id)
+    return FastJSONResponse(envelope("Hold released successfully", _hold_response(hold)))
+
 @router.get("/{user_id}", response_model=CreditResponse)
+@query_budget(1)
 async def get_credit_balance(user_id: int, db: AsyncSession = Depends(get_db)):
     service = CreditService(db)
-    return await service.get_credit_balance(user_id)
+    balance = await service.get_credit_balance(user_id)
+    return FastJSONResponse(balance.model_dump(mode="json"))
 
-@router.post("/{user_id}/add", response_model=ApiResponse)
-async def add_credits(user_id: int, amount_data: CreditAmount, db: AsyncSession = Depends(get_db)):
+@router.get("/{user_id}/history", response_model=ApiResponse[CreditHistoryPage])
+@query_budget(1)
+async def get_credit_history(
+        user_id: int,
+        limit: int = Query(default=50, ge=1, le=500),
+        before_id: Optional[int] = Query(default=None, description="Return entries older than this ledger id"),
+        db: AsyncSession = Depends(get_db)
+):
     service = CreditService(db)
-    credit = await service.add_credits(user_id, amount_data.amount)
-    credit_schema=CreditUpdate.model_validate(credit)
-    return ApiResponse(success=True, message="Credits added successfully", data=credit_schema)
+    transactions, next_before_id = await service.get_history(user_id, limit, before_id)
+    page = CreditHistoryPage(
+        transactions=[CreditTransactionResponse.model_validate(t) for t in transactions],
+        next_before_id=next_before_id
+    )
+    return ApiResponse(success=True, message="Credit history retrieved successfully", data=page)
 
-@router.post("/{user_id}/deduct", response_model=ApiResponse)
-async def deduct_credits(user_id: int, amount_data: CreditAmount, db: AsyncSession = Depends(get_db)):
+@router.get("/{user_id}/balance-at", response_model=ApiResponse[CreditBalanceAt])
+@query_budget(1)
+async def get_balance_at(user_id: int, at: datetime, db: AsyncSession = Depends(get_db)):
     service = CreditService(db)
-    credit = await service.deduct_credits(user_id, amount_data.amount)
-    credit_schema = CreditUpdate.model_validate(credit)
-    return ApiResponse(success=True, message="Credits deducted successfully", data=credit_schema)
+    credits = await service.get_balance_at(user_id, at)
+    balance = CreditBalanceAt(user_id=user_id, credits=credits, at=at)
+    return ApiResponse(success=True, message="Balance retrieved successfully", data=balance)
+
+@router.post("/{user_id}/add", response_model=ApiResponse[CreditUpdate])
+@query_budget(3)
+async def add_credits(
+        user_id: int,
+        amount_data: CreditAmount,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_db)
+):
+    service = CreditService(db)
+
+    async def operation():
+        credit = await service.add_credits(user_id, amount_data.amount, commit=False)
+        return envelope("Credits added successfully", _credit_update(credit))
+
+    scope = f"add:{user_id}:{amount_data.amount}"
+    payload = await IdempotencyService(db).execute(idempotency_key, scope, operation)
+    return FastJSONResponse(payload)
+
+@router.post("/{user_id}/deduct", response_model=ApiResponse[CreditUpdate])
+@query_budget(3)
+async def deduct_credits(
+        user_id: int,
+        amount_data: CreditAmount,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_db)
+):
+    if settings.deduct_coalescing_enabled and idempotency_key is None:
+        # A keyed request must commit its key with the deduct, so only unkeyed ones are merged.
+        credit = await deduct_coalescer.deduct(user_id, amount_data.amount)
+        return FastJSONResponse(envelope("Credits deducted successfully", _credit_update(credit)))
+
+    service = CreditService(db)
+
+    async def operation():
+        credit = await service.deduct_credits(user_id, amount_data.amount, commit=False)
+        return envelope("Credits deducted successfully", _credit_update(credit))
+
+    scope = f"deduct:{user_id}:{amount_data.amount}"
+    payload = await IdempotencyService(db).execute(idempotency_key, scope, operation)
+    return FastJSONResponse(payload)
+
+@router.post("/{user_id}/holds", response_model=ApiResponse[HoldResponse])
+@query_budget(3)
+async def reserve_credits(
+        user_id: int,
+        hold_data: HoldRequest,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_db)
+):
+    service = HoldService(db)
+
+    async def operation():
+        hold = await service.reserve(user_id, hold_data.amount, hold_data.ttl_seconds, commit=False)
+        return envelope("Credits reserved successfully", _hold_response(hold))
+
+    scope = f"hold:{user_id}:{hold_data.amount}:{hold_data.ttl_seconds}"
+    payload = await IdempotencyService(db).execute(idempotency_key, scope, operation)
+    return FastJSONResponse(payload)
+
+@router.patch("/{user_id}/reset", response_model=ApiResponse[CreditUpdate])
+@query_budget(3)
+async def reset_credits(
+        user_id: int,
+        idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_db)
+):
+    service = CreditService(db)
+
+    async def operation():
+        credit = await service.reset_credits(user_id, commit=False)
+        return envelope("Credits reset successfully", _credit_update(credit))
+
+    scope = f"reset:{user_id}"
+    payload = await IdempotencyService(db).execute(idempotency_key, scope, operation)
+    return FastJSONResponse(payload)
+
 
-@router.patch("/{user_id}/reset", response_model=ApiResponse)
-async def reset_credits(user_id: int, db: AsyncSession = Depends(get_db)):
+@router.post("/batch", response_model=ApiResponse[List[CreditBatchItemResult]])
+@query_budget(3)
+async def apply_batch(batch: CreditBatchRequest, db: AsyncSession = Depends(get_db)):
     service = CreditService(db)
-    credit = await service.reset_credits(user_id)
-    credit_schema = CreditUpdate.model_validate(credit)
-    return ApiResponse(success=True, message="Credits reset successfully", data=credit_schema)
\ No newline at end of file
+    applied, results = await service.apply_batch(batch.items, batch.atomic)
+    if not applied:
+        message = "Batch rejected, no credits were changed" if batch.atomic else "No items applied"
+    elif all(result.success for result in results):
+        message = "Batch applied successfully"
+    else:
+        message = "Batch partially applied"
+    return ApiResponse(success=applied, message=message, data=results)
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.query_audit import query_budget
 from app.dependencies import get_db
 from app.schemas.schemas import SchemaUpdateRequest, OperationType, ColumnDefinition, SchemaResponse, AddColumnResponse, \
-    TableInfoResponse
+    TableInfoResponse, SchemaPlanRequest, SchemaJobRequest, SchemaJobResponse
+from app.services.schema_job_service import SchemaJobService
 from app.services.schema_service import SchemaService
 
 router = APIRouter(prefix="/api/schema", tags=["schema"])
 
 
 @router.post("/update")
+@query_budget(None, allow_repeats=True)
 async def update_schema(
         request: SchemaUpdateRequest,
         db: AsyncSession = Depends(get_db)
@@ -21,25 +24,26 @@ async def update_schema(
             if not request.column_definition:
                 raise HTTPException(status_code=400, detail="column_definition required for add_column")
 
-            result = await service.add_column(request.table_name, request.column_definition)
+            result = await service.add_column(request.table_name, request.column_definition, request.online)
             return AddColumnResponse(
                 success=True,
                 message="Column added successfully",
                 table_name=request.table_name,
                 column_added=request.column_definition.name,
-                sql_executed=result["sql_executed"]
+                sql_executed=result["sql_executed"],
+                execution=result.get("execution")
             )
 
         elif request.operation == OperationType.DROP_COLUMN:
             if not request.column_name:
                 raise HTTPException(status_code=400, detail="column_name required for drop_column")
 
-            result = await service.drop_column(request.table_name, request.column_name)
+            result = await service.drop_column(request.table_name, request.column_name, request.online)
             return SchemaResponse(
                 success=True,
                 message="Column dropped successfully",
                 operation="drop_column",
-                data={"table": request.table_name, "column": request.column_name},
+                data={"table": request.table_name, "column": request.column_name, "execution": result.get("execution")},
                 sql_executed=result["sql_executed"]
             )
 
@@ -73,8 +77,38 @@ async def update_schema(
 
 
 
+@router.post("/plan", response_model=SchemaResponse)
+@query_budget(None, allow_repeats=True)
+async def apply_schema_plan(
+        request: SchemaPlanRequest,
+        db: AsyncSession = Depends(get_db)
+):
+    service = SchemaService(db)
+
+    try:
+        result = await service.apply_plan(request.operations, request.dry_run)
+        return SchemaResponse(
+            success=True,
+            message="Schema plan validated successfully" if request.dry_run else "Schema plan applied successfully",
+            operation="apply_plan",
+            data={
+                "operations_count": result["operations_count"],
+                "statements_count": len(result["statements"]),
+                "dry_run": result["dry_run"]
+            },
+            sql_executed="; ".join(sql.rstrip(";") for sql in result["statements"])
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.delete("/table/{table_name}/column/{column_name}", response_model=SchemaResponse)
+@query_budget(5)
 async def drop_column(
         table_name: str,
         column_name: str,
@@ -98,6 +132,7 @@ async def drop_column(
 
 
 @router.get("/tables", response_model=SchemaResponse)
+@query_budget(1)
 async def get_all_tables(db: AsyncSession = Depends(get_db)):
     service = SchemaService(db)
 
@@ -114,6 +149,7 @@ async def get_all_tables(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/table/{table_name}", response_model=TableInfoResponse)
+@query_budget(4)
 async def get_table_schema(
         table_name: str,
         db: AsyncSession = Depends(get_db)
@@ -131,4 +167,26 @@ async def get_table_schema(
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs", response_model=SchemaJobResponse, status_code=202)
+@query_budget(1)
+async def submit_schema_job(
+        request: SchemaJobRequest,
+        db: AsyncSession = Depends(get_db)
+):
+    service = SchemaJobService(db)
+    job = await service.submit(request)
+    return SchemaJobResponse.model_validate(job)
+
+
+@router.get("/jobs/{job_id}", response_model=SchemaJobResponse)
+@query_budget(1)
+async def get_schema_job(
+        job_id: str,
+        db: AsyncSession = Depends(get_db)
+):
+    service = SchemaJobService(db)
+    job = await service.get_job(job_id)
+    return SchemaJobResponse.model_validate(job)
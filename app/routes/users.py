@@ -1,23 +1,123 @@
-from fastapi import APIRouter, Depends
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import AsyncSessionLocal
+from app.core.query_audit import query_budget
+from app.core.responses import FastJSONResponse, envelope
 from app.dependencies import get_db
 from app.schemas.response import ApiResponse
-from app.schemas.user import UserCreate, UserResponse
+from app.schemas.user import UserCreate, UserResponse, UserPage, UserWithBalance, UserWithBalanceList, \
+    UserBulkResult
 from app.services.user_service import UserService
+from app.utils.bulk_parser import iter_records
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
-@router.post("/", response_model=ApiResponse)
+MAX_SUMMARY_IDS = 500
+
+
+def _user_response(row) -> dict:
+    return {
+        "user_id": row.user_id,
+        "email": row.email,
+        "name": row.name,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+@router.post("/", response_model=ApiResponse[UserResponse])
+@query_budget(1)
 async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     service = UserService(db)
     user = await service.create_user(user_data)
-    user_schema = UserResponse.model_validate(user)
-    return ApiResponse(success=True, message="User created successfully", data=user_schema)
+    return FastJSONResponse(envelope("User created successfully", _user_response(user)))
+
+@router.get("/", response_model=ApiResponse[UserPage])
+@query_budget(1)
+async def list_users(
+        limit: int = Query(default=100, ge=1, le=1000),
+        after_id: Optional[int] = Query(default=None, description="Return users with a larger user_id"),
+        email: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        stream: bool = Query(default=False, description="Stream every matching user as NDJSON"),
+        db: AsyncSession = Depends(get_db)
+):
+    filters = dict(
+        after_id=after_id,
+        email=email,
+        name_prefix=name_prefix,
+        created_after=created_after,
+        created_before=created_before
+    )
+    if stream:
+        return StreamingResponse(_export_users(filters), media_type="application/x-ndjson")
+
+    service = UserService(db)
+    users, next_after_id = await service.list_users(limit, **filters)
+    page = {"users": [_user_response(user) for user in users], "next_after_id": next_after_id}
+    return FastJSONResponse(envelope("Users retrieved successfully", page))
+
+async def _export_users(filters: dict):
+    # The request's get_db session is closed before a streaming body is sent, so the
+    # export opens its own session for the lifetime of the cursor.
+    async with AsyncSessionLocal() as db:
+        service = UserService(db)
+        async for partition in service.stream_users(**filters):
+            yield "".join(
+                json.dumps(_user_response(user)) + "\n"
+                for user in partition
+            )
+
+@router.post("/bulk", response_model=ApiResponse[UserBulkResult])
+@query_budget(None, allow_repeats=True)
+async def bulk_create_users(request: Request, db: AsyncSession = Depends(get_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        fmt = "ndjson"
+    elif content_type == "text/csv":
+        fmt = "csv"
+    else:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv")
+
+    service = UserService(db)
+    result = await service.bulk_create(iter_records(request.stream(), fmt))
+    return ApiResponse(success=result.failed == 0, message=f"Created {result.created} users", data=result)
+
+@router.get("/summary", response_model=ApiResponse[UserWithBalanceList])
+@query_budget(1)
+async def get_users_with_balance(
+        ids: str = Query(description="Comma-separated user ids, e.g. 1,2,3"),
+        db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not user_ids or len(user_ids) > MAX_SUMMARY_IDS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_SUMMARY_IDS} ids")
+
+    service = UserService(db)
+    users = await service.get_users_with_balance(user_ids)
+    found = {user.user_id for user in users}
+    data = UserWithBalanceList(users=users, missing_ids=[uid for uid in user_ids if uid not in found])
+    return ApiResponse(success=True, message="Users retrieved successfully", data=data)
+
+@router.get("/{user_id}/summary", response_model=ApiResponse[UserWithBalance])
+@query_budget(1)
+async def get_user_with_balance(user_id: int, db: AsyncSession = Depends(get_db)):
+    service = UserService(db)
+    user = await service.get_user_with_balance(user_id)
+    return ApiResponse(success=True, message="User retrieved successfully", data=user)
 
-@router.get("/{user_id}", response_model=ApiResponse)
+@router.get("/{user_id}", response_model=ApiResponse[UserResponse])
+@query_budget(1)
 async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     service = UserService(db)
     user = await service.get_user(user_id)
-    user_schema = UserResponse.model_validate(user)
-    return ApiResponse(success=True, message="User retrieved successfully", data=user_schema)
\ No newline at end of file
+    return FastJSONResponse(envelope("User retrieved successfully", _user_response(user)))
\ No newline at end of file
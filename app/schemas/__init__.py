@@ -1,9 +1,16 @@
-from .user import UserBase, UserCreate, UserResponse
-from .credit import CreditAmount, CreditResponse, CreditUpdate
+from .user import UserBase, UserCreate, UserResponse, UserBulkError, UserBulkResult, UserPage, \
+    UserWithBalance, UserWithBalanceList
+from .credit import CreditAmount, CreditResponse, CreditUpdate, CreditOperation, CreditBatchItem, \
+    CreditBatchRequest, CreditBatchItemResult, LedgerOperation, CreditTransactionResponse, CreditHistoryPage, \
+    CreditBalanceAt, HoldStatus, HoldRequest, HoldCapture, HoldResponse
 from .response import ApiResponse
 
 __all__ = [
-    "UserBase", "UserCreate", "UserResponse",
+    "UserBase", "UserCreate", "UserResponse", "UserBulkError", "UserBulkResult", "UserPage",
+    "UserWithBalance", "UserWithBalanceList",
     "CreditAmount", "CreditResponse", "CreditUpdate",
+    "CreditOperation", "CreditBatchItem", "CreditBatchRequest", "CreditBatchItemResult",
+    "LedgerOperation", "CreditTransactionResponse", "CreditHistoryPage", "CreditBalanceAt",
+    "HoldStatus", "HoldRequest", "HoldCapture", "HoldResponse",
     "ApiResponse",
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, computed_field
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import Optional, List
 
 
 class CreditAmount(BaseModel):
@@ -10,13 +11,102 @@ class CreditAmount(BaseModel):
 class CreditResponse(BaseModel):
     user_id: int
     credits: int
+    held: int = 0
     last_updated: datetime
 
+    @computed_field
+    @property
+    def available(self) -> int:
+        return self.credits - self.held
+
     class Config:
         from_attributes = True
 
 
 class CreditUpdate(BaseModel):
     credits: int
+    held: int = 0
     last_updated: datetime
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CreditOperation(str, Enum):
+    ADD = "add"
+    DEDUCT = "deduct"
+    RESET = "reset"
+
+
+class CreditBatchItem(BaseModel):
+    user_id: int
+    op: CreditOperation
+    amount: int = Field(default=0, ge=0, description="Ignored for reset")
+
+
+class CreditBatchRequest(BaseModel):
+    items: List[CreditBatchItem] = Field(min_length=1, max_length=5000)
+    atomic: bool = Field(default=True, description="Apply all items or none")
+
+
+class CreditBatchItemResult(BaseModel):
+    user_id: int
+    op: CreditOperation
+    success: bool
+    credits: Optional[int] = None
+    error: Optional[str] = None
+
+
+class LedgerOperation(str, Enum):
+    ADD = "add"
+    DEDUCT = "deduct"
+    RESET = "reset"
+    DAILY_GRANT = "daily_grant"
+    CAPTURE = "capture"
+    OPENING = "opening"
+
+
+class CreditTransactionResponse(BaseModel):
+    id: int
+    user_id: int
+    op: LedgerOperation
+    amount: int
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CreditHistoryPage(BaseModel):
+    transactions: List[CreditTransactionResponse]
+    next_before_id: Optional[int] = None
+
+
+class CreditBalanceAt(BaseModel):
+    user_id: int
+    credits: int
+    at: datetime
+
+
+class HoldStatus(str, Enum):
+    ACTIVE = "active"
+    CAPTURED = "captured"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class HoldRequest(BaseModel):
+    amount: int = Field(gt=0, description="Credits to reserve")
+    ttl_seconds: Optional[int] = Field(default=None, gt=0, description="Defaults to HOLD_DEFAULT_TTL_SECONDS")
+
+
+class HoldCapture(BaseModel):
+    amount: Optional[int] = Field(default=None, ge=0, description="Defaults to the full hold; the rest is released")
+
+
+class HoldResponse(BaseModel):
+    id: int
+    user_id: int
+    amount: int
+    captured: int
+    status: HoldStatus
+    expires_at: datetime
+    created_at: datetime
+    settled_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
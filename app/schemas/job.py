@@ -0,0 +1,14 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional
+
+
+class JobCheckpointResponse(BaseModel):
+    job_name: str
+    run_key: str
+    last_id: int
+    rows_processed: int
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
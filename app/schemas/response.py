@@ -1,11 +1,11 @@
 from pydantic import BaseModel
-from typing import Any, Optional, TypeVar, Generic
+from typing import Optional, TypeVar, Generic
 
 T=TypeVar("T")
 
 class ApiResponse(BaseModel, Generic[T]):
     success: bool
     message: str
-    data: Optional[Any] = None
+    data: Optional[T] = None
     error: Optional[str] = None
 
@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import Union, Dict, Any, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from enum import Enum
 
 
@@ -32,6 +33,7 @@ class AddColumnResponse(BaseModel):
     table_name: str
     column_added: str
     sql_executed: str
+    execution: Optional[Dict[str, Any]] = None
 
 class TableInfoResponse(BaseModel):
     success: bool
@@ -52,4 +54,34 @@ class SchemaUpdateRequest(BaseModel):
     operation: OperationType
     table_name: str
     column_definition: Optional[ColumnDefinition] = None
-    column_name: Optional[str] = None
\ No newline at end of file
+    column_name: Optional[str] = None
+    columns: Optional[List[ColumnDefinition]] = None
+    online: bool = Field(default=False, description="Use lock timeouts, retries and low-lock rewrites")
+
+class SchemaPlanRequest(BaseModel):
+    operations: List[SchemaUpdateRequest] = Field(min_length=1, max_length=500)
+    dry_run: bool = False
+
+class SchemaJobRequest(BaseModel):
+    operation: Optional[SchemaUpdateRequest] = None
+    plan: Optional[SchemaPlanRequest] = None
+
+    @model_validator(mode="after")
+    def check_one_of(self):
+        if (self.operation is None) == (self.plan is None):
+            raise ValueError("Provide exactly one of operation or plan")
+        return self
+
+class SchemaJobResponse(BaseModel):
+    id: str
+    kind: str
+    tables: List[str]
+    status: str
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
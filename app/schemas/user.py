@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, computed_field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 
 class UserBase(BaseModel):
@@ -17,4 +17,39 @@ class UserResponse(UserBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserBulkError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class UserBulkResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[UserBulkError]
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+class UserPage(BaseModel):
+    users: List[UserResponse]
+    next_after_id: Optional[int] = None
+
+
+class UserWithBalance(UserResponse):
+    credits: Optional[int] = None
+    held: Optional[int] = None
+    last_updated: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def available(self) -> Optional[int]:
+        return None if self.credits is None else self.credits - (self.held or 0)
+
+
+class UserWithBalanceList(BaseModel):
+    users: List[UserWithBalance]
+    missing_ids: List[int]
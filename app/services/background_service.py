@@ -1,32 +1,338 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import update, text
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional
+from app.config import get_settings
+from app.core.balance_cache import balance_cache
 from app.core.database import AsyncSessionLocal
-from app.models import Credit
-from datetime import datetime
+from app.core.job_metrics import JobMetrics
+from app.models import JobCheckpoint
+from datetime import datetime, timedelta
 import logging
+import time
+
+settings = get_settings()
+
+DAILY_CREDIT_JOB = "daily_credit_update"
+
+daily_credit_metrics = JobMetrics(DAILY_CREDIT_JOB)
+
+# One chunk of the daily grant. `claim` locks the checkpoint row and only matches while it is
+# still at :last_id, so two schedulers racing on the same run cannot grant the same chunk.
+GRANT_CHUNK_SQL = """
+WITH claim AS (
+    SELECT job_name
+    FROM job_checkpoints
+    WHERE job_name = :job_name AND run_key = :run_key AND last_id = :last_id
+    FOR UPDATE
+),
+chunk AS (
+    SELECT MAX(id) AS upper_id
+    FROM (
+        SELECT id
+        FROM credits
+        WHERE id > :last_id AND EXISTS (SELECT 1 FROM claim)
+        ORDER BY id
+        LIMIT :chunk_size
+    ) ids
+),
+granted AS (
+    -- A key range rather than a join against the chunk's ids, so the update is an index range
+    -- scan instead of a scan of the whole table per chunk.
+    UPDATE credits c
+    SET credits = c.credits + :amount, last_updated = :local_now
+    WHERE c.id > :last_id AND c.id <= (SELECT upper_id FROM chunk)
+    RETURNING c.id, c.user_id
+),
+logged AS (
+    INSERT INTO credit_transactions (user_id, op, amount, created_at)
+    SELECT user_id, 'daily_grant', :amount, :local_now
+    FROM granted
+),
+progress AS (
+    UPDATE job_checkpoints
+    SET last_id = (SELECT MAX(id) FROM granted),
+        rows_processed = rows_processed + (SELECT COUNT(*) FROM granted),
+        updated_at = :now
+    WHERE job_name IN (SELECT job_name FROM claim) AND EXISTS (SELECT 1 FROM granted)
+)
+SELECT
+    (SELECT COUNT(*) FROM claim) AS claimed,
+    (SELECT COUNT(*) FROM granted) AS granted_rows,
+    (SELECT MAX(id) FROM granted) AS last_id,
+    ARRAY(SELECT user_id FROM granted) AS user_ids
+"""
+
+
+OPENING_BALANCES_JOB = "opening_balances"
+
+# Balances that predate the ledger have no entries explaining them. For a chunk of credit rows
+# locked by the previous statement, record the difference between the balance and the ledger
+# sum as one 'opening' entry, dated no later than the user's first entry. The rows are locked
+# first, in a separate statement, so this statement's snapshot includes every ledger entry
+# committed by writers that held the lock before.
+OPENING_CHUNK_SQL = """
+INSERT INTO credit_transactions (user_id, op, amount, created_at)
+SELECT c.user_id, 'opening', COALESCE(c.credits, 0) - COALESCE(l.total, 0),
+       LEAST(COALESCE(c.last_updated, :now), COALESCE(l.first_at, :now))
+FROM credits c
+LEFT JOIN LATERAL (
+    SELECT SUM(amount) AS total, MIN(created_at) AS first_at
+    FROM credit_transactions t
+    WHERE t.user_id = c.user_id
+) l ON TRUE
+WHERE c.id = ANY(CAST(:ids AS INTEGER[]))
+  AND COALESCE(c.credits, 0) <> COALESCE(l.total, 0)
+  AND NOT EXISTS (SELECT 1 FROM credit_transactions o WHERE o.user_id = c.user_id AND o.op = 'opening')
+"""
+
+# A snapshot is the sum of a user's ledger entries created at or before `taken_at`, built from
+# their previous snapshot plus the entries since. Only users with entries in (:since, :cutoff]
+# get a new one. The cutoff trails the clock by a lag longer than any credit transaction, so
+# every entry dated before it has committed when it is summed.
+SNAPSHOT_SQL = """
+WITH moved AS (
+    SELECT DISTINCT user_id
+    FROM credit_transactions
+    WHERE created_at > :since AND created_at <= :cutoff
+)
+INSERT INTO credit_snapshots (user_id, balance, taken_at)
+SELECT moved.user_id, COALESCE(s.balance, 0) + t.total, :cutoff
+FROM moved
+LEFT JOIN LATERAL (
+    SELECT balance, taken_at
+    FROM credit_snapshots
+    WHERE user_id = moved.user_id AND taken_at <= :cutoff
+    ORDER BY taken_at DESC
+    LIMIT 1
+) s ON TRUE
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(amount), 0) AS total
+    FROM credit_transactions
+    WHERE user_id = moved.user_id
+      AND created_at > COALESCE(s.taken_at, CAST('-infinity' AS TIMESTAMP))
+      AND created_at <= :cutoff
+) t
+"""
 
 
 class BackgroundService:
 
     @staticmethod
-    async def add_daily_credits():
+    async def add_daily_credits(run_key: Optional[str] = None):
+        """
+        Grant the daily credits in primary-key chunks, each in its own short transaction.
+        The checkpoint advances in the same transaction as the chunk it covers, so a crashed
+        run resumes after the last committed chunk instead of granting twice.
+        """
+        run_key = run_key or datetime.utcnow().date().isoformat()
         async with AsyncSessionLocal() as db:
             try:
+                checkpoint = await db.get(JobCheckpoint, DAILY_CREDIT_JOB)
+                if checkpoint is not None and checkpoint.run_key == run_key:
+                    if checkpoint.completed_at is not None:
+                        logging.info(f"Daily credits for {run_key} were already granted")
+                        return
+                    daily_credit_metrics.start(run_key)
+                    last_id = checkpoint.last_id
+                    logging.info(f"Resuming daily credits for {run_key} after credit id {last_id}")
+                else:
+                    if checkpoint is not None and checkpoint.completed_at is None:
+                        logging.warning(f"Daily credit run {checkpoint.run_key} did not finish, starting {run_key}")
+                    daily_credit_metrics.start(run_key)
+                    await BackgroundService._start_checkpoint(db, run_key)
+                    last_id = 0
+
+                while True:
+                    chunk_started = time.perf_counter()
+                    result = await db.execute(
+                        text(GRANT_CHUNK_SQL),
+                        {
+                            "job_name": DAILY_CREDIT_JOB,
+                            "run_key": run_key,
+                            "last_id": last_id,
+                            "chunk_size": settings.daily_credit_chunk_size,
+                            "amount": settings.daily_credit_amount,
+                            "now": datetime.utcnow(),
+                            # Balances and the ledger use local time like every other credit write;
+                            # the checkpoint keeps UTC.
+                            "local_now": datetime.now(),
+                        }
+                    )
+                    chunk = result.one()
+                    await db.commit()
+
+                    if not chunk.claimed:
+                        logging.warning(f"Daily credit run {run_key} is being processed elsewhere, stopping")
+                        daily_credit_metrics.finish("skipped")
+                        return
+                    if chunk.granted_rows == 0:
+                        break
+                    await balance_cache.delete(*chunk.user_ids)
+                    daily_credit_metrics.record_chunk(chunk.granted_rows, time.perf_counter() - chunk_started)
+                    last_id = chunk.last_id
+
                 await db.execute(
-                    update(Credit)
-                    .values(credits=Credit.credits + 5, last_updated=datetime.utcnow())
+                    update(JobCheckpoint)
+                    .where(
+                        JobCheckpoint.job_name == DAILY_CREDIT_JOB,
+                        JobCheckpoint.run_key == run_key,
+                        JobCheckpoint.last_id == last_id,
+                    )
+                    .values(completed_at=datetime.utcnow())
                 )
                 await db.commit()
-
-                result = await db.execute(select(Credit))
-                count = len(result.scalars().all())
-                logging.info(f"Added 5 credits to {count} users")
+                daily_credit_metrics.finish()
+                stats = daily_credit_metrics.snapshot()
+                logging.info(
+                    f"Added {settings.daily_credit_amount} credits to {stats['rows_updated']} users "
+                    f"in {stats['chunks']} chunks, {stats['duration_seconds']:.2f}s"
+                )
 
             except Exception as e:
                 await db.rollback()
+                daily_credit_metrics.fail(e)
                 logging.error(f"Failed to add daily credits: {e}")
 
+    @staticmethod
+    async def resume_daily_credits():
+        """
+        Finish a daily credit run that was interrupted, e.g. by a restart.
+        """
+        async with AsyncSessionLocal() as db:
+            checkpoint = await db.get(JobCheckpoint, DAILY_CREDIT_JOB)
+        if checkpoint is not None and checkpoint.completed_at is None:
+            await BackgroundService.add_daily_credits(checkpoint.run_key)
+
+    @staticmethod
+    async def _start_checkpoint(db: AsyncSession, run_key: str):
+        now = datetime.utcnow()
+        stmt = insert(JobCheckpoint).values(
+            job_name=DAILY_CREDIT_JOB,
+            run_key=run_key,
+            last_id=0,
+            rows_processed=0,
+            started_at=now,
+            updated_at=now,
+            completed_at=None,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobCheckpoint.job_name],
+            set_={
+                "run_key": stmt.excluded.run_key,
+                "last_id": 0,
+                "rows_processed": 0,
+                "started_at": now,
+                "updated_at": now,
+                "completed_at": None,
+            },
+            where=JobCheckpoint.run_key != run_key
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    @staticmethod
+    async def record_opening_balances(chunk_size: Optional[int] = None) -> bool:
+        """
+        Give every balance that predates the ledger an 'opening' entry, in locked primary-key
+        chunks, so ledger sums match `credits`. Runs once; the checkpoint records progress and
+        completion. Returns whether every chunk has been recorded.
+        """
+        chunk_size = chunk_size or settings.daily_credit_chunk_size
+        async with AsyncSessionLocal() as db:
+            try:
+                checkpoint = await db.get(JobCheckpoint, OPENING_BALANCES_JOB)
+                if checkpoint is not None and checkpoint.completed_at is not None:
+                    return True
+                if checkpoint is None:
+                    now = datetime.utcnow()
+                    await db.execute(
+                        insert(JobCheckpoint)
+                        .values(job_name=OPENING_BALANCES_JOB, run_key=OPENING_BALANCES_JOB, last_id=0,
+                                rows_processed=0, started_at=now, updated_at=now)
+                        .on_conflict_do_nothing(index_elements=[JobCheckpoint.job_name])
+                    )
+                    await db.commit()
+                    last_id = 0
+                else:
+                    last_id = checkpoint.last_id
+
+                total = 0
+                while True:
+                    result = await db.execute(
+                        text("""
+                        SELECT id FROM credits
+                        WHERE id > :last_id
+                        ORDER BY id
+                        LIMIT :chunk_size
+                        FOR UPDATE
+                        """),
+                        {"last_id": last_id, "chunk_size": chunk_size}
+                    )
+                    ids = result.scalars().all()
+                    if not ids:
+                        break
+                    inserted = await db.execute(text(OPENING_CHUNK_SQL), {"ids": ids, "now": datetime.now()})
+                    last_id = ids[-1]
+                    total += inserted.rowcount
+                    await db.execute(
+                        update(JobCheckpoint)
+                        .where(JobCheckpoint.job_name == OPENING_BALANCES_JOB)
+                        .values(last_id=last_id, rows_processed=JobCheckpoint.rows_processed + inserted.rowcount,
+                                updated_at=datetime.utcnow())
+                    )
+                    await db.commit()
+
+                await db.execute(
+                    update(JobCheckpoint)
+                    .where(JobCheckpoint.job_name == OPENING_BALANCES_JOB)
+                    .values(completed_at=datetime.utcnow())
+                )
+                await db.commit()
+                logging.info(f"Recorded {total} opening balance ledger entries")
+                return True
+
+            except Exception as e:
+                await db.rollback()
+                logging.error(f"Failed to record opening balances: {e}")
+                return False
+
+    @staticmethod
+    async def take_balance_snapshots(lag_seconds: Optional[float] = None):
+        """
+        Snapshot the balance of every user whose ledger moved since the previous run, as of
+        `lag_seconds` ago, so point-in-time lookups stay bounded. Snapshots are ledger sums, so
+        none are taken until every opening balance is recorded: an opening entry is back-dated,
+        and one written after a snapshot would never be added to it.
+        """
+        lag_seconds = settings.snapshot_lag_seconds if lag_seconds is None else lag_seconds
+        if not await BackgroundService.record_opening_balances():
+            logging.warning("Opening balances are not recorded yet, skipping balance snapshots")
+            return
+        async with AsyncSessionLocal() as db:
+            try:
+                # Ledger timestamps come from datetime.now(), so the cutoff does too.
+                cutoff = datetime.now() - timedelta(seconds=lag_seconds)
+                since = await db.scalar(text("SELECT MAX(taken_at) FROM credit_snapshots"))
+                result = await db.execute(
+                    text(SNAPSHOT_SQL),
+                    {"since": since or datetime.min, "cutoff": cutoff}
+                )
+                await db.commit()
+                logging.info(f"Took {result.rowcount} balance snapshots")
+
+            except Exception as e:
+                await db.rollback()
+                logging.error(f"Failed to take balance snapshots: {e}")
+
     @staticmethod
     def start_daily_task():
-        from app.core.scheduler import add_daily_job
-        add_daily_job(BackgroundService.add_daily_credits)
\ No newline at end of file
+        from app.core.scheduler import scheduler, add_daily_job
+        add_daily_job(BackgroundService.add_daily_credits)
+        scheduler.add_job(BackgroundService.resume_daily_credits, id="resume_daily_credit_update")
+
+    @staticmethod
+    def start_snapshot_task(minutes: int = 60):
+        from app.core.scheduler import scheduler, add_interval_job
+        scheduler.add_job(BackgroundService.record_opening_balances, id="record_opening_balances")
+        add_interval_job(BackgroundService.take_balance_snapshots, "credit_balance_snapshots", minutes=minutes)
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models import Credit
-from app.utils import UserNotFound, InsufficientCredits
+from sqlalchemy import select, update, insert, text, literal, true, Integer
+from sqlalchemy.orm import aliased
+from typing import List, Tuple, Optional
+from app.core.balance_cache import balance_cache, invalidate_on_commit, commit_and_invalidate
+from app.models import Credit, CreditTransaction
+from app.schemas.credit import CreditResponse, CreditBatchItem, CreditBatchItemResult, CreditOperation, LedgerOperation
+from app.utils import UserNotFound, InsufficientCredits, InvalidAmount
 from datetime import datetime
 
 
@@ -9,36 +13,260 @@ class CreditService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_credit_balance(self, user_id: int):
-        result = await self.db.execute(select(Credit).where(Credit.user_id == user_id))
-        credit = result.scalar_one_or_none()
+    async def get_credit_balance(self, user_id: int, use_cache: bool = True) -> CreditResponse:
+        if use_cache:
+            cached = await balance_cache.get(user_id)
+            if cached is not None:
+                return cached
+
+        result = await self.db.execute(
+            select(Credit.user_id, Credit.credits, Credit.held, Credit.last_updated).where(Credit.user_id == user_id)
+        )
+        credit = result.one_or_none()
         if not credit:
             raise UserNotFound(user_id)
-        return credit
+        balance = CreditResponse.model_validate(credit)
+        await balance_cache.set(balance)
+        return balance
 
-    async def add_credits(self, user_id: int, amount: int):
-        credit = await self.get_credit_balance(user_id)
-        credit.credits += amount
-        credit.last_updated = datetime.now()
-        await self.db.commit()
-        await self.db.refresh(credit)
+    async def _apply_update(self, user_id: int, op: LedgerOperation, values: dict, delta, *conditions):
+        """
+        Run a single conditional UPDATE ... RETURNING against the user's credit row and
+        append the matching ledger entry in the same statement.
+        Returns the updated row, or None when no row matched.
+        """
+        credits = Credit.__table__
+        updated = (
+            update(credits)
+            .where(credits.c.user_id == user_id, *conditions)
+            .values(**values, last_updated=datetime.now())
+            .returning(credits.c.user_id, credits.c.credits, credits.c.held, credits.c.last_updated,
+                       delta.label("amount"))
+            .cte("updated")
+        )
+        logged = (
+            insert(CreditTransaction.__table__)
+            .from_select(
+                ["user_id", "op", "amount", "created_at"],
+                select(updated.c.user_id, literal(op.value), updated.c.amount, updated.c.last_updated)
+            )
+            .cte("logged")
+        )
+        result = await self.db.execute(
+            select(updated.c.user_id, updated.c.credits, updated.c.held, updated.c.last_updated).add_cte(logged)
+        )
+        return result.one_or_none()
+
+    async def _finish(self, user_id: int, commit: bool):
+        # Invalidate rather than write through: concurrent writers commit in lock order but
+        # could set the cache in any order, leaving an older balance behind.
+        invalidate_on_commit(self.db, user_id)
+        if commit:
+            await commit_and_invalidate(self.db)
+
+    async def add_credits(self, user_id: int, amount: int, commit: bool = True):
+        """
+        With `commit=False` the change is left in the session's transaction; the caller commits it
+        with commit_and_invalidate. The deduct and reset methods take the same flag.
+        """
+        credit = await self._apply_update(
+            user_id,
+            LedgerOperation.ADD,
+            {"credits": Credit.credits + amount},
+            literal(amount, Integer),
+        )
+        if credit is None:
+            await self.db.rollback()
+            raise UserNotFound(user_id)
+        await self._finish(user_id, commit)
         return credit
 
-    async def deduct_credits(self, user_id: int, amount: int):
-        credit = await self.get_credit_balance(user_id)
-        if credit.credits < amount:
-            raise InsufficientCredits(credit.credits, amount)
+    async def deduct_credits(self, user_id: int, amount: int, commit: bool = True):
+        credit = await self._apply_update(
+            user_id,
+            LedgerOperation.DEDUCT,
+            {"credits": Credit.credits - amount},
+            literal(-amount, Integer),
+            Credit.credits - Credit.held >= amount,
+        )
+        if credit is None:
+            # Only the failure path pays for a second query, to tell the two cases apart.
+            await self.db.rollback()
+            current = await self.get_credit_balance(user_id, use_cache=False)
+            raise InsufficientCredits(current.available, amount)
+        await self._finish(user_id, commit)
+        return credit
 
-        credit.credits -= amount
-        credit.last_updated = datetime.now()
-        await self.db.commit()
-        await self.db.refresh(credit)
+    async def reset_credits(self, user_id: int, commit: bool = True):
+        # RETURNING only sees the new value, so the previous balance is read under the same row lock.
+        # Credits reserved by active holds stay in place, so only the available balance drops to 0.
+        previous = (
+            select(Credit.id, Credit.credits, Credit.held)
+            .where(Credit.user_id == user_id)
+            .with_for_update()
+            .cte("previous")
+        )
+        credit = await self._apply_update(
+            user_id,
+            LedgerOperation.RESET,
+            {"credits": Credit.held},
+            previous.c.held - previous.c.credits,
+            Credit.id == previous.c.id,
+        )
+        if credit is None:
+            await self.db.rollback()
+            raise UserNotFound(user_id)
+        await self._finish(user_id, commit)
         return credit
 
-    async def reset_credits(self, user_id: int):
-        credit = await self.get_credit_balance(user_id)
-        credit.credits = 0
-        credit.last_updated = datetime.now()
+    async def apply_batch(
+            self, items: List[CreditBatchItem], atomic: bool = True
+    ) -> Tuple[bool, List[CreditBatchItemResult]]:
+        """
+        Apply a list of credit operations with set-based SQL.
+        The affected rows are locked with one query, every item is resolved in order in memory,
+        and the final balances are written back with a single UPDATE ... FROM unnest(...).
+        In atomic mode any failed item rolls back the whole batch. Returns whether any credits
+        were changed, with the result of every item.
+        """
+        user_ids = sorted({item.user_id for item in items})
+        result = await self.db.execute(
+            text("""
+            SELECT user_id, credits, held
+            FROM credits
+            WHERE user_id = ANY(:user_ids)
+            ORDER BY user_id
+            FOR UPDATE
+            """),
+            {"user_ids": user_ids}
+        )
+        rows = result.all()
+        balances = {row.user_id: row.credits or 0 for row in rows}
+        held = {row.user_id: row.held for row in rows}
+
+        results = []
+        touched = set()
+        ledger = []
+        for item in items:
+            balance = balances.get(item.user_id)
+            previous = balance
+            error = None
+            if balance is None:
+                error = UserNotFound(item.user_id).detail
+            elif item.op == CreditOperation.RESET:
+                balance = held[item.user_id]
+            elif item.amount <= 0:
+                error = InvalidAmount().detail
+            elif item.op == CreditOperation.ADD:
+                balance += item.amount
+            elif balance - held[item.user_id] < item.amount:
+                error = InsufficientCredits(balance - held[item.user_id], item.amount).detail
+            else:
+                balance -= item.amount
+
+            if error is None:
+                balances[item.user_id] = balance
+                touched.add(item.user_id)
+                ledger.append((item.user_id, item.op.value, balance - previous))
+            results.append(CreditBatchItemResult(
+                user_id=item.user_id,
+                op=item.op,
+                success=error is None,
+                credits=balance if error is None else None,
+                error=error
+            ))
+
+        if atomic and any(not r.success for r in results):
+            await self.db.rollback()
+            return False, results
+        if not touched:
+            await self.db.rollback()
+            return False, results
+
+        ids = sorted(touched)
+        now = datetime.now()
+        await self.db.execute(
+            text("""
+            UPDATE credits AS c
+            SET credits = v.credits, last_updated = :now
+            FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:balances AS INTEGER[])) AS v(user_id, credits)
+            WHERE c.user_id = v.user_id
+            """),
+            {"user_ids": ids, "balances": [balances[uid] for uid in ids], "now": now}
+        )
+        await self.db.execute(
+            text("""
+            INSERT INTO credit_transactions (user_id, op, amount, created_at)
+            SELECT user_id, op, amount, :now
+            FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:ops AS VARCHAR[]), CAST(:amounts AS INTEGER[]))
+                AS t(user_id, op, amount)
+            """),
+            {
+                "user_ids": [entry[0] for entry in ledger],
+                "ops": [entry[1] for entry in ledger],
+                "amounts": [entry[2] for entry in ledger],
+                "now": now
+            }
+        )
         await self.db.commit()
-        await self.db.refresh(credit)
-        return credit
\ No newline at end of file
+        await balance_cache.delete(*ids)
+        return True, results
+
+    async def get_history(self, user_id: int, limit: int = 50, before_id: Optional[int] = None):
+        """
+        Page through a user's ledger newest first, using keyset pagination on (user_id, id).
+        The page is outer joined to the credit row, so an unknown user is told apart from an
+        empty page in the same query. The page is a lateral subquery so its LIMIT is applied
+        on the index, before the join.
+        """
+        page = select(CreditTransaction).where(CreditTransaction.user_id == user_id)
+        if before_id is not None:
+            page = page.where(CreditTransaction.id < before_id)
+        page = page.order_by(CreditTransaction.id.desc()).limit(limit).lateral("page")
+        transaction = aliased(CreditTransaction, page)
+        result = await self.db.execute(
+            select(Credit.id, transaction)
+            .outerjoin(page, true())
+            .where(Credit.user_id == user_id)
+            .order_by(page.c.id.desc())
+        )
+        rows = result.all()
+        if not rows:
+            raise UserNotFound(user_id)
+        transactions = [transaction for _, transaction in rows if transaction is not None]
+        next_before_id = transactions[-1].id if len(transactions) == limit else None
+        return transactions, next_before_id
+
+    async def get_balance_at(self, user_id: int, at: datetime) -> int:
+        """
+        Balance as of `at`, from the nearest snapshot plus the ledger entries dated after it.
+        """
+        if at.tzinfo is not None:
+            # Ledger timestamps are naive local time from datetime.now().
+            at = at.astimezone().replace(tzinfo=None)
+        result = await self.db.execute(
+            text("""
+            WITH snapshot AS (
+                SELECT balance, taken_at
+                FROM credit_snapshots
+                WHERE user_id = :user_id AND taken_at <= :at
+                ORDER BY taken_at DESC
+                LIMIT 1
+            )
+            SELECT
+                EXISTS (SELECT 1 FROM credits WHERE user_id = :user_id) AS user_exists,
+                COALESCE((SELECT balance FROM snapshot), 0)
+                + COALESCE((
+                    SELECT SUM(amount)
+                    FROM credit_transactions
+                    WHERE user_id = :user_id
+                      AND created_at > COALESCE((SELECT taken_at FROM snapshot), CAST('-infinity' AS TIMESTAMP))
+                      AND created_at <= :at
+                ), 0) AS balance
+            """),
+            {"user_id": user_id, "at": at}
+        )
+        row = result.one()
+        if not row.user_exists:
+            raise UserNotFound(user_id)
+        return row.balance
@@ -0,0 +1,192 @@
+import asyncio
+import functools
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple, Set
+
+from sqlalchemy import select, text
+
+from app.config import get_settings
+from app.core.balance_cache import balance_cache
+from app.core.database import AsyncSessionLocal
+from app.core.request_metrics import current_request
+from app.models import Credit
+from app.schemas.credit import CreditResponse
+from app.utils import UserNotFound, InsufficientCredits
+
+settings = get_settings()
+
+# Applies the accepted deducts of one batch as a single conditional UPDATE, with one ledger
+# entry per request so history and balance-at stay exact.
+COALESCED_DEDUCT_SQL = """
+WITH updated AS (
+    UPDATE credits
+    SET credits = credits - :total, last_updated = :now
+    WHERE user_id = :user_id AND credits - held >= :total
+    RETURNING user_id
+)
+INSERT INTO credit_transactions (user_id, op, amount, created_at)
+SELECT updated.user_id, 'deduct', -t.amount, :now
+FROM updated, unnest(CAST(:amounts AS INTEGER[])) AS t(amount)
+"""
+
+
+class DeductCoalescer:
+    """
+    Merges concurrent deducts for the same user into one write.
+
+    Deducts are queued per user in this process. One drain task per user waits
+    `window_ms`, takes everything queued, locks the credit row once, resolves the requests in
+    arrival order against the available balance and writes the accepted total with one UPDATE.
+    Each caller's future is resolved only after that transaction commits, so an acknowledged
+    deduct is as durable as a direct one; requests still queued when the process dies were
+    never acknowledged. Ordering is FIFO per user within a process only; deducts from other
+    processes or the direct path interleave between batches under the row lock.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Dict[int, List[Tuple[int, asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def deduct(self, user_id: int, amount: int) -> CreditResponse:
+        future = asyncio.get_running_loop().create_future()
+        queue = self._pending.get(user_id)
+        if queue is None:
+            queue = self._pending[user_id] = []
+            task = asyncio.create_task(self._drain(user_id))
+            self._tasks.add(task)
+            task.add_done_callback(functools.partial(self._drain_done, user_id))
+        queue.append((amount, future))
+        self.requests += 1
+        return await future
+
+    async def _drain(self, user_id: int):
+        # The queue entry stays in _pending while this task runs, so there is one drain task
+        # per user and its batches are applied in order.
+        # The task inherits the context of the request that started it; its queries serve
+        # every queued request, so they are not charged to that one.
+        current_request.set(None)
+        queued: List[Tuple[int, asyncio.Future]] = []
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                queued = self._pending[user_id]
+                if not queued:
+                    del self._pending[user_id]
+                    return
+                self._pending[user_id] = []
+                for start in range(0, len(queued), self.max_batch):
+                    await self._apply(user_id, queued[start:start + self.max_batch])
+                queued = []
+        except BaseException as e:
+            # Deducts taken off the queue but not yet resolved; _drain_done handles the rest.
+            self._fail(queued, self._drain_error(user_id, e))
+            raise
+
+    def _drain_done(self, user_id: int, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            return
+        # Nothing else will resolve the deducts still queued, including when the task was
+        # cancelled before it ever ran, so their callers get the error instead of hanging.
+        error = self._drain_error(user_id, asyncio.CancelledError() if task.cancelled() else task.exception())
+        logging.error(f"Coalesced deduct drain for user {user_id} stopped: {error}")
+        self._fail(self._pending.pop(user_id, []), error)
+
+    @staticmethod
+    def _drain_error(user_id: int, error: BaseException) -> Exception:
+        # A cancelled drain must not cancel the requests waiting on it.
+        if isinstance(error, Exception):
+            return error
+        return RuntimeError(f"Coalesced deduct for user {user_id} was interrupted")
+
+    async def _apply(self, user_id: int, batch: List[Tuple[int, asyncio.Future]]):
+        # Callers that gave up while queued are dropped before anything is written.
+        batch = [(amount, future) for amount, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        outcomes = []
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    select(Credit.credits, Credit.held).where(Credit.user_id == user_id).with_for_update()
+                )
+                row = result.one_or_none()
+                if row is None:
+                    await db.rollback()
+                    self._fail(batch, UserNotFound(user_id))
+                    return
+
+                balance = row.credits
+                accepted = []
+                for amount, _ in batch:
+                    available = balance - row.held
+                    if available >= amount:
+                        balance -= amount
+                        accepted.append(amount)
+                        outcomes.append(balance)
+                    else:
+                        outcomes.append(InsufficientCredits(available, amount))
+
+                now = datetime.now()
+                if accepted:
+                    await db.execute(
+                        text(COALESCED_DEDUCT_SQL),
+                        {"user_id": user_id, "total": sum(accepted), "amounts": accepted, "now": now}
+                    )
+                    await db.commit()
+                else:
+                    await db.rollback()
+            except Exception as e:
+                await db.rollback()
+                logging.error(f"Coalesced deduct for user {user_id} failed: {e}")
+                self._fail(batch, e)
+                return
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(CreditResponse(user_id=user_id, credits=outcome, held=row.held, last_updated=now))
+        if accepted:
+            await balance_cache.delete(user_id)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[int, asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def drain(self):
+        """
+        Wait for every queued deduct to be applied; called on shutdown.
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.deduct_coalescing_enabled,
+            "window_ms": self.window * 1000,
+            "pending_users": len(self._pending),
+            "requests": self.requests,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+deduct_coalescer = DeductCoalescer(
+    window_ms=settings.deduct_coalesce_window_ms,
+    max_batch=settings.deduct_coalesce_max_batch,
+)
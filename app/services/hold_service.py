@@ -0,0 +1,206 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.balance_cache import balance_cache, invalidate_on_commit, commit_and_invalidate
+from app.core.database import AsyncSessionLocal
+from app.models import CreditHold
+from app.schemas.credit import HoldStatus
+from app.services.credit_service import CreditService
+from app.utils import InsufficientCredits, HoldNotFound, HoldNotActive, CaptureExceedsHold
+
+settings = get_settings()
+
+HOLD_COLUMNS = "id, user_id, amount, captured, status, expires_at, created_at, settled_at"
+
+# Moves `amount` from available to held and records the hold, only if the user can afford it.
+RESERVE_SQL = f"""
+WITH reserved AS (
+    UPDATE credits
+    SET held = held + :amount
+    WHERE user_id = :user_id AND credits - held >= :amount
+    RETURNING user_id
+)
+INSERT INTO credit_holds (user_id, amount, captured, status, expires_at, created_at)
+SELECT user_id, :amount, 0, 'active', :expires_at, :now
+FROM reserved
+RETURNING {HOLD_COLUMNS}
+"""
+
+# Settles an active, unexpired hold: `:captured` credits are spent and the rest of the hold
+# is returned to the available balance. A release is a settle with nothing captured.
+SETTLE_SQL = f"""
+WITH settled AS (
+    UPDATE credit_holds
+    SET status = :status, captured = COALESCE(CAST(:captured AS INTEGER), amount), settled_at = :now
+    WHERE id = :hold_id AND status = 'active' AND expires_at > :now
+      AND amount >= COALESCE(CAST(:captured AS INTEGER), amount)
+    RETURNING {HOLD_COLUMNS}
+),
+updated AS (
+    UPDATE credits c
+    SET credits = c.credits - settled.captured,
+        held = c.held - settled.amount,
+        last_updated = CASE WHEN settled.captured > 0 THEN :local_now ELSE c.last_updated END
+    FROM settled
+    WHERE c.user_id = settled.user_id
+    RETURNING c.user_id
+),
+logged AS (
+    INSERT INTO credit_transactions (user_id, op, amount, created_at)
+    SELECT user_id, 'capture', -captured, :local_now
+    FROM settled
+    WHERE captured > 0
+)
+SELECT {HOLD_COLUMNS} FROM settled
+"""
+
+# One batch of the expiry sweep. Holds being settled concurrently are skipped and picked
+# up by a later run if they are still active. Credit rows are locked in user_id order,
+# the same order apply_batch uses.
+EXPIRE_BATCH_SQL = """
+WITH expired AS (
+    SELECT id
+    FROM credit_holds
+    WHERE status = 'active' AND expires_at <= :now
+    ORDER BY expires_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+),
+holds AS (
+    UPDATE credit_holds h
+    SET status = 'expired', settled_at = :now
+    FROM expired
+    WHERE h.id = expired.id
+    RETURNING h.user_id, h.amount
+),
+per_user AS (
+    SELECT user_id, SUM(amount) AS amount
+    FROM holds
+    GROUP BY user_id
+),
+locked AS (
+    SELECT user_id
+    FROM credits
+    WHERE user_id IN (SELECT user_id FROM per_user)
+    ORDER BY user_id
+    FOR UPDATE
+),
+released AS (
+    UPDATE credits c
+    SET held = c.held - per_user.amount
+    FROM per_user, locked
+    WHERE c.user_id = per_user.user_id AND locked.user_id = per_user.user_id
+    RETURNING c.user_id
+)
+SELECT (SELECT COUNT(*) FROM holds) AS expired_holds, ARRAY(SELECT user_id FROM released) AS user_ids
+"""
+
+
+class HoldService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def reserve(self, user_id: int, amount: int, ttl_seconds: Optional[int] = None, commit: bool = True):
+        """
+        With `commit=False` the hold is left in the session's transaction for the caller to commit
+        with commit_and_invalidate, as CreditService does.
+        """
+        ttl_seconds = ttl_seconds or settings.hold_default_ttl_seconds
+        if ttl_seconds > settings.hold_max_ttl_seconds:
+            raise HTTPException(
+                status_code=400,
+                detail=f"ttl_seconds must be at most {settings.hold_max_ttl_seconds}"
+            )
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            text(RESERVE_SQL),
+            {"user_id": user_id, "amount": amount, "now": now, "expires_at": now + timedelta(seconds=ttl_seconds)}
+        )
+        hold = result.one_or_none()
+        if hold is None:
+            await self.db.rollback()
+            # Raises UserNotFound when the user has no credit row.
+            current = await CreditService(self.db).get_credit_balance(user_id, use_cache=False)
+            raise InsufficientCredits(current.available, amount)
+        invalidate_on_commit(self.db, user_id)
+        if commit:
+            await commit_and_invalidate(self.db)
+        return hold
+
+    async def capture(self, hold_id: int, amount: Optional[int] = None):
+        return await self._settle(hold_id, HoldStatus.CAPTURED, amount)
+
+    async def release(self, hold_id: int):
+        return await self._settle(hold_id, HoldStatus.RELEASED, 0)
+
+    async def get_hold(self, hold_id: int) -> CreditHold:
+        hold = await self.db.get(CreditHold, hold_id)
+        if hold is None:
+            raise HoldNotFound(hold_id)
+        return hold
+
+    async def _settle(self, hold_id: int, status: HoldStatus, captured: Optional[int]):
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            text(SETTLE_SQL),
+            {
+                "hold_id": hold_id,
+                "status": status.value,
+                "captured": captured,
+                "now": now,
+                "local_now": datetime.now(),
+            }
+        )
+        hold = result.one_or_none()
+        if hold is None:
+            # Only the failure path reads the hold again, to report why it did not settle.
+            await self.db.rollback()
+            current = await self.get_hold(hold_id)
+            if current.status != HoldStatus.ACTIVE.value:
+                raise HoldNotActive(hold_id, current.status)
+            if current.expires_at <= now:
+                raise HoldNotActive(hold_id, HoldStatus.EXPIRED.value)
+            raise CaptureExceedsHold(current.amount, captured)
+        await self.db.commit()
+        await balance_cache.delete(hold.user_id)
+        return hold
+
+    @staticmethod
+    async def expire_holds(batch_size: Optional[int] = None):
+        """
+        Expire active holds past their expiry in batches, each in its own short transaction,
+        returning their credits to the available balance.
+        """
+        batch_size = batch_size or settings.hold_sweep_batch_size
+        async with AsyncSessionLocal() as db:
+            try:
+                total = 0
+                while True:
+                    result = await db.execute(
+                        text(EXPIRE_BATCH_SQL),
+                        {"now": datetime.utcnow(), "batch_size": batch_size}
+                    )
+                    row = result.one()
+                    await db.commit()
+                    if row.user_ids:
+                        await balance_cache.delete(*row.user_ids)
+                    total += row.expired_holds
+                    if row.expired_holds < batch_size:
+                        break
+                if total:
+                    logging.info(f"Expired {total} credit holds")
+
+            except Exception as e:
+                await db.rollback()
+                logging.error(f"Failed to expire credit holds: {e}")
+
+    @staticmethod
+    def start_sweeper():
+        from app.core.scheduler import add_interval_job
+        add_interval_job(HoldService.expire_holds, "expire_credit_holds", minutes=settings.hold_sweep_interval_minutes)
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Dict, Any
+import logging
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.balance_cache import commit_and_invalidate
+from app.core.database import AsyncSessionLocal
+from app.models import IdempotencyKey
+from app.utils import IdempotencyKeyConflict
+from app.utils.lru_cache import TTLLRUCache
+
+settings = get_settings()
+
+# Completed responses keyed by idempotency key; sits in front of the idempotency_keys table.
+response_cache = TTLLRUCache(maxsize=settings.idempotency_cache_size, ttl=settings.idempotency_ttl_seconds)
+
+
+class IdempotencyService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def execute(
+            self,
+            key: Optional[str],
+            scope: str,
+            operation: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Run a mutation at most once per idempotency key. The operation returns the JSON-ready
+        response body, which is what gets stored and replayed.
+        The operation must not commit (see CreditService's `commit=False`). The reserved key,
+        the mutation and the stored response commit together in one transaction here, so a
+        failed mutation releases the key and a key is never left reserved without a response.
+        Replays are served from the in-memory LRU, falling back to the stored row, without
+        touching credits.
+        """
+        if key is None:
+            payload = await operation()
+            await commit_and_invalidate(self.db)
+            return payload
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            return self._replay(key, scope, cached)
+
+        if not await self._reserve(key, scope):
+            stored = await self._load(key)
+            await self.db.rollback()
+            if stored is None or stored.response is None:
+                raise IdempotencyKeyConflict(key, "is already being processed")
+            response_cache.set(key, (stored.scope, stored.response))
+            return self._replay(key, scope, (stored.scope, stored.response))
+
+        payload = await operation()
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(response=payload)
+        )
+        await commit_and_invalidate(self.db)
+        response_cache.set(key, (scope, payload))
+        return payload
+
+    async def _reserve(self, key: str, scope: str) -> bool:
+        now = datetime.utcnow()
+        stmt = insert(IdempotencyKey).values(
+            key=key,
+            scope=scope,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds)
+        )
+        # Expired keys that the sweeper has not removed yet are taken over in place.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                "scope": stmt.excluded.scope,
+                "response": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= now
+        ).returning(IdempotencyKey.key)
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def _load(self, key: str):
+        result = await self.db.execute(
+            select(IdempotencyKey.scope, IdempotencyKey.response).where(IdempotencyKey.key == key)
+        )
+        return result.one_or_none()
+
+    @staticmethod
+    def _replay(key: str, scope: str, entry) -> Dict[str, Any]:
+        stored_scope, payload = entry
+        if stored_scope != scope:
+            raise IdempotencyKeyConflict(key, "was already used for a different request")
+        return payload
+
+    @staticmethod
+    async def purge_expired(batch_size: int = 5000):
+        async with AsyncSessionLocal() as db:
+            try:
+                total = 0
+                while True:
+                    expired = (
+                        select(IdempotencyKey.key)
+                        .where(IdempotencyKey.expires_at <= datetime.utcnow())
+                        .limit(batch_size)
+                        .scalar_subquery()
+                    )
+                    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired)))
+                    await db.commit()
+                    total += result.rowcount
+                    if result.rowcount < batch_size:
+                        break
+                logging.info(f"Purged {total} expired idempotency keys")
+
+            except Exception as e:
+                await db.rollback()
+                logging.error(f"Failed to purge idempotency keys: {e}")
@@ -0,0 +1,177 @@
+import asyncio
+import contextvars
+import logging
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Dict, Any, List
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models import SchemaJob
+from app.schemas.schemas import SchemaJobRequest, SchemaPlanRequest, SchemaUpdateRequest, OperationType
+from app.services.schema_service import SchemaService
+from app.utils.schema_exception import SchemaJobNotFound
+
+settings = get_settings()
+
+# Bounded worker pool and per-table limits for this process. Postgres locks still
+# serialize DDL on the same table across processes.
+_workers = asyncio.Semaphore(settings.schema_job_workers)
+_table_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def _table_limit(table_name: str) -> asyncio.Semaphore:
+    if table_name not in _table_limits:
+        _table_limits[table_name] = asyncio.Semaphore(settings.schema_job_per_table)
+    return _table_limits[table_name]
+
+
+class SchemaJobService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def submit(self, request: SchemaJobRequest) -> SchemaJob:
+        if request.plan is not None:
+            kind = "plan"
+            payload = request.plan.model_dump(mode="json")
+            tables = list(dict.fromkeys(op.table_name for op in request.plan.operations))
+        else:
+            if request.operation.operation == OperationType.GET_SCHEMA:
+                raise HTTPException(status_code=400, detail="get_schema cannot run as a job")
+            kind = request.operation.operation.value
+            payload = request.operation.model_dump(mode="json")
+            tables = [request.operation.table_name]
+
+        job = SchemaJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            tables=tables,
+            payload=payload,
+            status="queued",
+            progress={"stage": "queued"},
+            attempts=0,
+        )
+        self.db.add(job)
+        await self.db.commit()
+        SchemaJobService.enqueue(job.id)
+        return job
+
+    async def get_job(self, job_id: str) -> SchemaJob:
+        job = await self.db.get(SchemaJob, job_id)
+        if job is None:
+            raise SchemaJobNotFound(job_id)
+        return job
+
+    @staticmethod
+    def enqueue(job_id: str):
+        from app.core.scheduler import scheduler
+        # Added from an empty context so the job's queries are not attributed to the submitting request.
+        # Without misfire_grace_time=None the scheduler silently skips a job it picks up more than a
+        # second late, e.g. while the event loop is busy, and the job stays queued forever.
+        contextvars.Context().run(
+            scheduler.add_job, SchemaJobService.run_job, args=[job_id], id=f"schema_job_{job_id}",
+            replace_existing=True, misfire_grace_time=None
+        )
+
+    @staticmethod
+    async def run_job(job_id: str):
+        async with _workers:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(SchemaJob)
+                    .where(SchemaJob.id == job_id, SchemaJob.status == "queued")
+                    .values(status="running", started_at=datetime.utcnow(), progress={"stage": "waiting"},
+                            attempts=SchemaJob.attempts + 1)
+                    .returning(SchemaJob.kind, SchemaJob.tables, SchemaJob.payload)
+                )
+                claimed = result.one_or_none()
+                await db.commit()
+            if claimed is None:
+                # Already claimed by another process or no longer queued.
+                return
+
+            async with AsyncExitStack() as stack:
+                for table_name in sorted(claimed.tables):
+                    await stack.enter_async_context(_table_limit(table_name))
+                await SchemaJobService._execute_claimed(job_id, claimed.kind, claimed.payload)
+
+    @staticmethod
+    async def _execute_claimed(job_id: str, kind: str, payload: Dict[str, Any]):
+        async def report(stats: Dict[str, Any]):
+            async with AsyncSessionLocal() as progress_db:
+                await progress_db.execute(
+                    update(SchemaJob)
+                    .where(SchemaJob.id == job_id)
+                    .values(progress={"stage": "running", **stats})
+                )
+                await progress_db.commit()
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await report({})
+                service = SchemaService(db, on_progress=report)
+                result = await SchemaJobService._run_operation(service, kind, payload)
+                status, error = "succeeded", None
+            except HTTPException as e:
+                await db.rollback()
+                result, status, error = None, "failed", str(e.detail)
+            except Exception as e:
+                await db.rollback()
+                result, status, error = None, "failed", str(e)
+                logging.error(f"Schema job {job_id} failed: {e}")
+
+            await db.execute(
+                update(SchemaJob)
+                .where(SchemaJob.id == job_id)
+                .values(status=status, result=result, error=error, progress={"stage": status},
+                        finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    @staticmethod
+    async def _run_operation(service: SchemaService, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if kind == "plan":
+            plan = SchemaPlanRequest(**payload)
+            return await service.apply_plan(plan.operations, plan.dry_run)
+
+        request = SchemaUpdateRequest(**payload)
+        if request.operation == OperationType.ADD_COLUMN:
+            if not request.column_definition:
+                raise HTTPException(status_code=400, detail="column_definition required for add_column")
+            return await service.add_column(request.table_name, request.column_definition, request.online)
+        if request.operation == OperationType.DROP_COLUMN:
+            if not request.column_name:
+                raise HTTPException(status_code=400, detail="column_name required for drop_column")
+            return await service.drop_column(request.table_name, request.column_name, request.online)
+        if request.operation == OperationType.CREATE_TABLE:
+            if not request.columns:
+                raise HTTPException(status_code=400, detail="columns required for create_table")
+            return await service.create_table(request.table_name, request.columns)
+        raise HTTPException(status_code=400, detail=f"{request.operation.value} cannot run as a job")
+
+    @staticmethod
+    async def recover_jobs():
+        """
+        Re-enqueue jobs that were still queued when the process stopped. Jobs that were
+        running are marked failed, since a partly applied DDL sequence is not safe to replay.
+        Like the other scheduled jobs, this assumes a single scheduler process.
+        """
+        async with AsyncSessionLocal() as db:
+            interrupted = await db.execute(
+                update(SchemaJob)
+                .where(SchemaJob.status == "running")
+                .values(status="failed", error="Interrupted by a restart", progress={"stage": "failed"},
+                        finished_at=datetime.utcnow())
+            )
+            result = await db.execute(select(SchemaJob.id).where(SchemaJob.status == "queued"))
+            queued: List[str] = list(result.scalars().all())
+            await db.commit()
+
+        for job_id in queued:
+            SchemaJobService.enqueue(job_id)
+        logging.info(f"Recovered {len(queued)} queued schema jobs, {interrupted.rowcount} interrupted")
@@ -1,59 +1,118 @@
+from fastapi import HTTPException
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Callable, Awaitable
 
-from app.schemas.schemas import ColumnDefinition
+from app.schemas.schemas import ColumnDefinition, OperationType, SchemaUpdateRequest
 from app.utils import TableAlreadyExists
-from app.utils.schema_exception import TableNotFound, ColumnAlreadyExists, ColumnNotFound, CriticalColumnError
+from app.utils.schema_exception import TableNotFound, ColumnAlreadyExists, ColumnNotFound, CriticalColumnError, \
+    PlanOperationError
+from app.config import get_settings
+from app.utils.online_ddl import OnlineDDLExecutor
+from app.utils.schema_catalog import SchemaCatalog
 from app.utils.schema_validator import SchemaValidator
 from app.utils.sql_generator import SQLGenerator
 
 
 class SchemaService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
         self.db = db
+        self.on_progress = on_progress
         self.validator = SchemaValidator(db)
+        self.catalog = SchemaCatalog(db)
         self.generator = SQLGenerator()
 
-    async def add_column(self, table_name: str, column_def: ColumnDefinition):
+    async def add_column(self, table_name: str, column_def: ColumnDefinition, online: bool = False):
 
-        if not await self.validator.table_exists(table_name):
+        table = await self.catalog.get_table(table_name)
+        if table is None:
             raise TableNotFound(table_name)
 
 
-        if await self.validator.column_exists(table_name, column_def.name):
+        if column_def.name in table["column_names"]:
             raise ColumnAlreadyExists(column_def.name)
 
 
+        if online:
+            try:
+                execution = await self._add_column_online(table_name, column_def, table["primary_key"])
+            finally:
+                self.catalog.invalidate(table_name)
+            sql = "; ".join(execution["statements"])
+            return {"sql_executed": sql, "table_name": table_name, "execution": execution}
+
         sql = self.generator.add_column(table_name, column_def)
         await self.db.execute(text(sql))
         await self.db.commit()
+        self.catalog.invalidate(table_name)
 
         return {"sql_executed": sql, "table_name": table_name}
 
-    async def drop_column(self, table_name: str, column_name: str):
+    async def _add_column_online(self, table_name: str, column_def: ColumnDefinition,
+                                 primary_key: Set[str]) -> Dict[str, Any]:
+        """
+        Add a column without holding ACCESS EXCLUSIVE for longer than a catalog update:
+        add it nullable, set the default for new rows, backfill existing rows in batches,
+        then enforce NOT NULL through a NOT VALID check that is validated separately.
+        """
+        executor = OnlineDDLExecutor(self.db, self.on_progress)
+        if column_def.default is None:
+            # Nothing to backfill; the plain statement is already a catalog-only change.
+            await executor.execute(self.generator.add_column(table_name, column_def))
+            return executor.stats
+
+        name = column_def.name
+        nullable_def = column_def.model_copy(update={"nullable": True, "default": None})
+        await executor.execute(self.generator.add_column(table_name, nullable_def))
+        await executor.execute(f"ALTER TABLE {table_name} ALTER COLUMN {name} SET DEFAULT {column_def.default}")
+        key = next(iter(primary_key)) if len(primary_key) == 1 else None
+        await executor.backfill(table_name, name, column_def.default, get_settings().ddl_backfill_batch_size, key)
+
+        if not column_def.nullable:
+            constraint = f"{table_name}_{name}_not_null"[:63]
+            await executor.execute(
+                f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint} CHECK ({name} IS NOT NULL) NOT VALID"
+            )
+            await executor.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint}")
+            # With a validated check in place, SET NOT NULL skips the full-table scan.
+            await executor.execute(f"ALTER TABLE {table_name} ALTER COLUMN {name} SET NOT NULL")
+            await executor.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT {constraint}")
+        return executor.stats
+
+    async def drop_column(self, table_name: str, column_name: str, online: bool = False):
         # 1. Validate table exists
-        if not await self.validator.table_exists(table_name):
+        table = await self.catalog.get_table(table_name)
+        if table is None:
             raise TableNotFound(table_name)
 
         # 2. Validate column exists
-        if not await self.validator.column_exists(table_name, column_name):
+        if column_name not in table["column_names"]:
             raise ColumnNotFound(column_name)
 
         # 3. Check if column is critical (primary key, foreign key)
-        if await self.validator.is_critical_column(table_name, column_name):
+        if column_name in table["primary_key"] or column_name in table["foreign_keys"]:
             raise CriticalColumnError(column_name)
 
         # 4. Generate and execute SQL
         sql = self.generator.drop_column(table_name, column_name)
+        if online:
+            executor = OnlineDDLExecutor(self.db, self.on_progress)
+            try:
+                await executor.execute(sql)
+            finally:
+                self.catalog.invalidate(table_name)
+            return {"sql_executed": sql, "table_name": table_name, "column_name": column_name,
+                    "execution": executor.stats}
+
         await self.db.execute(text(sql))
         await self.db.commit()
+        self.catalog.invalidate(table_name)
 
         return {"sql_executed": sql, "table_name": table_name, "column_name": column_name}
 
     async def create_table(self, table_name: str, columns: List[ColumnDefinition]):
         # 1. Validate table doesn't exist
-        if await self.validator.table_exists(table_name):
+        if await self.catalog.get_table(table_name) is not None:
             raise TableAlreadyExists(table_name)
 
         # 2. Validate column definitions
@@ -63,43 +122,105 @@ class SchemaService:
         sql = self.generator.create_table(table_name, columns)
         await self.db.execute(text(sql))
         await self.db.commit()
+        self.catalog.invalidate(table_name)
 
         return {"sql_executed": sql, "table_name": table_name, "columns_count": len(columns)}
 
 
     async def get_table_info(self, table_name: str) -> Dict[str, Any]:
 
-        if not await self.validator.table_exists(table_name):
+        table = await self.catalog.get_table(table_name)
+        if table is None:
             raise TableNotFound(table_name)
 
-
-        columns = await self.validator.get_table_columns(table_name)
-
-
-        indexes = await self.validator.get_table_indexes(table_name)
-
-
-        constraints = await self.validator.get_table_constraints(table_name)
-
         return {
             "table_name": table_name,
-            "columns": columns,
-            "indexes": indexes,
-            "constraints": constraints
+            "columns": table["columns"],
+            "indexes": table["indexes"],
+            "constraints": table["constraints"]
         }
 
     async def get_all_tables(self) -> Dict[str, Any]:
 
         tables = await self.validator.get_all_tables()
-
-        table_list = []
-        for table in tables:
-            table_info = {
-                "table_name": table["table_name"],
-                "column_count": await self.validator.get_column_count(table["table_name"]),
-                "has_primary_key": await self.validator.has_primary_key(table["table_name"])
+        return {"tables": tables}
+
+    async def apply_plan(self, operations: List[SchemaUpdateRequest], dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Validate an ordered list of add_column, drop_column and create_table operations against
+        one catalog snapshot, merge column changes per table into single ALTER TABLE statements
+        and run them all in one transaction. A dry run stops after generating the SQL.
+        """
+        tables: Dict[str, Optional[Dict[str, Set[str]]]] = {}
+        for table_name in dict.fromkeys(op.table_name for op in operations):
+            entry = await self.catalog.get_table(table_name)
+            tables[table_name] = None if entry is None else {
+                "columns": set(entry["column_names"]),
+                "critical": entry["primary_key"] | entry["foreign_keys"],
             }
-            table_list.append(table_info)
-
-        return {"tables": table_list}
 
+        data_types: Set[str] = set()
+        for index, op in enumerate(operations):
+            try:
+                self._check_plan_operation(op, tables, data_types)
+            except HTTPException as e:
+                raise PlanOperationError(index, e)
+        if data_types:
+            await self.validator.validate_data_types(data_types)
+
+        statements = [sql for _, sql in self.generator.plan(operations)]
+        if not dry_run:
+            try:
+                for sql in statements:
+                    await self.db.execute(text(sql))
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            finally:
+                for table_name in tables:
+                    self.catalog.invalidate(table_name)
+
+        return {"statements": statements, "operations_count": len(operations), "dry_run": dry_run}
+
+    @staticmethod
+    def _check_plan_operation(op: SchemaUpdateRequest, tables: Dict[str, Any], data_types: Set[str]):
+        """
+        Check one plan operation against the simulated catalog and apply it there.
+        """
+        table = tables.get(op.table_name)
+
+        if op.operation == OperationType.CREATE_TABLE:
+            if not op.columns:
+                raise HTTPException(status_code=400, detail="columns required for create_table")
+            if table is not None:
+                raise TableAlreadyExists(op.table_name)
+            column_names = [col.name for col in op.columns]
+            if len(column_names) != len(set(column_names)):
+                raise HTTPException(status_code=400, detail="Duplicate column names found")
+            tables[op.table_name] = {"columns": set(column_names), "critical": set()}
+            data_types.update(col.type.value for col in op.columns)
+
+        elif op.operation == OperationType.ADD_COLUMN:
+            if not op.column_definition:
+                raise HTTPException(status_code=400, detail="column_definition required for add_column")
+            if table is None:
+                raise TableNotFound(op.table_name)
+            if op.column_definition.name in table["columns"]:
+                raise ColumnAlreadyExists(op.column_definition.name)
+            table["columns"].add(op.column_definition.name)
+            data_types.add(op.column_definition.type.value)
+
+        elif op.operation == OperationType.DROP_COLUMN:
+            if not op.column_name:
+                raise HTTPException(status_code=400, detail="column_name required for drop_column")
+            if table is None:
+                raise TableNotFound(op.table_name)
+            if op.column_name not in table["columns"]:
+                raise ColumnNotFound(op.column_name)
+            if op.column_name in table["critical"]:
+                raise CriticalColumnError(op.column_name)
+            table["columns"].discard(op.column_name)
+
+        else:
+            raise HTTPException(status_code=400, detail=f"{op.operation.value} is not supported in a plan")
@@ -1,46 +1,118 @@
+import time
+from datetime import datetime
+from typing import AsyncIterator, Tuple, Union, Dict, Any, List, Optional
+
 from fastapi import FastAPI
-from pydantic import EmailStr
+from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text, literal, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import joinedload
+from sqlalchemy.dialects.postgresql import insert
+from app.config import get_settings
 from app.models import User, Credit
-from app.schemas import UserCreate
+from app.schemas import UserCreate, UserBulkError, UserBulkResult, UserWithBalance
 from app.utils import UserNotFound, EmailIdAlreadyExist
 
+settings = get_settings()
+
+# Inserts a batch of users and their credit rows in one statement. Emails that already
+# exist are skipped by the unique index and reported back by their absence.
+BULK_INSERT_SQL = """
+WITH input AS (
+    SELECT * FROM unnest(CAST(:emails AS TEXT[]), CAST(:names AS TEXT[])) AS t(email, name)
+),
+inserted AS (
+    INSERT INTO users (email, name, created_at)
+    SELECT email, name, :now FROM input
+    ON CONFLICT (email) DO NOTHING
+    RETURNING user_id, email
+),
+credited AS (
+    INSERT INTO credits (user_id, credits, last_updated)
+    SELECT user_id, 0, :now FROM inserted
+)
+SELECT email FROM inserted
+"""
+
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def check_user_exist(self, email: EmailStr):
-        try:
-            result=await self.db.execute(select(User).where(User.email==email))
-            user = result.scalar_one_or_none()
-            if user:
-                raise EmailIdAlreadyExist(email)
-        except SQLAlchemyError as e:
-            raise RuntimeError(f"Failed to find user from DB:  {str(e)}")
-
     async def get_user(self, user_id: int):
         try:
-            result = await self.db.execute(select(User).where(User.user_id == user_id))
-            user = result.scalar_one_or_none()
+            result = await self.db.execute(
+                select(User.user_id, User.email, User.name, User.created_at).where(User.user_id == user_id)
+            )
+            user = result.one_or_none()
             if not user:
                 raise UserNotFound(user_id)
             return user
         except SQLAlchemyError as e:
             raise RuntimeError(f"Failed to create user: {str(e)}")
 
+    async def get_users_with_balance(self, user_ids: List[int]) -> List[UserWithBalance]:
+        """
+        Load users together with their credit balance in one joined query.
+        """
+        result = await self.db.execute(
+            select(User)
+            .options(joinedload(User.credit))
+            .where(User.user_id == any_(bindparam("user_ids", user_ids, type_=ARRAY(Integer))))
+            .order_by(User.user_id)
+        )
+        return [
+            UserWithBalance(
+                user_id=user.user_id,
+                email=user.email,
+                name=user.name,
+                created_at=user.created_at,
+                credits=user.credit.credits if user.credit else None,
+                held=user.credit.held if user.credit else None,
+                last_updated=user.credit.last_updated if user.credit else None,
+            )
+            for user in result.unique().scalars().all()
+        ]
+
+    async def get_user_with_balance(self, user_id: int) -> UserWithBalance:
+        users = await self.get_users_with_balance([user_id])
+        if not users:
+            raise UserNotFound(user_id)
+        return users[0]
+
     async def create_user(self, user_data: UserCreate):
+        """
+        Create the user and its credit row in one statement. The unique index on users.email
+        decides conflicts, so concurrent signups with the same email cannot both succeed.
+        """
         try:
-            await  self.check_user_exist(user_data.email)
-            user = User(**user_data.model_dump())
-            self.db.add(user)
-            await self.db.commit()
-            await self.db.refresh(user)
-
-            credit = Credit(user_id=user.user_id, credits=0)
-            self.db.add(credit)
+            now = datetime.utcnow()
+            users = User.__table__
+            inserted = (
+                insert(users)
+                .values(**user_data.model_dump(), created_at=now)
+                .on_conflict_do_nothing(index_elements=[users.c.email])
+                .returning(users.c.user_id, users.c.email, users.c.name, users.c.created_at)
+                .cte("inserted")
+            )
+            credited = (
+                insert(Credit.__table__)
+                .from_select(
+                    ["user_id", "credits", "last_updated"],
+                    select(inserted.c.user_id, literal(0), literal(now)),
+                    # Python-side defaults such as held's are not evaluated inside a CTE and would
+                    # be sent as NULL; leave the remaining columns to their server defaults.
+                    include_defaults=False
+                )
+                .cte("credited")
+            )
+            result = await self.db.execute(select(inserted).add_cte(credited))
+            user = result.one_or_none()
+            if user is None:
+                await self.db.rollback()
+                raise EmailIdAlreadyExist(user_data.email)
             await self.db.commit()
 
             return user
@@ -49,8 +121,123 @@ class UserService:
             await self.db.rollback()
             raise RuntimeError(f"Failed to create user: {str(e)}")
 
-    async def get_all_users(self):
-        result = await self.db.execute(select(User))
-        return result.scalars().all()
+    @staticmethod
+    def _users_query(
+            after_id: Optional[int] = None,
+            email: Optional[str] = None,
+            name_prefix: Optional[str] = None,
+            created_after: Optional[datetime] = None,
+            created_before: Optional[datetime] = None
+    ):
+        query = select(User.user_id, User.email, User.name, User.created_at)
+        if after_id is not None:
+            query = query.where(User.user_id > after_id)
+        if email is not None:
+            query = query.where(User.email == email)
+        if name_prefix is not None:
+            query = query.where(User.name.startswith(name_prefix, autoescape=True))
+        if created_after is not None:
+            query = query.where(User.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(User.created_at < created_before)
+        return query.order_by(User.user_id)
+
+    async def list_users(self, limit: int = 100, **filters):
+        """
+        One page of users ordered by user_id, using keyset pagination on `after_id`.
+        Returns the rows and the cursor for the next page, or None on the last page.
+        """
+        result = await self.db.execute(self._users_query(**filters).limit(limit))
+        users = result.all()
+        next_after_id = users[-1].user_id if len(users) == limit else None
+        return users, next_after_id
+
+    async def stream_users(self, batch_size: int = 1000, **filters) -> AsyncIterator[List[Any]]:
+        """
+        Yield matching users in batches from a server-side cursor, so memory use does not
+        grow with the number of rows.
+        """
+        result = await self.db.stream(
+            self._users_query(**filters).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions(batch_size):
+            yield partition
+
+    async def bulk_create(
+            self, records: AsyncIterator[Tuple[int, Union[Dict[str, Any], str]]]
+    ) -> UserBulkResult:
+        """
+        Create users and their credit rows from a stream of (line, record) pairs.
+        Rows are validated as they arrive and inserted in batches of USER_BULK_BATCH_SIZE,
+        one statement and one commit per batch. Emails repeated in the input or already
+        present in the database are reported as per-row errors.
+        """
+        started = time.perf_counter()
+        created = 0
+        failed = 0
+        errors: List[UserBulkError] = []
+        seen = set()
+        batch: List[Tuple[int, UserCreate]] = []
+
+        def fail(line: int, email, error: str):
+            nonlocal failed
+            failed += 1
+            if len(errors) < settings.user_bulk_max_errors:
+                errors.append(UserBulkError(line=line, email=email, error=error))
+
+        async def flush():
+            nonlocal created
+            try:
+                result = await self.db.execute(
+                    text(BULK_INSERT_SQL),
+                    {
+                        "emails": [user.email for _, user in batch],
+                        "names": [user.name for _, user in batch],
+                        "now": datetime.utcnow(),
+                    }
+                )
+                inserted = set(result.scalars().all())
+                await self.db.commit()
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                for line, user in batch:
+                    fail(line, user.email, f"Failed to create user: {str(e)}")
+                return
+            created += len(inserted)
+            for line, user in batch:
+                if user.email not in inserted:
+                    fail(line, user.email, EmailIdAlreadyExist(user.email).detail)
+
+        async for line, record in records:
+            if isinstance(record, str):
+                fail(line, None, record)
+                continue
+            try:
+                user = UserCreate.model_validate(record)
+            except ValidationError as e:
+                error = e.errors()[0]
+                email = record.get("email")
+                # The error row only echoes the email back when it is a string.
+                fail(line, email if isinstance(email, str) else None,
+                     f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+                continue
+            if user.email in seen:
+                fail(line, user.email, "Duplicate email in input")
+                continue
+            seen.add(user.email)
+            batch.append((line, user))
+            if len(batch) >= settings.user_bulk_batch_size:
+                await flush()
+                batch = []
 
+        if batch:
+            await flush()
 
+        elapsed = time.perf_counter() - started
+        return UserBulkResult(
+            created=created,
+            failed=failed,
+            errors=errors,
+            elapsed_seconds=elapsed,
+            rows_per_second=(created + failed) / elapsed if elapsed else 0.0
+        )
@@ -1,4 +1,5 @@
-from .exceptions import UserNotFound, InsufficientCredits, InvalidAmount, EmailIdAlreadyExist
+from .exceptions import UserNotFound, InsufficientCredits, InvalidAmount, EmailIdAlreadyExist, IdempotencyKeyConflict, \
+    HoldNotFound, HoldNotActive, CaptureExceedsHold
 from .schema_exception import *
 
-__all__ = ["UserNotFound", "InsufficientCredits", "InvalidAmount", "EmailIdAlreadyExist", "ColumnAlreadyExists", "TableNotFound"]
\ No newline at end of file
+__all__ = ["UserNotFound", "InsufficientCredits", "InvalidAmount", "EmailIdAlreadyExist", "IdempotencyKeyConflict", "HoldNotFound", "HoldNotActive", "CaptureExceedsHold", "ColumnAlreadyExists", "TableNotFound"]
\ No newline at end of file
@@ -0,0 +1,59 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, Any, Tuple, Union
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines without buffering more than one partial line.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def iter_records(
+        chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """
+    Yield (line_number, record) for NDJSON or CSV input. A record that cannot be parsed is
+    yielded as an error string instead of a dict, as is a line that is not valid UTF-8.
+    CSV input needs a header row.
+    """
+    header = None
+    line_number = 0
+    async for raw in iter_lines(chunks):
+        line_number += 1
+        try:
+            line = raw.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError as e:
+            yield line_number, f"Invalid UTF-8 at byte {e.start}"
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "Expected a JSON object"
+                continue
+            yield line_number, record
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        yield line_number, dict(zip(header, values))
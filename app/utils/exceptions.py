@@ -29,3 +29,30 @@ class InvalidAmount(HTTPException):
             detail="Amount must be positive"
         )
 
+class HoldNotFound(HTTPException):
+    def __init__(self, hold_id: int):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hold with id {hold_id} not found"
+        )
+
+class HoldNotActive(HTTPException):
+    def __init__(self, hold_id: int, hold_status: str):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Hold {hold_id} is {hold_status}"
+        )
+
+class CaptureExceedsHold(HTTPException):
+    def __init__(self, held: int, requested: int):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Capture exceeds hold. Held: {held}, Requested: {requested}"
+        )
+
+class IdempotencyKeyConflict(HTTPException):
+    def __init__(self, key: str, reason: str):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Idempotency key {key} {reason}"
+        )
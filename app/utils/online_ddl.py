@@ -0,0 +1,147 @@
+import asyncio
+import random
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from sqlalchemy import text, Result
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+settings = get_settings()
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def _sqlstate(error: DBAPIError):
+    return getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+
+class OnlineDDLExecutor:
+    """
+    Runs DDL one statement per short transaction with lock_timeout and statement_timeout set,
+    so a statement that cannot get its lock gives up quickly instead of queueing every other
+    query on the table behind it. Lock timeouts are retried with exponential backoff.
+    """
+
+    def __init__(self, db: AsyncSession, on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        self.db = db
+        self.on_progress = on_progress
+        self.lock_timeout_ms = settings.ddl_lock_timeout_ms
+        self.statement_timeout_ms = settings.ddl_statement_timeout_ms
+        self.max_retries = settings.ddl_max_retries
+        self.backoff_ms = settings.ddl_retry_backoff_ms
+        self.stats: Dict[str, Any] = {
+            "statements": [],
+            "attempts": 0,
+            "retries": 0,
+            "lock_wait_ms": 0.0,
+            "backfilled_rows": 0,
+            "elapsed_ms": 0.0,
+        }
+
+    async def execute(self, sql: str, record: bool = True) -> int:
+        """
+        Execute one statement in its own transaction and return its rowcount.
+        """
+        return (await self._execute(sql, record=record)).rowcount
+
+    async def _execute(self, sql: str, params: Optional[Dict[str, Any]] = None, record: bool = True) -> Result:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            self.stats["attempts"] += 1
+            try:
+                await self.db.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+                await self.db.execute(text(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}"))
+                result = await self.db.execute(text(sql), params)
+                await self.db.commit()
+            except DBAPIError as e:
+                await self.db.rollback()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.stats["elapsed_ms"] += elapsed_ms
+                if _sqlstate(e) != LOCK_NOT_AVAILABLE or attempt == self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                self.stats["lock_wait_ms"] += elapsed_ms
+                delay_ms = self.backoff_ms * (2 ** attempt)
+                await asyncio.sleep(random.uniform(delay_ms / 2, delay_ms) / 1000)
+                continue
+
+            self.stats["elapsed_ms"] += (time.perf_counter() - started) * 1000
+            if record:
+                self.stats["statements"].append(sql)
+            if self.on_progress is not None:
+                await self.on_progress(self.stats)
+            return result
+
+    async def backfill(self, table_name: str, column_name: str, value, batch_size: int,
+                       key: Optional[str] = None) -> int:
+        """
+        Set `column_name` to `value` on rows where it is NULL, one transaction per range of
+        `batch_size` rows. Ranges walk `key` (a single-column primary key) through its index, or
+        heap pages through a TID range scan when there is no key, so each pass reads the table
+        once. Passes repeat until one updates nothing.
+        """
+        backfill_pass = self._backfill_key_ranges if key else self._backfill_page_ranges
+        total = 0
+        while True:
+            rows = await backfill_pass(table_name, column_name, value, batch_size, key)
+            total += rows
+            if rows == 0:
+                break
+        self.stats["statements"].append(
+            f"UPDATE {table_name} SET {column_name} = {value} WHERE {column_name} IS NULL "
+            f"-- in ranges of {int(batch_size)} rows by {key or 'ctid'}, {total} rows"
+        )
+        return total
+
+    async def _backfill_key_ranges(self, table_name: str, column_name: str, value, batch_size: int, key: str) -> int:
+        total, last_key = 0, None
+        while True:
+            lower = "TRUE" if last_key is None else f"{key} > :last_key"
+            result = await self._execute(
+                f"""
+                WITH chunk AS (
+                    SELECT MAX({key}) AS upper_key
+                    FROM (SELECT {key} FROM {table_name} WHERE {lower} ORDER BY {key} LIMIT {int(batch_size)}) keys
+                ),
+                updated AS (
+                    UPDATE {table_name} SET {column_name} = {value}
+                    WHERE {lower} AND {key} <= (SELECT upper_key FROM chunk) AND {column_name} IS NULL
+                    RETURNING 1
+                )
+                SELECT (SELECT upper_key FROM chunk) AS upper_key, (SELECT COUNT(*) FROM updated) AS updated_rows
+                """,
+                None if last_key is None else {"last_key": last_key},
+                record=False
+            )
+            chunk = result.one()
+            if chunk.upper_key is None:
+                return total
+            total += chunk.updated_rows
+            self.stats["backfilled_rows"] += chunk.updated_rows
+            last_key = chunk.upper_key
+
+    async def _backfill_page_ranges(self, table_name: str, column_name: str, value, batch_size: int, key=None) -> int:
+        result = await self._execute(
+            f"""
+            SELECT pg_relation_size('{table_name}') / current_setting('block_size')::int AS pages,
+                   GREATEST(1, reltuples / NULLIF(relpages, 0))::int AS rows_per_page
+            FROM pg_class
+            WHERE oid = '{table_name}'::regclass
+            """,
+            record=False
+        )
+        table = result.one()
+        step = max(1, int(batch_size) // (table.rows_per_page or 1))
+        total = 0
+        for start in range(0, table.pages, step):
+            rows = (await self._execute(
+                f"UPDATE {table_name} SET {column_name} = {value} "
+                f"WHERE ctid >= '({start},0)'::tid AND ctid < '({start + step},0)'::tid AND {column_name} IS NULL",
+                record=False
+            )).rowcount
+            total += rows
+            self.stats["backfilled_rows"] += rows
+        return total
@@ -0,0 +1,91 @@
+from typing import Dict, Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.utils.lru_cache import TTLLRUCache
+from app.utils.schema_validator import SchemaValidator
+
+settings = get_settings()
+
+_catalog_cache = TTLLRUCache(maxsize=settings.schema_cache_size, ttl=settings.schema_cache_ttl_seconds)
+_stale_entries = 0
+
+# Changes whenever the table is recreated or its pg_class, pg_attribute, index or constraint
+# rows are rewritten, which covers DDL run outside SchemaService. The name is resolved through
+# the search_path, like the unqualified names in the generated DDL.
+TABLE_VERSION_SQL = """
+SELECT md5(
+    c.oid::text || ':' || c.xmin::text || ':' ||
+    COALESCE((SELECT string_agg(a.attnum::text || '.' || a.xmin::text, ',' ORDER BY a.attnum)
+              FROM pg_catalog.pg_attribute a
+              WHERE a.attrelid = c.oid AND a.attnum > 0), '') || ':' ||
+    COALESCE((SELECT string_agg(i.indexrelid::text, ',' ORDER BY i.indexrelid)
+              FROM pg_catalog.pg_index i
+              WHERE i.indrelid = c.oid), '') || ':' ||
+    COALESCE((SELECT string_agg(con.oid::text, ',' ORDER BY con.oid)
+              FROM pg_catalog.pg_constraint con
+              WHERE con.conrelid = c.oid), '')
+)
+FROM pg_catalog.pg_class c
+WHERE c.oid = to_regclass(:table_name)
+"""
+
+
+class SchemaCatalog:
+    """
+    Cached view of a table's columns, indexes and constraints, keyed by table name.
+    Cached entries are checked against a cheap catalog version before use and expire after
+    SCHEMA_CACHE_TTL_SECONDS regardless.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.validator = SchemaValidator(db)
+
+    async def get_table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the catalog entry for a table, or None if it does not exist.
+        """
+        global _stale_entries
+        entry = _catalog_cache.get(table_name)
+        if entry is not None and not settings.schema_cache_verify_version:
+            return entry
+
+        version = await self._version(table_name)
+        if entry is not None:
+            if entry["version"] == version:
+                return entry
+            _stale_entries += 1
+            _catalog_cache.delete(table_name)
+        if version is None:
+            return None
+
+        columns = await self.validator.get_table_columns(table_name)
+        constraints = await self.validator.get_table_constraints(table_name)
+        entry = {
+            "version": version,
+            "columns": columns,
+            "column_names": {column["name"] for column in columns},
+            "indexes": await self.validator.get_table_indexes(table_name),
+            "constraints": constraints,
+            "primary_key": {c["column"] for c in constraints if c["type"] == "PRIMARY KEY"},
+            "foreign_keys": {c["column"] for c in constraints if c["type"] == "FOREIGN KEY"},
+        }
+        _catalog_cache.set(table_name, entry)
+        return entry
+
+    async def _version(self, table_name: str) -> Optional[str]:
+        result = await self.db.execute(
+            text(TABLE_VERSION_SQL),
+            {"table_name": table_name}
+        )
+        return result.scalar()
+
+    def invalidate(self, table_name: str) -> None:
+        _catalog_cache.delete(table_name)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        return {**_catalog_cache.stats(), "stale": _stale_entries}
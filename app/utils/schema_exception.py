@@ -39,4 +39,18 @@ class TableAlreadyExists(HTTPException):
         super().__init__(
             status_code=409,
             detail=f"Table '{table_name}' already exists"
-        )
\ No newline at end of file
+        )
+
+class PlanOperationError(SchemaException):
+    def __init__(self, index: int, error: HTTPException):
+        super().__init__(
+            status_code=error.status_code,
+            detail=f"Operation {index}: {error.detail}"
+        )
+
+class SchemaJobNotFound(SchemaException):
+    def __init__(self, job_id: str):
+        super().__init__(
+            status_code=404,
+            detail=f"Schema job '{job_id}' not found"
+        )
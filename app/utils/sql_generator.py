@@ -1,17 +1,18 @@
-from typing import List
-from app.schemas.schemas import ColumnDefinition
+from typing import List, Tuple
+from app.schemas.schemas import ColumnDefinition, OperationType, SchemaUpdateRequest
 
 
 class SQLGenerator:
     postgres_types_with_size = {"CHAR", "VARCHAR", "BIT", "VARBIT"}
+
     @staticmethod
-    def add_column(table_name: str, column_def: ColumnDefinition) -> str:
+    def column_definition(column_def: ColumnDefinition) -> str:
         col_type = column_def.type.upper()
 
         if column_def.size and col_type in SQLGenerator.postgres_types_with_size:
             col_type = f"{col_type}({column_def.size})"
 
-        sql = f"ALTER TABLE {table_name} ADD COLUMN {column_def.name} {col_type}"
+        sql = f"{column_def.name} {col_type}"
 
         if not column_def.nullable:
             sql += " NOT NULL"
@@ -21,25 +22,67 @@ class SQLGenerator:
 
         return sql
 
+    @staticmethod
+    def add_column_clause(column_def: ColumnDefinition) -> str:
+        return f"ADD COLUMN {SQLGenerator.column_definition(column_def)}"
+
+    @staticmethod
+    def drop_column_clause(column_name: str) -> str:
+        return f"DROP COLUMN {column_name}"
+
+    @staticmethod
+    def alter_table(table_name: str, clauses: List[str]) -> str:
+        return f"ALTER TABLE {table_name} {', '.join(clauses)}"
+
+    @staticmethod
+    def add_column(table_name: str, column_def: ColumnDefinition) -> str:
+        return SQLGenerator.alter_table(table_name, [SQLGenerator.add_column_clause(column_def)])
+
     @staticmethod
     def drop_column(table_name: str, column_name: str) -> str:
-        return f"ALTER TABLE {table_name} DROP COLUMN {column_name}"
+        return SQLGenerator.alter_table(table_name, [SQLGenerator.drop_column_clause(column_name)])
 
     @staticmethod
     def create_table(table_name: str, columns: List[ColumnDefinition]) -> str:
         """
         Generate CREATE TABLE statement dynamically.
         """
-        col_defs = []
-        for col in columns:
-            col_sql = f"{col.name} {col.type}"
-            if col.size:
-                col_sql = f"{col.name} {col.type}({col.size})"
-            if not col.nullable:
-                col_sql += " NOT NULL"
-            if col.default is not None:
-                col_sql += f" DEFAULT {col.default}"
-            col_defs.append(col_sql)
-
-        col_defs_str = ", ".join(col_defs)
+        col_defs_str = ", ".join(SQLGenerator.column_definition(col) for col in columns)
         return f"CREATE TABLE {table_name} ({col_defs_str});"
+
+    @staticmethod
+    def plan(operations: List[SchemaUpdateRequest]) -> List[Tuple[str, str]]:
+        """
+        Turn an ordered list of operations into (table_name, sql) statements.
+        Column changes on the same table are merged into one ALTER TABLE, placed where the
+        table's first change appears. A clause that touches a column already changed in the
+        current ALTER starts a new statement, since Postgres runs drops before adds.
+        """
+        statements: List[Tuple[str, str]] = []
+        groups = []  # (statement index, table, clauses, touched column names)
+        current = {}  # table -> its open group
+
+        for op in operations:
+            if op.operation == OperationType.CREATE_TABLE:
+                statements.append((op.table_name, SQLGenerator.create_table(op.table_name, op.columns)))
+                continue
+
+            if op.operation == OperationType.ADD_COLUMN:
+                column_name = op.column_definition.name
+                clause = SQLGenerator.add_column_clause(op.column_definition)
+            else:
+                column_name = op.column_name
+                clause = SQLGenerator.drop_column_clause(column_name)
+
+            group = current.get(op.table_name)
+            if group is None or column_name in group[3]:
+                statements.append((op.table_name, ""))
+                group = (len(statements) - 1, op.table_name, [], set())
+                groups.append(group)
+                current[op.table_name] = group
+            group[2].append(clause)
+            group[3].add(column_name)
+
+        for index, table_name, clauses, _ in groups:
+            statements[index] = (table_name, SQLGenerator.alter_table(table_name, clauses))
+        return statements
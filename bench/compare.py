@@ -0,0 +1,58 @@
+"""
+Compare two result files written by bench.run, per workload and endpoint.
+
+    python -m bench.compare bench/results/BASE.json bench/results/NEW.json
+"""
+import argparse
+import json
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(base: dict, new: dict) -> list:
+    rows = []
+    for workload, new_result in new["workloads"].items():
+        base_result = base["workloads"].get(workload)
+        if base_result is None:
+            continue
+        sections = [("(total)", base_result["totals"], new_result["totals"])]
+        sections += [
+            (endpoint, base_result["endpoints"][endpoint], stats)
+            for endpoint, stats in new_result["endpoints"].items()
+            if endpoint in base_result["endpoints"]
+        ]
+        for endpoint, old, cur in sections:
+            rows.append([
+                workload, endpoint,
+                f"{old['throughput_rps']:.0f} -> {cur['throughput_rps']:.0f}", _change(old["throughput_rps"], cur["throughput_rps"]),
+                f"{old['p50_ms']:.2f} -> {cur['p50_ms']:.2f}",
+                f"{old['p99_ms']:.2f} -> {cur['p99_ms']:.2f}", _change(old["p99_ms"], cur["p99_ms"]),
+                f"{old['errors']} -> {cur['errors']}",
+            ])
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"base {base.get('commit', '?')[:10]}  new {new.get('commit', '?')[:10]}")
+    header = ["workload", "endpoint", "req/s", "change", "p50 ms", "p99 ms", "change", "errors"]
+    rows = [header] + compare(base, new)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
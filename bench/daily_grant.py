@@ -0,0 +1,135 @@
+"""
+Benchmark the daily credit grant on a large credits table.
+
+Seeds --users users, then runs the grant two ways while --concurrency workers keep deducting from
+random users: the same update and ledger insert as one statement over the whole table (how the
+grant ran before it was chunked) and BackgroundService.add_daily_credits in --chunk-size chunks.
+Reports total runtime, how long rows stay locked (the whole statement vs. the longest chunk
+transaction) and deduct latency while each grant runs.
+
+    python -m bench.daily_grant --users 2000000 --chunk-size 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from bench.environment import add_postgres_arguments, app_environment, postgres_from_args, prepare_database
+from bench.stats import EndpointStats
+
+
+async def deduct_while(done: asyncio.Event, low: int, high: int, concurrency: int, stats: EndpointStats, label: str):
+    from app.core.database import AsyncSessionLocal
+    from app.services.credit_service import CreditService
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        while not done.is_set():
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await CreditService(db).deduct_credits(rng.randint(low, high), 1)
+            stats.record(label, time.perf_counter() - started, "200")
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+
+async def single_update(amount: int) -> dict:
+    from sqlalchemy import text
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        rows = await db.scalar(
+            text("""
+            WITH granted AS (
+                UPDATE credits SET credits = credits + :amount, last_updated = LOCALTIMESTAMP
+                RETURNING user_id
+            ),
+            logged AS (
+                INSERT INTO credit_transactions (user_id, op, amount, created_at)
+                SELECT user_id, 'daily_grant', :amount, LOCALTIMESTAMP FROM granted
+            )
+            SELECT COUNT(*) FROM granted
+            """),
+            {"amount": amount}
+        )
+        await db.commit()
+        elapsed = time.perf_counter() - started
+    return {"rows": rows, "runtime_s": round(elapsed, 3), "lock_hold_ms_max": round(elapsed * 1000, 1)}
+
+
+async def chunked_grant() -> dict:
+    from app.services.background_service import BackgroundService, daily_credit_metrics
+
+    started = time.perf_counter()
+    await BackgroundService.add_daily_credits(run_key=f"bench-{time.time_ns()}")
+    elapsed = time.perf_counter() - started
+    stats = daily_credit_metrics.snapshot()
+    if stats["status"] != "succeeded":
+        raise RuntimeError(f"Chunked grant {stats['status']}: {stats['last_error']}")
+    return {
+        "rows": stats["rows_updated"],
+        "chunks": stats["chunks"],
+        "runtime_s": round(elapsed, 3),
+        "lock_hold_ms_avg": round(stats["chunk_ms_avg"], 1),
+        "lock_hold_ms_max": round(stats["chunk_ms_max"], 1),
+    }
+
+
+async def compare(low: int, high: int, concurrency: int, amount: int) -> dict:
+    from app.core.database import engine
+
+    results = {}
+    try:
+        for name, grant in (("single_update", lambda: single_update(amount)), ("chunked", chunked_grant)):
+            stats = EndpointStats()
+            done = asyncio.Event()
+            deducts = asyncio.create_task(deduct_while(done, low, high, concurrency, stats, name))
+            await asyncio.sleep(0.5)
+            started = time.perf_counter()
+            results[name] = await grant()
+            done.set()
+            await deducts
+            elapsed = time.perf_counter() - started
+            deducts_summary = stats.summary(elapsed)[name]
+            results[name]["deducts"] = {k: deducts_summary[k] for k in ("requests", "p50_ms", "p99_ms", "max_ms")}
+            print(f"{name}: {results[name]}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Workers deducting while the grant runs")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    postgres = postgres_from_args(args)
+    try:
+        postgres.start()
+        seeded_at = time.perf_counter()
+        low, high = prepare_database(postgres, args.users, 1_000_000)
+        print(f"Seeded users {low}..{high} in {time.perf_counter() - seeded_at:.1f}s", file=sys.stderr)
+        os.environ.update(app_environment(postgres, {"DAILY_CREDIT_CHUNK_SIZE": str(args.chunk_size)}))
+        from app.config import get_settings
+        results = asyncio.run(compare(low, high, args.concurrency, get_settings().daily_credit_amount))
+    finally:
+        postgres.stop()
+
+    results = {"users": args.users, "chunk_size": args.chunk_size, "concurrency": args.concurrency, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from bench.http_client import HTTPConnection
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DB_NAME = "bench"
+DB_USER = "bench"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Postgres:
+    """
+    A Postgres the harness can run SQL against through psql. `url()` is the asyncpg URL
+    handed to the app.
+    """
+
+    host = "127.0.0.1"
+    port: int
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def psql_command(self):
+        raise NotImplementedError
+
+    def psql(self, sql: str, database: str = DB_NAME) -> str:
+        result = subprocess.run(
+            [*self.psql_command(), "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1", "-d", database],
+            input=sql, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"psql failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def url(self, driver: str = "postgresql+asyncpg") -> str:
+        return f"{driver}://{DB_USER}@{self.host}:{self.port}/{DB_NAME}"
+
+
+class LocalPostgres(Postgres):
+    """
+    Throwaway cluster created with initdb in a temporary directory. Needs the Postgres server
+    binaries on PATH or in `bin_dir`.
+    """
+
+    def __init__(self, bin_dir: Optional[str] = None, server_options: Tuple[str, ...] = ()):
+        self.bin_dir = bin_dir
+        self.server_options = server_options
+        self.port = free_port()
+        self.data_dir: Optional[str] = None
+
+    def _bin(self, name: str) -> str:
+        path = os.path.join(self.bin_dir, name) if self.bin_dir else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise RuntimeError(f"{name} not found; install Postgres, pass --pg-bin, or use --postgres docker")
+        return path
+
+    def start(self):
+        self.data_dir = tempfile.mkdtemp(prefix="credits-bench-pg-")
+        subprocess.run(
+            [self._bin("initdb"), "-D", self.data_dir, "-U", DB_USER, "--auth=trust", "-E", "UTF8"],
+            check=True, capture_output=True,
+        )
+        options = " ".join([
+            f"-p {self.port}", "-c listen_addresses=127.0.0.1", f"-c unix_socket_directories={self.data_dir}",
+            "-c max_connections=300", *self.server_options,
+        ])
+        subprocess.run(
+            [self._bin("pg_ctl"), "-D", self.data_dir, "-o", options, "-l",
+             os.path.join(self.data_dir, "server.log"), "-w", "start"],
+            check=True, capture_output=True,
+        )
+        self.psql(f"CREATE DATABASE {DB_NAME}", database="postgres")
+
+    def stop(self):
+        if self.data_dir is None:
+            return
+        subprocess.run([self._bin("pg_ctl"), "-D", self.data_dir, "-m", "fast", "-w", "stop"], capture_output=True)
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        self.data_dir = None
+
+    def psql_command(self):
+        return [self._bin("psql"), "-h", self.host, "-p", str(self.port), "-U", DB_USER]
+
+
+class DockerPostgres(Postgres):
+    def __init__(self, image: str = "postgres:16"):
+        self.image = image
+        self.port = free_port()
+        self.container: Optional[str] = None
+
+    def start(self):
+        self.container = subprocess.run(
+            ["docker", "run", "-d", "--rm", "-p", f"127.0.0.1:{self.port}:5432",
+             "-e", f"POSTGRES_USER={DB_USER}", "-e", f"POSTGRES_DB={DB_NAME}",
+             "-e", "POSTGRES_HOST_AUTH_METHOD=trust", self.image, "-c", "max_connections=300"],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            # The entrypoint restarts the server once after init, so wait until it answers on TCP.
+            ready = subprocess.run(
+                ["docker", "exec", self.container, "pg_isready", "-h", "127.0.0.1", "-U", DB_USER],
+                capture_output=True,
+            )
+            if ready.returncode == 0:
+                return
+            time.sleep(0.5)
+        raise RuntimeError("Postgres container did not become ready")
+
+    def stop(self):
+        if self.container:
+            subprocess.run(["docker", "stop", self.container], capture_output=True)
+            self.container = None
+
+    def psql_command(self):
+        return ["docker", "exec", "-i", self.container, "psql", "-h", "127.0.0.1", "-U", DB_USER]
+
+
+class ExternalPostgres(Postgres):
+    """
+    An existing database, given as a plain postgresql:// URL. Its contents are replaced.
+    """
+
+    def __init__(self, url: str):
+        self._url = url
+
+    def psql(self, sql: str, database: str = DB_NAME) -> str:
+        result = subprocess.run(
+            ["psql", self._url, "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1"],
+            input=sql, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"psql failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def url(self, driver: str = "postgresql+asyncpg") -> str:
+        return driver + self._url[self._url.index("://"):]
+
+
+def add_postgres_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--postgres", choices=["local", "docker", "external"], default="local",
+                        help="local: initdb/pg_ctl from PATH or --pg-bin; docker: postgres image; "
+                             "external: --database-url")
+    parser.add_argument("--pg-bin", help="Directory with initdb, pg_ctl and psql")
+    parser.add_argument("--pg-option", action="append", default=[],
+                        help="Extra server option for the local cluster, e.g. '-c shared_buffers=1GB'")
+    parser.add_argument("--docker-image", default="postgres:16")
+    parser.add_argument("--database-url", help="postgresql:// URL for --postgres external; its data is replaced")
+
+
+def postgres_from_args(args) -> Postgres:
+    if args.postgres == "external":
+        if not args.database_url:
+            raise SystemExit("--postgres external needs --database-url")
+        return ExternalPostgres(args.database_url)
+    if args.postgres == "docker":
+        return DockerPostgres(args.docker_image)
+    return LocalPostgres(args.pg_bin, tuple(args.pg_option))
+
+
+def app_environment(postgres: Postgres, overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Settings for running the app against `postgres`, in a subprocess or, for benchmarks that
+    call services directly, in this process before any app module is imported.
+    """
+    env = {
+        "APP_NAME": "credits-bench",
+        "APP_VERSION": "bench",
+        "DEBUG": "false",
+        "DATABASE_URL": postgres.url(),
+        "DATABASE_URL_SYNC": postgres.url("postgresql"),
+    }
+    env.update(overrides or {})
+    return env
+
+
+def prepare_database(postgres: Postgres, users: int, initial_credits: int) -> Tuple[int, int]:
+    """
+    Load schema.sql, point the database's search_path at its schema so the app uses the same
+    tables, and seed `users` users with their credit rows. Returns the (min, max) user id.
+    """
+    postgres.psql("DROP SCHEMA IF EXISTS credit_db CASCADE")
+    postgres.psql((REPO_ROOT / "schema.sql").read_text())
+    database = postgres.psql("SELECT current_database()")
+    postgres.psql(f'ALTER DATABASE "{database}" SET search_path TO credit_db, public')
+    postgres.psql(f"""
+        SET search_path TO credit_db;
+        INSERT INTO users (email, name)
+        SELECT 'bench' || g || '@example.com', 'Bench User ' || g
+        FROM generate_series(1, {int(users)}) AS g;
+        INSERT INTO credits (user_id, credits, last_updated)
+        SELECT u.user_id, {int(initial_credits)}, now()
+        FROM users u
+        WHERE NOT EXISTS (SELECT 1 FROM credits c WHERE c.user_id = u.user_id);
+        UPDATE credits SET credits = {int(initial_credits)};
+        ANALYZE;
+    """)
+    low, high = postgres.psql("SELECT MIN(user_id) || ',' || MAX(user_id) FROM credit_db.users").split(",")
+    return int(low), int(high)
+
+
+class AppServer:
+    """
+    The app under uvicorn in a subprocess, configured through environment variables.
+    """
+
+    def __init__(self, postgres: Postgres, workers: int = 1, env: Optional[Dict[str, str]] = None):
+        self.postgres = postgres
+        self.workers = workers
+        self.port = free_port()
+        self.host = "127.0.0.1"
+        self.overrides = env or {}
+        self.process: Optional[subprocess.Popen] = None
+
+    def environment(self) -> Dict[str, str]:
+        return {**os.environ, **app_environment(self.postgres, self.overrides)}
+
+    def start(self, timeout: float = 60.0):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", self.host, "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=REPO_ROOT, env=self.environment(),
+        )
+        asyncio.run(self._wait_ready(timeout))
+
+    async def _wait_ready(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            connection = HTTPConnection(self.host, self.port, timeout=2)
+            try:
+                status, _ = await connection.request("GET", "/health")
+                if status == 200:
+                    return
+            except (OSError, asyncio.TimeoutError):
+                pass
+            finally:
+                await connection.close()
+            await asyncio.sleep(0.2)
+        raise RuntimeError("App did not become ready")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
@@ -0,0 +1,351 @@
+"""
+Traffic generator for a running credits service.
+
+Reads requests from JSONL workload files (see bench.workloads.load_replay), from the curl
+examples in postman_collection.json, or from an access log (uvicorn or nginx style), and
+replays them against --target in closed loop (fixed concurrency) or open loop (fixed arrival
+rate, latency measured from the scheduled send time). User ids in /api/credits/<id> and
+/api/users/<id> paths can be redrawn from a uniform or Zipf distribution to model hot accounts.
+
+    python -m bench.loadgen --postman postman_collection.json --exclude '/api/schema/(update|table/.*/column)' \\
+        --mode open --rate 200,400,800,1600 --duration 20 --warmup 5 --user-dist zipf --users 1-10000
+    python -m bench.loadgen --requests recorded.jsonl --mode closed --concurrency 64 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import shlex
+import sys
+import time
+from bisect import bisect_left
+from itertools import accumulate, count
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from bench.http_client import HTTPConnection
+from bench.runner import run_closed_loop, send
+from bench.stats import EndpointStats
+from bench.workloads import Generator, Request, load_replay
+
+USER_ID_IN_PATH = re.compile(r"(/api/(?:credits|users)/)(\d+|\{user_id\})(?=/|\?|$)")
+ACCESS_LOG_REQUEST = re.compile(r'"([A-Z]+) (\S+) HTTP/[\d.]+"')
+NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+HISTOGRAM_BOUNDS_MS = [0.25 * 2 ** i for i in range(17)]  # 0.25ms .. ~16s
+
+
+def endpoint_label(method: str, path: str) -> str:
+    path = USER_ID_IN_PATH.sub(r"\1{user_id}", path.split("?", 1)[0])
+    return f"{method} {NUMERIC_SEGMENT.sub('/{id}', path)}"
+
+
+def parse_postman(path: str) -> List[Request]:
+    """
+    Extract the curl commands from a file of curl examples and sample responses. A command
+    runs until its quoting balances on a line that does not end in a backslash.
+    """
+    lines = open(path).read().splitlines()
+    requests = []
+    index = 0
+    while index < len(lines):
+        start = lines[index].find("curl ")
+        if start < 0:
+            index += 1
+            continue
+        command = lines[index][start:]
+        while True:
+            try:
+                tokens = shlex.split(command.replace("\\\n", " "))
+                if not command.rstrip().endswith("\\"):
+                    break
+            except ValueError:
+                pass
+            index += 1
+            if index >= len(lines):
+                tokens = None
+                break
+            command += "\n" + lines[index]
+        index += 1
+        if tokens:
+            request = _curl_to_request(tokens)
+            if request is not None:
+                requests.append(request)
+    return requests
+
+
+def _curl_to_request(tokens: List[str]) -> Optional[Request]:
+    method, url, body, headers = None, None, None, {}
+    position = 1
+    while position < len(tokens):
+        token = tokens[position]
+        if token in ("-X", "--request"):
+            method = tokens[position + 1].upper()
+            position += 1
+        elif token in ("-H", "--header"):
+            name, _, value = tokens[position + 1].partition(":")
+            headers[name.strip()] = value.strip()
+            position += 1
+        elif token in ("-d", "--data", "--data-raw"):
+            body = json.loads(tokens[position + 1])
+            position += 1
+        elif token.startswith("http://") or token.startswith("https://"):
+            url = token
+        position += 1
+    if url is None:
+        return None
+    method = method or ("POST" if body is not None else "GET")
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+    return Request(endpoint_label(method, path), method, path, body, headers or None)
+
+
+def parse_access_log(path: str, default_body: Optional[dict]) -> List[Request]:
+    """
+    Requests from access log lines containing `"METHOD /path HTTP/1.1"`. Logs carry no bodies,
+    so POST, PUT and PATCH requests get `default_body`.
+    """
+    requests = []
+    with open(path) as f:
+        for line in f:
+            match = ACCESS_LOG_REQUEST.search(line)
+            if not match:
+                continue
+            method, target = match.groups()
+            body = default_body if method in ("POST", "PUT", "PATCH") else None
+            requests.append(Request(endpoint_label(method, target), method, target, body))
+    return requests
+
+
+class UserSampler:
+    """
+    Draws user ids in [low, high]. With Zipf, rank k is drawn with probability proportional to
+    1/k^s and maps to user id low + k - 1, so the lowest ids are the hottest accounts.
+    """
+
+    def __init__(self, low: int, high: int, distribution: str, s: float):
+        self.low = low
+        self.high = high
+        self.distribution = distribution
+        if distribution == "zipf":
+            self.cdf = list(accumulate(1 / (k ** s) for k in range(1, high - low + 2)))
+
+    def sample(self, rng: random.Random) -> int:
+        if self.distribution == "zipf":
+            return self.low + bisect_left(self.cdf, rng.random() * self.cdf[-1])
+        return rng.randint(self.low, self.high)
+
+
+def make_source(requests: List[Request], sampler: UserSampler, redraw_ids: bool, order: str):
+    """
+    Request generator over the loaded requests. `{user_id}` placeholders are always filled from
+    the sampler; literal ids are redrawn only with `redraw_ids`.
+    """
+    position = count()
+
+    def generate(rng: random.Random) -> Request:
+        request = rng.choice(requests) if order == "random" else requests[next(position) % len(requests)]
+        if "{user_id}" in request.path or (redraw_ids and USER_ID_IN_PATH.search(request.path)):
+            path = USER_ID_IN_PATH.sub(lambda m: m.group(1) + str(sampler.sample(rng)), request.path)
+            request = request._replace(path=path)
+        return request
+    return generate
+
+
+async def run_open_loop(
+        host: str,
+        port: int,
+        generate: Generator,
+        rate: float,
+        duration: float,
+        warmup: float,
+        max_inflight: int,
+        arrivals: str,
+        seed: Optional[int],
+) -> Tuple[EndpointStats, float]:
+    """
+    Send requests at `rate` per second regardless of how fast responses come back, with fixed
+    or Poisson inter-arrival times. Latency counts from the scheduled send time, so queueing
+    in the generator is not hidden. Arrivals past `max_inflight` are counted as "dropped".
+    """
+    rng = random.Random(seed)
+    stats = EndpointStats()
+    idle: List[HTTPConnection] = []
+    connections: List[HTTPConnection] = []
+    tasks = set()
+    inflight = 0
+
+    async def fire(request: Request, scheduled: float, record: bool):
+        nonlocal inflight
+        connection = idle.pop() if idle else None
+        if connection is None:
+            connection = HTTPConnection(host, port)
+            connections.append(connection)
+        try:
+            outcome, _ = await send(connection, request)
+        except Exception as e:
+            # Anything send() does not classify, e.g. a malformed response, is this request's
+            # outcome; letting it escape would abort the run at the final gather.
+            outcome = type(e).__name__
+            await connection.close()
+        finally:
+            idle.append(connection)
+            inflight -= 1
+        if record:
+            stats.record(request.endpoint, time.perf_counter() - scheduled, outcome)
+
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    scheduled = started
+    while scheduled < stop_at:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        request = generate(rng)
+        record = scheduled >= measure_from
+        if inflight >= max_inflight:
+            if record:
+                stats.record_unsent(request.endpoint, "dropped")
+        else:
+            inflight += 1
+            task = asyncio.create_task(fire(request, scheduled, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        scheduled += rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+
+    await asyncio.gather(*tasks)
+    for connection in connections:
+        await connection.close()
+    return stats, time.perf_counter() - measure_from
+
+
+def latency_histogram(stats: EndpointStats, width: int = 50) -> List[str]:
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for values in stats.latencies.values():
+        for seconds in values:
+            counts[bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+    total = sum(counts)
+    if not total:
+        return []
+    first = next(i for i, c in enumerate(counts) if c)
+    last = max(i for i, c in enumerate(counts) if c)
+    peak = max(counts)
+    lines = []
+    for i in range(first, last + 1):
+        label = f"<= {HISTOGRAM_BOUNDS_MS[i]:g}ms" if i < len(HISTOGRAM_BOUNDS_MS) else f"> {HISTOGRAM_BOUNDS_MS[-1]:g}ms"
+        bar = "#" * math.ceil(counts[i] / peak * width) if counts[i] else ""
+        lines.append(f"  {label:>14} {counts[i]:>9} {counts[i] / total * 100:5.1f}% {bar}")
+    return lines
+
+
+def report(title: str, stats: EndpointStats, elapsed: float) -> dict:
+    totals = stats.totals(elapsed)
+    endpoints = stats.summary(elapsed)
+    print(f"\n== {title}: {totals['throughput_rps']} req/s, {totals['requests']} requests, "
+          f"{totals['errors']} errors, p50 {totals['p50_ms']}ms p95 {totals['p95_ms']}ms p99 {totals['p99_ms']}ms")
+    header = ["endpoint", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms", "max ms", "errors"]
+    rows = [header] + [
+        [name, str(e["requests"]), f"{e['throughput_rps']:g}", f"{e['p50_ms']:g}", f"{e['p95_ms']:g}",
+         f"{e['p99_ms']:g}", f"{e['max_ms']:g}", str(e["errors"])]
+        for name, e in endpoints.items()
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  " + "  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    errors = {
+        name: {status: n for status, n in e["statuses"].items() if EndpointStats.is_error(status)}
+        for name, e in endpoints.items()
+    }
+    errors = {name: breakdown for name, breakdown in errors.items() if breakdown}
+    if errors:
+        print("  errors:")
+        for name, breakdown in errors.items():
+            print(f"    {name}: " + ", ".join(f"{status} x{n}" for status, n in sorted(breakdown.items())))
+    print("  latency:")
+    for line in latency_histogram(stats):
+        print(line)
+    return {"duration_s": round(elapsed, 3), "totals": totals, "endpoints": endpoints}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", action="append", default=[], help="JSONL workload file (repeatable)")
+    parser.add_argument("--postman", action="append", default=[], help="File of curl examples (repeatable)")
+    parser.add_argument("--access-log", action="append", default=[], help="Access log to replay (repeatable)")
+    parser.add_argument("--default-body", default='{"amount": 1}',
+                        help="JSON body for access log POST/PUT/PATCH lines, which carry none")
+    parser.add_argument("--include", help="Only replay paths matching this regex")
+    parser.add_argument("--exclude", help="Skip paths matching this regex, e.g. schema changes")
+    parser.add_argument("--order", choices=["random", "sequential"], default="random")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=32, help="Closed loop: requests in flight")
+    parser.add_argument("--rate", default="100",
+                        help="Open loop: requests per second; a comma-separated list runs one step per rate")
+    parser.add_argument("--arrivals", choices=["fixed", "poisson"], default="poisson")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="Open loop: drop arrivals beyond this")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each step")
+    parser.add_argument("--user-dist", choices=["uniform", "zipf"], help="Redraw user ids in paths")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent; higher is more skewed")
+    parser.add_argument("--users", default="1-1000", help="User id range to draw from, e.g. 1-10000")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="Write results to this file")
+    return parser
+
+
+def load_requests(args) -> List[Request]:
+    requests: List[Request] = []
+    for path in args.requests:
+        requests += [r._replace(endpoint=endpoint_label(r.method, r.path)) if r.endpoint == f"{r.method} {r.path}"
+                     else r for r in load_replay(path)]
+    for path in args.postman:
+        requests += parse_postman(path)
+    default_body = json.loads(args.default_body) if args.default_body else None
+    for path in args.access_log:
+        requests += parse_access_log(path, default_body)
+    if args.include:
+        requests = [r for r in requests if re.search(args.include, r.path)]
+    if args.exclude:
+        requests = [r for r in requests if not re.search(args.exclude, r.path)]
+    return requests
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    requests = load_requests(args)
+    if not requests:
+        raise SystemExit("No requests to send; pass --requests, --postman or --access-log")
+    target = urlsplit(args.target)
+    if target.scheme != "http":
+        raise SystemExit("Only http:// targets are supported")
+    host, port = target.hostname, target.port or 80
+
+    low, _, high = args.users.partition("-")
+    sampler = UserSampler(int(low), int(high or low), args.user_dist or "uniform", args.zipf_s)
+    generate = make_source(requests, sampler, args.user_dist is not None, args.order)
+    print(f"Loaded {len(requests)} requests over {len({r.endpoint for r in requests})} endpoints", file=sys.stderr)
+
+    results = {"target": args.target, "mode": args.mode, "steps": []}
+    if args.mode == "closed":
+        stats, elapsed = asyncio.run(run_closed_loop(
+            host, port, generate, args.concurrency, args.duration, args.warmup, args.seed))
+        step = report(f"closed loop, concurrency {args.concurrency}", stats, elapsed)
+        results["steps"].append({"concurrency": args.concurrency, **step})
+    else:
+        for rate in (float(value) for value in args.rate.split(",")):
+            stats, elapsed = asyncio.run(run_open_loop(
+                host, port, generate, rate, args.duration, args.warmup, args.max_inflight, args.arrivals, args.seed))
+            step = report(f"open loop, {rate:g} req/s offered", stats, elapsed)
+            results["steps"].append({"rate": rate, **step})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Measure the per-request cost of the ASGI middlewares, without HTTP or a database.
+
+Each case wraps a no-op ASGI app, which answers 200 with an empty body, in one middleware and
+calls it --requests times in a loop after a warmup. The baseline calls the no-op app directly;
+every case reports mean, p50 and p99 microseconds per call and its mean overhead over the
+baseline. Rate limiting is measured disabled, with a user id bucket, with user id and API key
+buckets, and answering 429; request metrics disabled and recording.
+
+    python -m bench.middleware_overhead --requests 200000 --keys 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from bench.stats import percentile
+
+# Settings are read when app modules are first imported; no database is opened.
+ENVIRONMENT = {
+    "APP_NAME": "credits-bench",
+    "APP_VERSION": "bench",
+    "DEBUG": "false",
+    "DATABASE_URL": "postgresql+asyncpg://localhost/unused",
+    "DATABASE_URL_SYNC": "postgresql://localhost/unused",
+}
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def discard(message):
+    pass
+
+
+def http_scope(path: str, headers: Dict[str, str] = None) -> dict:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+
+
+async def measure(app, scopes: List[dict], requests: int) -> List[float]:
+    timings = []
+    for n in range(requests):
+        scope = scopes[n % len(scopes)]
+        started = time.perf_counter()
+        await app(scope, receive, discard)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings: List[float]) -> dict:
+    values = sorted(timings)
+    return {
+        "mean_us": round(statistics.fmean(values) * 1e6, 3),
+        "p50_us": round(percentile(values, 50) * 1e6, 3),
+        "p99_us": round(percentile(values, 99) * 1e6, 3),
+    }
+
+
+def rate_limit_cases(keys: int) -> List[tuple]:
+    """
+    (name, settings, build the app, scopes) per rate limiting case. Every case gets a fresh
+    store, so buckets from the previous one do not carry over.
+    """
+    from app.core.rate_limit import LocalRateLimitStore, RateLimitMiddleware
+
+    def build() -> Callable:
+        return RateLimitMiddleware(noop_app, store=LocalRateLimitStore(max(keys, 1)))
+
+    users = [http_scope(f"/api/credits/{n + 1}/deduct") for n in range(keys)]
+    users_with_key = [http_scope(f"/api/credits/{n + 1}/deduct", {"X-API-Key": f"key-{n % 100}"})
+                      for n in range(keys)]
+    unlimited = {"rate_limit_enabled": True, "rate_limit_user_rate": 1e9, "rate_limit_user_burst": 10**9,
+                 "rate_limit_api_key_rate": 1e9, "rate_limit_api_key_burst": 10**9}
+    return [
+        ("rate_limit_disabled", {"rate_limit_enabled": False}, build, users),
+        ("rate_limit_user", unlimited, build, users),
+        ("rate_limit_user_and_api_key", unlimited, build, users_with_key),
+        ("rate_limit_429", {"rate_limit_enabled": True, "rate_limit_user_rate": 1e-6, "rate_limit_user_burst": 1},
+         build, users[:1]),
+    ]
+
+
+def request_metrics_cases() -> List[tuple]:
+    """
+    (name, settings, build the app, scopes) per request metrics case. The no-op app runs no
+    queries and matches no route, so this is the middleware's fixed cost per request.
+    """
+    from app.core.request_metrics import RequestMetricsMiddleware
+
+    def build() -> Callable:
+        return RequestMetricsMiddleware(noop_app)
+
+    scopes = [http_scope("/api/credits/1/deduct")]
+    return [
+        ("request_metrics_disabled", {"request_metrics_enabled": False, "query_audit_enabled": False}, build, scopes),
+        ("request_metrics", {"request_metrics_enabled": True, "query_audit_enabled": False,
+                             "slow_request_ms": 10**9}, build, scopes),
+    ]
+
+
+async def compare(requests: int, keys: int) -> dict:
+    from app.config import get_settings
+
+    settings = get_settings()
+    warmup = max(1, requests // 10)
+    await measure(noop_app, [http_scope("/")], warmup)
+    baseline = summarize(await measure(noop_app, [http_scope("/")], requests))
+    results = {"baseline": baseline}
+    print(f"baseline: {baseline}", file=sys.stderr)
+
+    for name, overrides, build, scopes in rate_limit_cases(keys) + request_metrics_cases():
+        saved = {key: getattr(settings, key) for key in overrides}
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        try:
+            app = build()
+            await measure(app, scopes, warmup)
+            summary = summarize(await measure(app, scopes, requests))
+        finally:
+            for key, value in saved.items():
+                setattr(settings, key, value)
+        summary["overhead_us"] = round(summary["mean_us"] - baseline["mean_us"], 3)
+        results[name] = summary
+        print(f"{name}: {summary}", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000, help="Distinct user ids in the request paths")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.environ.update(ENVIRONMENT)
+    results = asyncio.run(compare(args.requests, args.keys))
+
+    results = {"requests": args.requests, "keys": args.keys, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark the credits service end to end.
+
+Starts Postgres (a throwaway initdb cluster, a docker container, or an existing database),
+loads schema.sql and seeds users, starts the app under uvicorn, runs each workload in closed
+loop and writes throughput and p50/p95/p99 per endpoint to a JSON file.
+
+    python -m bench.run --users 10000 --duration 30 --workloads read_heavy,deduct_storm
+    python -m bench.run --replay recorded.jsonl
+    python -m bench.run --workloads deduct_storm --env DEDUCT_COALESCING_ENABLED=true
+    python -m bench.compare bench/results/OLD.json bench/results/NEW.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.environment import REPO_ROOT, AppServer, add_postgres_arguments, postgres_from_args, prepare_database
+from bench.runner import run_closed_loop
+from bench.workloads import WORKLOADS, WorkloadContext, load_replay, replay
+
+
+def git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def parse_env(values) -> dict:
+    env = {}
+    for value in values or []:
+        name, sep, setting = value.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects NAME=VALUE, got {value!r}")
+        env[name] = setting
+    return env
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--users", type=int, default=10_000, help="Users to seed")
+    parser.add_argument("--initial-credits", type=int, default=1_000_000)
+    parser.add_argument("--hot-users", type=int, default=10, help="Users targeted by deduct_storm")
+    parser.add_argument("--workloads", default="read_heavy,deduct_storm,signups,schema_listing,keyed_deducts,keyed_replays,mixed",
+                        help=f"Comma-separated, from: {', '.join(WORKLOADS)}")
+    parser.add_argument("--replay", action="append", default=[],
+                        help="JSONL file of requests to run as an extra workload (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per workload")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each workload")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", help="NAME=VALUE passed to the app, e.g. DB_POOL_SIZE=20")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file (default: bench/results/<timestamp>-<commit>.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    workload_names = [name for name in args.workloads.split(",") if name]
+    unknown = [name for name in workload_names if name not in WORKLOADS]
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(unknown)}")
+    replays = {f"replay:{Path(path).name}": load_replay(path) for path in args.replay}
+    app_env = parse_env(args.env)
+
+    postgres = postgres_from_args(args)
+
+    revision = git_revision()
+    results = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "postgres": args.postgres,
+            "users": args.users,
+            "hot_users": args.hot_users,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "workers": args.workers,
+            "env": app_env,
+        },
+        "workloads": {},
+    }
+
+    server = None
+    try:
+        postgres.start()
+        seeded_at = time.perf_counter()
+        low, high = prepare_database(postgres, args.users, args.initial_credits)
+        print(f"Seeded users {low}..{high} in {time.perf_counter() - seeded_at:.1f}s", file=sys.stderr)
+        server = AppServer(postgres, args.workers, app_env)
+        server.start()
+        ctx = WorkloadContext(low, high, args.hot_users)
+
+        generators = [(name, WORKLOADS[name][1](ctx)) for name in workload_names]
+        generators += [(name, replay(ctx, requests)) for name, requests in replays.items()]
+        for name, generate in generators:
+            print(f"Running {name} for {args.warmup:g}s warmup + {args.duration:g}s", file=sys.stderr)
+            stats, elapsed = asyncio.run(run_closed_loop(
+                server.host, server.port, generate, args.concurrency, args.duration, args.warmup, args.seed
+            ))
+            results["workloads"][name] = {
+                "duration_s": round(elapsed, 3),
+                "totals": stats.totals(elapsed),
+                "endpoints": stats.summary(elapsed),
+            }
+            totals = results["workloads"][name]["totals"]
+            print(f"  {totals['throughput_rps']} req/s, p50 {totals['p50_ms']}ms, p99 {totals['p99_ms']}ms, "
+                  f"{totals['errors']} errors", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.stop()
+        postgres.stop()
+
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / "bench" / "results"
+        / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{revision['commit'][:10] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
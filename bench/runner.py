@@ -0,0 +1,66 @@
+import asyncio
+import json
+import random
+import time
+from typing import Optional, Tuple
+
+from bench.http_client import HTTPConnection
+from bench.stats import EndpointStats
+from bench.workloads import Generator, Request
+
+
+async def send(connection: HTTPConnection, request: Request) -> Tuple[str, float]:
+    """
+    Send one request and return (status or error name, latency in seconds).
+    """
+    body = json.dumps(request.body).encode() if request.body is not None else None
+    headers = dict(request.headers or {})
+    if body is not None:
+        headers.setdefault("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        status, _ = await connection.request(request.method, request.path, body, headers)
+        outcome = str(status)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        # The late response would be read as the answer to the next request on this connection.
+        await connection.close()
+    except (OSError, asyncio.IncompleteReadError) as e:
+        outcome = type(e).__name__
+        await connection.close()
+    return outcome, time.perf_counter() - started
+
+
+async def run_closed_loop(
+        host: str,
+        port: int,
+        generate: Generator,
+        concurrency: int,
+        duration: float,
+        warmup: float = 0.0,
+        seed: Optional[int] = None,
+) -> Tuple[EndpointStats, float]:
+    """
+    Keep `concurrency` requests in flight, each worker sending its next request as soon as the
+    previous one completes. Requests finishing during the warmup are not recorded.
+    Returns the stats and the measured duration.
+    """
+    stats = EndpointStats()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker(index: int):
+        rng = random.Random(None if seed is None else seed + index)
+        connection = HTTPConnection(host, port)
+        try:
+            while time.perf_counter() < stop_at:
+                request = generate(rng)
+                outcome, latency = await send(connection, request)
+                if time.perf_counter() >= measure_from:
+                    stats.record(request.endpoint, latency, outcome)
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return stats, time.perf_counter() - measure_from
@@ -0,0 +1,129 @@
+"""
+Benchmark the table listing behind GET /api/schema/tables with a few hundred tables.
+
+Creates --tables tables of 2 to 20 columns, every other one with a primary key, then times
+--iterations listings two ways: the per-table information_schema lookups the listing used to make
+(one query for the names, then a column count and a primary key check per table) and
+SchemaService.get_all_tables, which makes one grouped pg_catalog query.
+
+    python -m bench.schema_listing --tables 300 --iterations 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from bench.environment import add_postgres_arguments, app_environment, postgres_from_args, prepare_database
+
+# The listing before it was collapsed into one query, scoped to the same schema as the new one.
+OLD_TABLES_SQL = """
+SELECT table_name FROM information_schema.tables
+WHERE table_schema = current_schema()
+ORDER BY table_name
+"""
+OLD_COLUMN_COUNT_SQL = """
+SELECT COUNT(*) FROM information_schema.columns
+WHERE table_name = :table_name
+"""
+OLD_HAS_PRIMARY_KEY_SQL = """
+SELECT EXISTS (
+    SELECT 1 FROM information_schema.table_constraints
+    WHERE table_name = :table_name AND constraint_type = 'PRIMARY KEY'
+)
+"""
+
+
+def create_tables(postgres, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    statements = []
+    for n in range(count):
+        columns = [f"c{i} INTEGER" for i in range(rng.randint(2, 20))]
+        if n % 2 == 0:
+            columns[0] += " PRIMARY KEY"
+        statements.append(f"CREATE TABLE listing_{n:04d} ({', '.join(columns)});")
+    postgres.psql("SET search_path TO credit_db;\n" + "\n".join(statements) + "\nANALYZE;")
+
+
+async def old_listing(db):
+    from sqlalchemy import text
+
+    tables = []
+    for table_name in (await db.execute(text(OLD_TABLES_SQL))).scalars().all():
+        params = {"table_name": table_name}
+        tables.append({
+            "table_name": table_name,
+            "column_count": (await db.execute(text(OLD_COLUMN_COUNT_SQL), params)).scalar(),
+            "has_primary_key": (await db.execute(text(OLD_HAS_PRIMARY_KEY_SQL), params)).scalar(),
+        })
+    return tables
+
+
+async def new_listing(db):
+    from app.services.schema_service import SchemaService
+
+    return (await SchemaService(db).get_all_tables())["tables"]
+
+
+async def compare(iterations: int) -> dict:
+    from app.core.database import AsyncSessionLocal, engine
+
+    results = {}
+    listings = {}
+    try:
+        async with AsyncSessionLocal() as db:
+            for name, listing in (("per_table_queries", old_listing), ("grouped_query", new_listing)):
+                await listing(db)
+                timings = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    listings[name] = await listing(db)
+                    timings.append(time.perf_counter() - started)
+                results[name] = {
+                    "tables": len(listings[name]),
+                    "mean_ms": round(statistics.mean(timings) * 1000, 1),
+                    "p50_ms": round(statistics.median(timings) * 1000, 1),
+                    "max_ms": round(max(timings) * 1000, 1),
+                }
+                print(f"{name}: {results[name]}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+
+    old, new = (sorted(listings[name], key=lambda table: table["table_name"])
+                for name in ("per_table_queries", "grouped_query"))
+    if old != new:
+        raise RuntimeError("The two listings differ")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--tables", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    postgres = postgres_from_args(args)
+    try:
+        postgres.start()
+        prepare_database(postgres, 10, 0)
+        create_tables(postgres, args.tables)
+        os.environ.update(app_environment(postgres))
+        results = asyncio.run(compare(args.iterations))
+    finally:
+        postgres.stop()
+
+    results = {"tables": args.tables, "iterations": args.iterations, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark a multi-column schema rollout as one plan and as separate calls.
+
+For each of --iterations rounds, creates two tables of --rows rows and adds --operations columns
+to them: through SchemaService.apply_plan in one transaction, and through one
+SchemaService.add_column call per column, each with its own session and commit like separate
+POST /api/schema/update requests. Reports wall time and the number of queries sent for each.
+
+    python -m bench.schema_plan --operations 30 --iterations 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from bench.environment import add_postgres_arguments, app_environment, postgres_from_args, prepare_database
+
+COLUMN_TYPES = ("INTEGER", "TEXT", "BOOLEAN", "TIMESTAMP")
+
+
+def columns(operations: int):
+    from app.schemas.schemas import ColumnDefinition
+
+    return [ColumnDefinition(name=f"c{n}", type=COLUMN_TYPES[n % len(COLUMN_TYPES)]) for n in range(operations)]
+
+
+async def as_plan(table_name: str, operations: int):
+    from app.core.database import AsyncSessionLocal
+    from app.schemas.schemas import OperationType, SchemaUpdateRequest
+    from app.services.schema_service import SchemaService
+
+    plan = [
+        SchemaUpdateRequest(operation=OperationType.ADD_COLUMN, table_name=table_name, column_definition=column)
+        for column in columns(operations)
+    ]
+    async with AsyncSessionLocal() as db:
+        await SchemaService(db).apply_plan(plan)
+
+
+async def as_separate_calls(table_name: str, operations: int):
+    from app.core.database import AsyncSessionLocal
+    from app.services.schema_service import SchemaService
+
+    for column in columns(operations):
+        async with AsyncSessionLocal() as db:
+            await SchemaService(db).add_column(table_name, column)
+
+
+async def compare(postgres, operations: int, iterations: int, rows: int) -> dict:
+    from app.core.database import engine
+    from app.core.request_metrics import RequestStats, current_request
+
+    approaches = (("plan", as_plan), ("separate_calls", as_separate_calls))
+    timings = {name: [] for name, _ in approaches}
+    queries = {}
+    try:
+        # Round 0 warms up the connection pool and the catalog cache and is not recorded.
+        for iteration in range(iterations + 1):
+            for name, apply in approaches:
+                table_name = f"plan_{name}_{iteration}"
+                postgres.psql(
+                    f"SET search_path TO credit_db;"
+                    f"CREATE TABLE {table_name} AS SELECT g AS id FROM generate_series(1, {int(rows)}) AS g;"
+                    f"ALTER TABLE {table_name} ADD PRIMARY KEY (id);"
+                )
+                stats = RequestStats()
+                token = current_request.set(stats)
+                started = time.perf_counter()
+                try:
+                    await apply(table_name, operations)
+                finally:
+                    current_request.reset(token)
+                if iteration:
+                    timings[name].append(time.perf_counter() - started)
+                    queries[name] = stats.queries
+    finally:
+        await engine.dispose()
+
+    results = {}
+    for name, values in timings.items():
+        results[name] = {
+            "mean_ms": round(statistics.mean(values) * 1000, 1),
+            "p50_ms": round(statistics.median(values) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+            "queries": queries[name],
+        }
+        print(f"{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--operations", type=int, default=30, help="Columns added per rollout")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in each table the columns are added to")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    postgres = postgres_from_args(args)
+    try:
+        postgres.start()
+        prepare_database(postgres, 10, 0)
+        os.environ.update(app_environment(postgres))
+        results = asyncio.run(compare(postgres, args.operations, args.iterations, args.rows))
+    finally:
+        postgres.stop()
+
+    results = {"operations": args.operations, "iterations": args.iterations, "rows": args.rows, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
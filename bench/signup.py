@@ -0,0 +1,139 @@
+"""
+Benchmark user signup in one statement against the flow it replaced.
+
+Runs --signups signups with --concurrency in flight, each in its own session, two ways: the old
+flow (SELECT pre-check, insert the user, commit, refresh, insert the credit row, commit) and
+UserService.create_user, which inserts both rows in one statement and commits once. Every tenth
+signup reuses an email, so both flows also take their duplicate path; the old flow answers some
+of those with a 500 when both signups pass its pre-check. Reports latency percentiles, status
+counts and queries sent per signup.
+
+    python -m bench.signup --signups 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+from bench.environment import add_postgres_arguments, app_environment, postgres_from_args, prepare_database
+from bench.stats import EndpointStats
+
+
+async def old_create_user(db, user_data):
+    """
+    create_user as it was before the single-statement insert, including its racy pre-check.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.exc import SQLAlchemyError
+    from app.models import Credit, User
+    from app.utils import EmailIdAlreadyExist
+
+    try:
+        if (await db.execute(select(User).where(User.email == user_data.email))).scalar_one_or_none():
+            raise EmailIdAlreadyExist(user_data.email)
+        user = User(**user_data.model_dump())
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        db.add(Credit(user_id=user.user_id, credits=0, held=0))
+        await db.commit()
+        return user
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise RuntimeError(f"Failed to create user: {str(e)}")
+
+
+async def new_create_user(db, user_data):
+    from app.services.user_service import UserService
+
+    return await UserService(db).create_user(user_data)
+
+
+async def run(name: str, create, signups: int, concurrency: int, stats: EndpointStats) -> int:
+    from app.core.database import AsyncSessionLocal
+    from app.core.request_metrics import RequestStats, current_request
+    from app.schemas.user import UserCreate
+    from app.utils import EmailIdAlreadyExist
+
+    prefix = uuid.uuid4().hex[:8]
+    queue = asyncio.Queue()
+    for n in range(signups):
+        # Every tenth signup repeats the previous email.
+        queue.put_nowait(UserCreate(email=f"{prefix}-{n - (n % 10 == 9)}@example.com", name=f"Signup {n}"))
+    queries = RequestStats()
+    token = current_request.set(queries)
+
+    async def worker():
+        while not queue.empty():
+            user_data = queue.get_nowait()
+            started = time.perf_counter()
+            status = "201"
+            async with AsyncSessionLocal() as db:
+                try:
+                    await create(db, user_data)
+                except EmailIdAlreadyExist:
+                    status = "409"
+                except RuntimeError:
+                    # The old flow's duplicate that got past the pre-check and hit the unique index.
+                    status = "500"
+            stats.record(name, time.perf_counter() - started, status)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        current_request.reset(token)
+    return queries.queries
+
+
+async def compare(signups: int, concurrency: int) -> dict:
+    from app.core.database import engine
+
+    results = {}
+    try:
+        for name, create in (("old_flow", old_create_user), ("single_statement", new_create_user)):
+            await run(name, create, min(signups, 100), concurrency, EndpointStats())
+            stats = EndpointStats()
+            started = time.perf_counter()
+            queries = await run(name, create, signups, concurrency, stats)
+            summary = stats.summary(time.perf_counter() - started)[name]
+            results[name] = {
+                **{k: summary[k] for k in ("requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "statuses")},
+                "queries_per_signup": round(queries / signups, 2),
+            }
+            print(f"{name}: {results[name]}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--signups", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=100_000, help="Users seeded before the run")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    postgres = postgres_from_args(args)
+    try:
+        postgres.start()
+        prepare_database(postgres, args.users, 0)
+        os.environ.update(app_environment(postgres))
+        results = asyncio.run(compare(args.signups, args.concurrency))
+    finally:
+        postgres.stop()
+
+    results = {"signups": args.signups, "concurrency": args.concurrency, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import math
+from collections import defaultdict
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class EndpointStats:
+    """
+    Latencies and outcomes recorded per endpoint label, e.g. "POST /api/credits/{user_id}/deduct".
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, seconds: float, status: str):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def record_unsent(self, endpoint: str, status: str):
+        """
+        Count a request that was never sent, e.g. dropped by an open-loop generator at its
+        in-flight limit. It has no latency.
+        """
+        self.statuses[endpoint][status] += 1
+
+    @staticmethod
+    def is_error(status: str) -> bool:
+        return not status.isdigit() or int(status) >= 400
+
+    def summary(self, duration: float) -> Dict[str, dict]:
+        endpoints = {}
+        for endpoint in sorted(self.statuses):
+            values = sorted(self.latencies.get(endpoint, ()))
+            statuses = dict(self.statuses[endpoint])
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / duration, 2) if duration else 0.0,
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+                "errors": sum(n for s, n in statuses.items() if self.is_error(s)),
+                "statuses": statuses,
+            }
+        return endpoints
+
+    def totals(self, duration: float) -> dict:
+        requests = sum(len(v) for v in self.latencies.values())
+        errors = sum(n for per in self.statuses.values() for s, n in per.items() if self.is_error(s))
+        everything = sorted(v for values in self.latencies.values() for v in values)
+        return {
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": round(requests / duration, 2) if duration else 0.0,
+            "p50_ms": round(percentile(everything, 50) * 1000, 3),
+            "p95_ms": round(percentile(everything, 95) * 1000, 3),
+            "p99_ms": round(percentile(everything, 99) * 1000, 3),
+        }
@@ -0,0 +1,153 @@
+"""
+Benchmark the memory used by the NDJSON user export, GET /api/users/?stream=true.
+
+Seeds --users users (1M by default), starts the app under uvicorn and streams the export twice:
+the last tenth of the users (through after_id) and all of them. The server's resident memory is
+sampled while each export runs; with a server-side cursor the peak should not grow with the
+number of rows. For comparison, the same rows are then loaded in this process with one
+select(User), the way the removed UserService.get_all_users did, and its peak memory reported.
+
+    python -m bench.user_export --users 1000000
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+from bench.environment import AppServer, add_postgres_arguments, app_environment, postgres_from_args, \
+    prepare_database
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not found")
+
+
+class PeakRSS:
+    """
+    Samples a process's resident memory every `interval` seconds in a background thread.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, rss_mb(self.pid))
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_mb(self.pid)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb(self.pid))
+
+
+def stream_export(server: AppServer, after_id: int) -> dict:
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=600)
+    baseline = rss_mb(server.process.pid)
+    started = time.perf_counter()
+    with PeakRSS(server.process.pid) as memory:
+        connection.request("GET", f"/api/users/?stream=true&after_id={after_id}")
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"Export returned {response.status}")
+        rows = size = 0
+        while chunk := response.read(1 << 16):
+            rows += chunk.count(b"\n")
+            size += len(chunk)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return {
+        "rows": rows,
+        "mb_sent": round(size / 1e6, 1),
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "server_rss_mb_before": round(baseline, 1),
+        "server_rss_mb_peak": round(memory.peak, 1),
+        "server_rss_mb_growth": round(memory.peak - baseline, 1),
+    }
+
+
+async def load_all() -> dict:
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal, engine
+    from app.models import User
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            users = (await db.execute(select(User))).scalars().all()
+            rows = len(users)
+            del users
+    finally:
+        await engine.dispose()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rss_mb_before": round(before, 1),
+        "rss_mb_peak": round(peak, 1),
+        "rss_mb_growth": round(peak - before, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_postgres_arguments(parser)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    postgres = postgres_from_args(args)
+    server = None
+    results = {}
+    try:
+        postgres.start()
+        low, high = prepare_database(postgres, args.users, 0)
+        server = AppServer(postgres)
+        server.start()
+        # One small export first, so the baseline includes the pool and the route's imports.
+        stream_export(server, high - 1000)
+        for name, after_id in (("stream_tenth", high - (high - low + 1) // 10), ("stream_all", low - 1)):
+            results[name] = stream_export(server, after_id)
+            print(f"{name}: {results[name]}", file=sys.stderr)
+        server.stop()
+        server = None
+
+        os.environ.update(app_environment(postgres))
+        results["load_all_in_process"] = asyncio.run(load_all())
+        print(f"load_all_in_process: {results['load_all_in_process']}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.stop()
+        postgres.stop()
+
+    results = {"users": args.users, **results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import itertools
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Request(NamedTuple):
+    endpoint: str  # label results are grouped under, e.g. "GET /api/credits/{user_id}"
+    method: str
+    path: str
+    body: Optional[dict] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class WorkloadContext:
+    min_user_id: int
+    max_user_id: int
+    hot_users: int = 10
+
+    def random_user(self, rng: random.Random) -> int:
+        return rng.randint(self.min_user_id, self.max_user_id)
+
+    def hot_user(self, rng: random.Random) -> int:
+        return self.min_user_id + rng.randrange(min(self.hot_users, self.max_user_id - self.min_user_id + 1))
+
+
+Generator = Callable[[random.Random], Request]
+
+_signups = itertools.count()
+_keys = itertools.count()
+_run_id = uuid.uuid4().hex[:8]
+REPLAY_KEYS = 100
+
+
+def balance_read(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("GET /api/credits/{user_id}", "GET", f"/api/credits/{ctx.random_user(rng)}")
+
+
+def history_read(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("GET /api/credits/{user_id}/history", "GET", f"/api/credits/{ctx.random_user(rng)}/history?limit=20")
+
+
+def add_credits(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("POST /api/credits/{user_id}/add", "POST", f"/api/credits/{ctx.random_user(rng)}/add", {"amount": 1})
+
+
+def deduct(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("POST /api/credits/{user_id}/deduct", "POST", f"/api/credits/{ctx.random_user(rng)}/deduct",
+                   {"amount": 1})
+
+
+def hot_deduct(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("POST /api/credits/{user_id}/deduct", "POST", f"/api/credits/{ctx.hot_user(rng)}/deduct",
+                   {"amount": 1})
+
+
+def keyed_deduct(ctx: WorkloadContext, rng: random.Random) -> Request:
+    # A fresh key per request: the deduct runs, plus reserving the key and storing its response.
+    return Request("POST /api/credits/{user_id}/deduct (new key)", "POST", f"/api/credits/{ctx.random_user(rng)}/deduct",
+                   {"amount": 1}, {"Idempotency-Key": f"bench-{_run_id}-{next(_keys)}"})
+
+
+def keyed_replay(ctx: WorkloadContext, rng: random.Random) -> Request:
+    # A fixed pool of keys, each always sent for the same user, so after its first use every
+    # request is a replay of the stored response.
+    n = rng.randrange(REPLAY_KEYS)
+    user_id = ctx.min_user_id + n % (ctx.max_user_id - ctx.min_user_id + 1)
+    return Request("POST /api/credits/{user_id}/deduct (replay)", "POST", f"/api/credits/{user_id}/deduct",
+                   {"amount": 1}, {"Idempotency-Key": f"bench-{_run_id}-replay-{n}"})
+
+
+def signup(ctx: WorkloadContext, rng: random.Random) -> Request:
+    n = next(_signups)
+    return Request("POST /api/users/", "POST", "/api/users/",
+                   {"email": f"signup-{_run_id}-{n}@example.com", "name": f"Signup {n}"})
+
+
+def schema_tables(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("GET /api/schema/tables", "GET", "/api/schema/tables")
+
+
+def schema_table(ctx: WorkloadContext, rng: random.Random) -> Request:
+    return Request("GET /api/schema/table/{table_name}", "GET", "/api/schema/table/credits")
+
+
+def batch_adds(size: int) -> Callable[[WorkloadContext, random.Random], Request]:
+    def make(ctx: WorkloadContext, rng: random.Random) -> Request:
+        items = [{"user_id": ctx.random_user(rng), "op": "add", "amount": 1} for _ in range(size)]
+        return Request(f"POST /api/credits/batch (batch of {size})", "POST", "/api/credits/batch",
+                       {"items": items, "atomic": False})
+    return make
+
+
+def weighted(ctx: WorkloadContext, choices: List[Tuple[float, Callable]]) -> Generator:
+    makers = [maker for _, maker in choices]
+    cumulative = list(itertools.accumulate(weight for weight, _ in choices))
+
+    def generate(rng: random.Random) -> Request:
+        return rng.choices(makers, cum_weights=cumulative)[0](ctx, rng)
+    return generate
+
+
+WORKLOADS: Dict[str, Tuple[str, Callable[[WorkloadContext], Generator]]] = {
+    "read_heavy": ("95% balance reads, 3% history, 2% adds", lambda ctx: weighted(ctx, [
+        (95, balance_read), (3, history_read), (2, add_credits)])),
+    "deduct_storm": ("1-credit deducts spread over the first --hot-users users", lambda ctx: weighted(ctx, [
+        (1, hot_deduct)])),
+    "signups": ("User creation with unique emails", lambda ctx: weighted(ctx, [(1, signup)])),
+    "schema_listing": ("Table list and table detail", lambda ctx: weighted(ctx, [
+        (1, schema_tables), (1, schema_table)])),
+    # Run separately, so replays are not queued behind mutations in the same server.
+    "keyed_deducts": ("Deducts with a new Idempotency-Key each", lambda ctx: weighted(ctx, [(1, keyed_deduct)])),
+    "keyed_replays": (f"Deducts replaying one of {REPLAY_KEYS} Idempotency-Keys", lambda ctx: weighted(ctx, [
+        (1, keyed_replay)])),
+    # Items per second is requests per second times the batch size.
+    **{f"batch_{size}": (f"Batches of {size} 1-credit adds to random users",
+                         lambda ctx, size=size: weighted(ctx, [(1, batch_adds(size))])) for size in (1, 10, 100)},
+    "mixed": ("Reads, adds, deducts, signups and schema listings", lambda ctx: weighted(ctx, [
+        (70, balance_read), (5, history_read), (5, add_credits), (12, deduct), (5, signup), (3, schema_tables)])),
+}
+
+
+def load_replay(path: str) -> List[Request]:
+    """
+    Read a JSONL workload: one object per line with "method" and "path", and optionally "body",
+    "headers" and "endpoint" (the label to report under, defaulting to "METHOD path").
+    Lines without a method and path are skipped.
+    """
+    requests = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if not isinstance(entry, dict) or "method" not in entry or "path" not in entry:
+                continue
+            method = entry["method"].upper()
+            requests.append(Request(
+                entry.get("endpoint") or f"{method} {entry['path']}",
+                method,
+                entry["path"],
+                entry.get("body"),
+                entry.get("headers"),
+            ))
+    if not requests:
+        raise ValueError(f"{path} has no replayable lines (objects with \"method\" and \"path\")")
+    return requests
+
+
+def replay(ctx: WorkloadContext, requests: List[Request]) -> Generator:
+    """
+    Cycle through recorded requests in order. A "{user_id}" placeholder in a path is filled
+    with a random seeded user, so recordings can be replayed against any dataset.
+    """
+    position = itertools.count()
+
+    def generate(rng: random.Random) -> Request:
+        request = requests[next(position) % len(requests)]
+        if "{user_id}" in request.path:
+            request = request._replace(path=request.path.replace("{user_id}", str(ctx.random_user(rng))))
+        return request
+    return generate
@@ -14,13 +14,80 @@ CREATE TABLE credits (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
     credits INTEGER DEFAULT 0,
+    held INTEGER NOT NULL DEFAULT 0,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
+CREATE TABLE credit_transactions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id),
+    op VARCHAR(20) NOT NULL,
+    amount INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE credit_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id),
+    balance INTEGER NOT NULL,
+    taken_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE credit_holds (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id),
+    amount INTEGER NOT NULL,
+    captured INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'active',
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    settled_at TIMESTAMP
+);
+
+CREATE TABLE job_checkpoints (
+    job_name VARCHAR(100) PRIMARY KEY,
+    run_key VARCHAR(100) NOT NULL,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE schema_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,
+    tables JSON NOT NULL,
+    payload JSON NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress JSON,
+    result JSON,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE TABLE idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    scope VARCHAR(255) NOT NULL,
+    response JSON,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_credits_user_id ON credits(user_id);
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX ix_credit_transactions_user_id_id ON credit_transactions(user_id, id);
+CREATE INDEX ix_credit_transactions_created_at ON credit_transactions(created_at);
+CREATE INDEX ix_credit_snapshots_user_id_taken_at ON credit_snapshots(user_id, taken_at);
+CREATE INDEX ix_credit_snapshots_taken_at ON credit_snapshots(taken_at);
+CREATE INDEX ix_credit_holds_active_expires_at ON credit_holds(expires_at) WHERE status = 'active';
+CREATE INDEX ix_schema_jobs_status ON schema_jobs(status);
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
 
 -- Insert some sample data
 INSERT INTO users (email, name) VALUES
@@ -0,0 +1,86 @@
+"""
+The tests run against a real Postgres, set up the same way as the benchmark harness:
+schema.sql is loaded and the database's search_path points at credit_db.
+
+Set TEST_DATABASE_URL to a postgresql:// URL of a scratch database (its contents are replaced),
+or put the Postgres server binaries on PATH to get a throwaway cluster. Without either, the
+tests that need a database are skipped.
+"""
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from bench.environment import ExternalPostgres, LocalPostgres, prepare_database
+
+if os.environ.get("TEST_DATABASE_URL"):
+    postgres = ExternalPostgres(os.environ["TEST_DATABASE_URL"])
+elif shutil.which("initdb"):
+    postgres = LocalPostgres()
+else:
+    postgres = None
+
+# Settings are read when app modules are first imported, so they are fixed here, before any test module loads.
+os.environ.update({
+    "APP_NAME": "credits-test",
+    "APP_VERSION": "test",
+    "DEBUG": "false",
+    "DATABASE_URL": postgres.url() if postgres else "postgresql+asyncpg://localhost/unavailable",
+    "DATABASE_URL_SYNC": postgres.url("postgresql") if postgres else "postgresql://localhost/unavailable",
+    "BALANCE_CACHE_BACKEND": "local",
+})
+
+SEED_USERS = 100
+SEED_CREDITS = 1000
+
+
+@pytest.fixture(scope="session")
+def database():
+    if postgres is None:
+        pytest.skip("needs TEST_DATABASE_URL or the Postgres server binaries on PATH")
+    postgres.start()
+    try:
+        prepare_database(postgres, SEED_USERS, SEED_CREDITS)
+        yield postgres
+    finally:
+        postgres.stop()
+
+
+@pytest.fixture
+def run_async(database):
+    """
+    Run a coroutine on a fresh event loop. The engine's pooled connections belong to the loop
+    that opened them, so they are closed before it ends.
+    """
+    from app.core.database import engine
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def make_user(database):
+    """
+    Create a user with a credit row holding `credits` and return its user_id.
+    """
+    counter = iter(range(1_000_000))
+
+    def make(credits: int = 0) -> int:
+        return int(database.psql(f"""
+            WITH u AS (
+                INSERT INTO users (email, name)
+                VALUES ('test-' || gen_random_uuid() || '@example.com', 'Test User {next(counter)}')
+                RETURNING user_id
+            )
+            INSERT INTO credits (user_id, credits, last_updated)
+            SELECT user_id, {int(credits)}, now() FROM u
+            RETURNING user_id
+        """))
+    return make
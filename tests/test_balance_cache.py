@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+from app.config import get_settings
+from app.core.balance_cache import LocalBalanceCache, balance_cache
+from app.core.database import AsyncSessionLocal
+from app.schemas.credit import CreditBatchItem
+from app.services.background_service import BackgroundService
+from app.services.credit_service import CreditService
+from app.services.deduct_coalescer import DeductCoalescer
+
+
+async def _read(user_id: int):
+    async with AsyncSessionLocal() as db:
+        return await CreditService(db).get_credit_balance(user_id)
+
+
+async def _add(user_id: int):
+    async with AsyncSessionLocal() as db:
+        await CreditService(db).add_credits(user_id, 5)
+
+
+async def _deduct(user_id: int):
+    async with AsyncSessionLocal() as db:
+        await CreditService(db).deduct_credits(user_id, 5)
+
+
+async def _reset(user_id: int):
+    async with AsyncSessionLocal() as db:
+        await CreditService(db).reset_credits(user_id)
+
+
+async def _batch(user_id: int):
+    async with AsyncSessionLocal() as db:
+        await CreditService(db).apply_batch([CreditBatchItem(user_id=user_id, op="add", amount=5)], atomic=True)
+
+
+async def _coalesced_deduct(user_id: int):
+    await DeductCoalescer(window_ms=1, max_batch=10).deduct(user_id, 5)
+
+
+async def _daily_grant(user_id: int):
+    await BackgroundService.add_daily_credits(f"cache-test-{uuid.uuid4().hex[:8]}")
+
+
+def test_the_tests_use_the_local_cache():
+    assert isinstance(balance_cache, LocalBalanceCache)
+
+
+def test_reads_fill_the_cache_and_count_hits_and_misses(run_async, make_user):
+    user_id = make_user(100)
+    hits, misses = balance_cache.hits, balance_cache.misses
+
+    first = run_async(_read(user_id))
+    second = run_async(_read(user_id))
+
+    assert first == second
+    assert (balance_cache.hits - hits, balance_cache.misses - misses) == (1, 1)
+    assert balance_cache.stats()["hit_rate"] == balance_cache.hits / (balance_cache.hits + balance_cache.misses)
+
+
+@pytest.mark.parametrize("write, expected", [
+    (_add, 105),
+    (_deduct, 95),
+    (_reset, 0),
+    (_batch, 105),
+    (_coalesced_deduct, 95),
+    (_daily_grant, 100 + get_settings().daily_credit_amount),
+])
+def test_writes_invalidate_the_cached_balance(run_async, make_user, database, write, expected):
+    user_id = make_user(100)
+    assert run_async(_read(user_id)).credits == 100
+
+    run_async(write(user_id))
+
+    misses = balance_cache.misses
+    credits = run_async(_read(user_id)).credits
+    assert balance_cache.misses == misses + 1
+    assert credits == expected == int(database.psql(f"SELECT credits FROM credits WHERE user_id = {user_id}"))
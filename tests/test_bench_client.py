@@ -0,0 +1,83 @@
+import asyncio
+
+from bench.http_client import HTTPConnection
+from bench.loadgen import run_open_loop
+from bench.runner import send
+from bench.workloads import Request
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    A keep-alive server whose responses depend on the path: /slow answers after a second,
+    /truncated closes halfway through its body, /garbage sends no valid status line and
+    anything else answers at once.
+    """
+    try:
+        while True:
+            request_line = await reader.readuntil(b"\r\n")
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            path = request_line.split(b" ")[1].decode()
+            if path == "/slow":
+                await asyncio.sleep(1)
+            if path == "/garbage":
+                writer.write(b"garbage\r\n\r\n")
+                await writer.drain()
+                break
+            if path == "/truncated":
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\npartial")
+                await writer.drain()
+                break
+            body = path.encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _run_against_server(scenario):
+    async def main():
+        server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(main())
+
+
+def _get(path: str) -> Request:
+    return Request(f"GET {path}", "GET", path)
+
+
+def test_send_records_timeouts_and_truncated_responses_and_keeps_going():
+    async def scenario(port):
+        connection = HTTPConnection("127.0.0.1", port, timeout=0.2)
+        outcomes = []
+        for path in ("/slow", "/after-timeout", "/truncated", "/after-truncated"):
+            outcome, _ = await send(connection, _get(path))
+            outcomes.append(outcome)
+        # Neither failure leaves a half-read response behind for the next request.
+        await asyncio.sleep(1)
+        outcomes.append((await connection.request("GET", "/last"))[1])
+        await connection.close()
+        return outcomes
+
+    assert _run_against_server(scenario) == ["timeout", "200", "IncompleteReadError", "200", b"/last"]
+
+
+def test_open_loop_records_unexpected_errors_as_outcomes():
+    def generate(rng):
+        return _get("/garbage" if rng.random() < 0.5 else "/ok")
+
+    async def scenario(port):
+        return await run_open_loop("127.0.0.1", port, generate, rate=200, duration=0.5, warmup=0,
+                                   max_inflight=50, arrivals="fixed", seed=1)
+
+    stats, _ = _run_against_server(scenario)
+
+    assert dict(stats.statuses["GET /ok"]) == {"200": len(stats.latencies["GET /ok"])}
+    assert set(stats.statuses["GET /garbage"]) == {"IndexError"}
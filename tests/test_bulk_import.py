@@ -0,0 +1,42 @@
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.services.user_service import UserService
+from app.utils.bulk_parser import iter_records
+
+
+async def _chunks(body: bytes, size: int = 7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def _import(body: bytes, fmt: str):
+    async with AsyncSessionLocal() as db:
+        return await UserService(db).bulk_create(iter_records(_chunks(body), fmt))
+
+
+def test_bad_rows_are_reported_per_row(run_async):
+    email = f"bulk-{uuid.uuid4().hex[:8]}@example.com"
+    body = b"\n".join([
+        f'{{"email": "{email}", "name": "Valid"}}'.encode(),
+        b'{"email": "caf\xe9@example.com", "name": "Latin-1"}',
+        b'{"email": 42, "name": "Number"}',
+        b'{"email": ["a@example.com"], "name": "List"}',
+    ])
+
+    result = run_async(_import(body, "ndjson"))
+
+    assert (result.created, result.failed) == (1, 3)
+    assert [(error.line, error.email) for error in result.errors] == [(2, None), (3, None), (4, None)]
+    assert result.errors[0].error.startswith("Invalid UTF-8")
+    assert all(error.error.startswith("email:") for error in result.errors[1:])
+
+
+def test_invalid_utf8_in_csv_does_not_stop_the_import(run_async):
+    emails = [f"bulk-{uuid.uuid4().hex[:8]}@example.com" for _ in range(2)]
+    body = f"email,name\n{emails[0]},First\n".encode() + b"bad\xff@example.com,Bad\n" + f"{emails[1]},Second\n".encode()
+
+    result = run_async(_import(body, "csv"))
+
+    assert (result.created, result.failed) == (2, 1)
+    assert result.errors[0].line == 3
@@ -0,0 +1,84 @@
+from app.core.database import AsyncSessionLocal
+from app.schemas.credit import CreditBatchItem
+from app.services.credit_service import CreditService
+
+UNKNOWN_USER = 2_000_000_000
+
+
+def _items(*items):
+    return [CreditBatchItem(user_id=user_id, op=op, amount=amount) for user_id, op, amount in items]
+
+
+async def _apply(items, atomic: bool):
+    async with AsyncSessionLocal() as db:
+        return await CreditService(db).apply_batch(items, atomic)
+
+
+def _state(database, user_id: int):
+    """
+    The user's balance and their ledger entries, oldest first.
+    """
+    return database.psql(f"""
+        SELECT credits || ':' || COALESCE((SELECT string_agg(op || ' ' || amount, ',' ORDER BY id)
+                                           FROM credit_transactions WHERE user_id = {user_id}), '')
+        FROM credits WHERE user_id = {user_id}
+    """)
+
+
+def test_atomic_batch_rolls_back_when_any_item_fails(run_async, make_user, database):
+    first, second = make_user(10), make_user(10)
+
+    applied, results = run_async(_apply(_items((first, "add", 5), (second, "deduct", 11)), atomic=True))
+
+    assert applied is False
+    assert [r.success for r in results] == [True, False]
+    assert results[1].error.startswith("Insufficient credits")
+    assert (_state(database, first), _state(database, second)) == ("10:", "10:")
+
+
+def test_non_atomic_batch_reports_each_item(run_async, make_user, database):
+    first, second = make_user(10), make_user(10)
+
+    applied, results = run_async(_apply(_items(
+        (first, "add", 5), (UNKNOWN_USER, "add", 1), (second, "deduct", 11), (second, "deduct", 4),
+    ), atomic=False))
+
+    assert applied is True
+    assert [(r.success, r.credits) for r in results] == [(True, 15), (False, None), (False, None), (True, 6)]
+    assert "not found" in results[1].error
+    assert (_state(database, first), _state(database, second)) == ("15:add 5", "6:deduct -4")
+
+
+def test_non_atomic_batch_with_no_applied_items_is_not_a_success(run_async, make_user, database):
+    user_id = make_user(10)
+
+    applied, results = run_async(_apply(_items((UNKNOWN_USER, "add", 1), (user_id, "deduct", 11)), atomic=False))
+
+    assert applied is False
+    assert not any(r.success for r in results)
+    assert _state(database, user_id) == "10:"
+
+
+def test_items_for_one_user_apply_in_order(run_async, make_user, database):
+    user_id = make_user(10)
+
+    applied, results = run_async(_apply(_items(
+        (user_id, "deduct", 8), (user_id, "deduct", 5), (user_id, "add", 5), (user_id, "deduct", 5),
+    ), atomic=False))
+
+    # The second deduct only sees 2 credits; the last one runs after the add.
+    assert [(r.success, r.credits) for r in results] == [(True, 2), (False, None), (True, 7), (True, 2)]
+    assert _state(database, user_id) == "2:deduct -8,add 5,deduct -5"
+
+
+def test_reset_inside_a_batch_keeps_held_credits(run_async, make_user, database):
+    user_id = make_user(100)
+    database.psql(f"UPDATE credits SET held = 30 WHERE user_id = {user_id}")
+
+    applied, results = run_async(_apply(_items(
+        (user_id, "add", 5), (user_id, "reset", 0), (user_id, "add", 3),
+    ), atomic=True))
+
+    assert applied is True
+    assert [r.credits for r in results] == [105, 30, 33]
+    assert _state(database, user_id) == "33:add 5,reset -75,add 3"
@@ -0,0 +1,54 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal
+from app.services.credit_service import CreditService
+from app.utils import InsufficientCredits
+
+
+async def _deduct(user_id: int, amount: int):
+    async with AsyncSessionLocal() as db:
+        try:
+            credit = await CreditService(db).deduct_credits(user_id, amount)
+        except InsufficientCredits as e:
+            return e
+        return credit
+
+
+async def _balance(user_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("""
+            SELECT c.credits,
+                   (SELECT COALESCE(SUM(amount), 0) FROM credit_transactions t
+                    WHERE t.user_id = c.user_id AND t.op = 'deduct') AS deducted
+            FROM credits c
+            WHERE c.user_id = :user_id
+            """),
+            {"user_id": user_id}
+        )
+        return result.one()
+
+
+def test_parallel_deducts_never_overdraw(run_async, make_user):
+    initial, amount, requests = 1000, 3, 2000
+    user_id = make_user(initial)
+
+    async def storm():
+        outcomes = await asyncio.gather(*(_deduct(user_id, amount) for _ in range(requests)))
+        return outcomes, await _balance(user_id)
+
+    outcomes, final = run_async(storm())
+
+    accepted = [o for o in outcomes if not isinstance(o, Exception)]
+    rejected = [o for o in outcomes if isinstance(o, Exception)]
+    assert len(accepted) == initial // amount
+    assert all(isinstance(o, InsufficientCredits) for o in rejected)
+    assert len(accepted) + len(rejected) == requests
+    assert all(credit.credits >= 0 for credit in accepted)
+    # Every accepted deduct saw a distinct balance, i.e. none of them were lost or applied twice.
+    assert sorted(credit.credits for credit in accepted) == list(range(initial % amount, initial, amount))
+    assert initial - final.credits == len(accepted) * amount
+    assert final.credits >= 0
+    assert final.deducted == -len(accepted) * amount
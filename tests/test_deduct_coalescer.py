@@ -0,0 +1,67 @@
+import asyncio
+
+from app.services.deduct_coalescer import DeductCoalescer
+
+
+async def _queue_deducts(coalescer: DeductCoalescer, user_id: int, count: int):
+    requests = [asyncio.create_task(coalescer.deduct(user_id, 1)) for _ in range(count)]
+    await asyncio.sleep(0)
+    return requests
+
+
+def test_failed_drain_fails_queued_deducts_and_clears_the_queue(monkeypatch):
+    coalescer = DeductCoalescer(window_ms=1, max_batch=2)
+
+    async def broken_apply(user_id, batch):
+        raise ConnectionError("database went away")
+
+    monkeypatch.setattr(coalescer, "_apply", broken_apply)
+
+    async def scenario():
+        requests = await _queue_deducts(coalescer, 1, 5)
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert coalescer.stats()["pending_users"] == 0
+
+
+def test_cancelled_drain_fails_queued_deducts_and_clears_the_queue():
+    coalescer = DeductCoalescer(window_ms=60_000, max_batch=10)
+
+    async def scenario():
+        requests = await _queue_deducts(coalescer, 1, 3)
+        for task in list(coalescer._tasks):
+            task.cancel()
+        await coalescer.drain()
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert coalescer.stats()["pending_users"] == 0
+
+
+def test_queue_accepts_deducts_again_after_a_failure(monkeypatch):
+    coalescer = DeductCoalescer(window_ms=1, max_batch=10)
+    applied = []
+
+    async def flaky_apply(user_id, batch):
+        if not applied:
+            applied.append(None)
+            raise ConnectionError("database went away")
+        for _, future in batch:
+            future.set_result("ok")
+
+    monkeypatch.setattr(coalescer, "_apply", flaky_apply)
+
+    async def scenario():
+        first = await asyncio.gather(*await _queue_deducts(coalescer, 1, 2), return_exceptions=True)
+        second = await asyncio.gather(*await _queue_deducts(coalescer, 1, 2))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, ConnectionError) for outcome in first)
+    assert second == ["ok", "ok"]
@@ -0,0 +1,135 @@
+import pytest
+
+from app.core.balance_cache import balance_cache
+from app.core.database import AsyncSessionLocal
+from app.services.credit_service import CreditService
+from app.services.hold_service import HoldService
+from app.utils import CaptureExceedsHold, HoldNotActive, InsufficientCredits
+
+
+async def _reserve(user_id: int, amount: int):
+    async with AsyncSessionLocal() as db:
+        return await HoldService(db).reserve(user_id, amount)
+
+
+async def _settle(method: str, hold_id: int, *args):
+    async with AsyncSessionLocal() as db:
+        return await getattr(HoldService(db), method)(hold_id, *args)
+
+
+async def _deduct(user_id: int, amount: int):
+    async with AsyncSessionLocal() as db:
+        return await CreditService(db).deduct_credits(user_id, amount)
+
+
+def _balance(database, user_id: int) -> str:
+    return database.psql(f"SELECT credits || '/' || held FROM credits WHERE user_id = {user_id}")
+
+
+def _expire(database, hold_id: int):
+    database.psql(f"UPDATE credit_holds SET expires_at = created_at - interval '1 second' WHERE id = {hold_id}")
+
+
+def test_reserve_more_than_available_is_rejected(run_async, make_user, database):
+    user_id = make_user(100)
+    run_async(_reserve(user_id, 60))
+
+    with pytest.raises(InsufficientCredits) as raised:
+        run_async(_reserve(user_id, 50))
+
+    assert raised.value.status_code == 400
+    assert "Current: 40" in raised.value.detail
+    assert _balance(database, user_id) == "100/60"
+
+
+def test_deducts_only_spend_credits_not_held(run_async, make_user, database):
+    user_id = make_user(100)
+    run_async(_reserve(user_id, 70))
+
+    with pytest.raises(InsufficientCredits):
+        run_async(_deduct(user_id, 31))
+    credit = run_async(_deduct(user_id, 30))
+
+    assert (credit.credits, credit.held) == (70, 70)
+    assert _balance(database, user_id) == "70/70"
+
+
+def test_partial_capture_releases_the_rest(run_async, make_user, database):
+    user_id = make_user(100)
+    hold = run_async(_reserve(user_id, 50))
+
+    captured = run_async(_settle("capture", hold.id, 20))
+
+    assert (captured.status, captured.captured) == ("captured", 20)
+    assert _balance(database, user_id) == "80/0"
+    assert database.psql(
+        f"SELECT op || ' ' || amount FROM credit_transactions WHERE user_id = {user_id}"
+    ) == "capture -20"
+
+
+def test_capture_more_than_held_is_rejected(run_async, make_user, database):
+    user_id = make_user(100)
+    hold = run_async(_reserve(user_id, 50))
+
+    with pytest.raises(CaptureExceedsHold):
+        run_async(_settle("capture", hold.id, 51))
+
+    assert _balance(database, user_id) == "100/50"
+
+
+@pytest.mark.parametrize("first, second", [
+    (("capture",), ("capture",)),
+    (("capture",), ("release",)),
+    (("release",), ("release",)),
+    (("release",), ("capture", 10)),
+])
+def test_settling_twice_is_a_conflict(run_async, make_user, database, first, second):
+    user_id = make_user(100)
+    hold = run_async(_reserve(user_id, 50))
+    run_async(_settle(first[0], hold.id, *first[1:]))
+    balance = _balance(database, user_id)
+
+    with pytest.raises(HoldNotActive) as raised:
+        run_async(_settle(second[0], hold.id, *second[1:]))
+
+    assert raised.value.status_code == 409
+    assert _balance(database, user_id) == balance
+
+
+def test_capture_after_expiry_is_a_conflict(run_async, make_user, database):
+    user_id = make_user(100)
+    hold = run_async(_reserve(user_id, 50))
+    _expire(database, hold.id)
+
+    with pytest.raises(HoldNotActive) as raised:
+        run_async(_settle("capture", hold.id))
+
+    assert raised.value.status_code == 409
+    assert raised.value.detail.endswith("is expired")
+    assert _balance(database, user_id) == "100/50"
+
+
+def test_expire_holds_releases_held_credits_in_batches(run_async, make_user, database, monkeypatch):
+    # Clear holds other tests left expired, so the batches below only hold this test's.
+    run_async(HoldService.expire_holds())
+    users = [make_user(100) for _ in range(3)]
+    holds = [run_async(_reserve(user_id, 10)) for user_id in (users[0], users[0], users[1], users[1], users[2])]
+    for hold in holds:
+        _expire(database, hold.id)
+    unexpired = run_async(_reserve(users[2], 5))
+    invalidated = []
+
+    async def record(*user_ids):
+        invalidated.append(sorted(user_ids))
+    monkeypatch.setattr(balance_cache, "delete", record)
+
+    run_async(HoldService.expire_holds(batch_size=2))
+
+    # Holds expire oldest first, two per transaction: both of the first user's, both of the
+    # second user's, then the last one, which ends the sweep.
+    assert invalidated == [[users[0]], [users[1]], [users[2]]]
+    assert [_balance(database, user_id) for user_id in users] == ["100/0", "100/0", "100/5"]
+    assert database.psql(
+        f"SELECT string_agg(status, ',' ORDER BY id) FROM credit_holds WHERE user_id IN ({','.join(map(str, users))})"
+    ) == "expired,expired,expired,expired,expired,active"
+    assert unexpired.status == "active"
@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models import Credit, IdempotencyKey
+from app.services.credit_service import CreditService
+from app.services.idempotency_service import IdempotencyService, response_cache
+from app.utils import InsufficientCredits
+
+
+async def _keyed_deduct(key: str, user_id: int, amount: int):
+    async with AsyncSessionLocal() as db:
+        service = CreditService(db)
+
+        async def operation():
+            credit = await service.deduct_credits(user_id, amount, commit=False)
+            return {"credits": credit.credits}
+
+        try:
+            return await IdempotencyService(db).execute(key, f"deduct:{user_id}:{amount}", operation)
+        except InsufficientCredits as e:
+            return e
+
+
+async def _state(key: str, user_id: int):
+    async with AsyncSessionLocal() as db:
+        credits = await db.scalar(select(Credit.credits).where(Credit.user_id == user_id))
+        stored = (await db.execute(
+            select(IdempotencyKey.response).where(IdempotencyKey.key == key)
+        )).one_or_none()
+        return credits, stored
+
+
+def test_parallel_retries_apply_once(run_async, make_user):
+    user_id = make_user(100)
+    key = f"test-{uuid.uuid4()}"
+
+    async def retries():
+        outcomes = await asyncio.gather(*(_keyed_deduct(key, user_id, 10) for _ in range(50)))
+        return outcomes, await _state(key, user_id)
+
+    outcomes, (credits, stored) = run_async(retries())
+    assert credits == 90
+    # Retries that waited on the first request's uncommitted key see its stored response.
+    assert all(outcome == {"credits": 90} for outcome in outcomes)
+    assert stored.response == {"credits": 90}
+
+
+def test_key_commits_with_mutation_and_response(run_async, make_user):
+    user_id = make_user(5)
+    key = f"test-{uuid.uuid4()}"
+
+    async def attempts():
+        failed = await _keyed_deduct(key, user_id, 10)
+        after_failure = await _state(key, user_id)
+        async with AsyncSessionLocal() as db:
+            await CreditService(db).add_credits(user_id, 20)
+        succeeded = await _keyed_deduct(key, user_id, 10)
+        response_cache.delete(key)
+        replayed = await _keyed_deduct(key, user_id, 10)
+        return failed, after_failure, succeeded, replayed, await _state(key, user_id)
+
+    failed, after_failure, succeeded, replayed, (credits, stored) = run_async(attempts())
+    assert isinstance(failed, InsufficientCredits)
+    # A failed mutation leaves no reserved key behind, so the retry is not rejected as in progress.
+    assert after_failure == (5, None)
+    assert succeeded == replayed == {"credits": 15}
+    assert credits == 15
+    assert stored.response == {"credits": 15}
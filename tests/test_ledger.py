@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+
+from app.core.database import AsyncSessionLocal
+from app.services.background_service import BackgroundService, OPENING_BALANCES_JOB
+from app.services.credit_service import CreditService
+
+
+def test_balance_at_includes_balances_from_before_the_ledger(run_async, make_user, database):
+    # make_user writes the credit row with plain SQL, like balances loaded before the ledger existed.
+    user_id = make_user(500)
+    database.psql(f"DELETE FROM job_checkpoints WHERE job_name = '{OPENING_BALANCES_JOB}'")
+
+    async def scenario():
+        await BackgroundService.record_opening_balances()
+        async with AsyncSessionLocal() as db:
+            service = CreditService(db)
+            before_deduct = datetime.now()
+            await service.deduct_credits(user_id, 100)
+            after_deduct = datetime.now()
+            await BackgroundService.take_balance_snapshots(lag_seconds=0)
+            await service.add_credits(user_id, 30)
+            return [
+                await service.get_balance_at(user_id, at)
+                for at in (datetime(2000, 1, 1), before_deduct, after_deduct, datetime.now(), datetime.now(timezone.utc))
+            ]
+
+    assert run_async(scenario()) == [0, 500, 400, 430, 430]
+    # Running it again does not record a second opening entry.
+    run_async(BackgroundService.record_opening_balances())
+    assert database.psql(
+        f"SELECT COUNT(*) FROM credit_transactions WHERE user_id = {user_id} AND op = 'opening'"
+    ) == "1"
+
+
+def test_snapshots_match_the_ledger(run_async, make_user, database):
+    user_ids = [make_user(0) for _ in range(3)]
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            service = CreditService(db)
+            for n, user_id in enumerate(user_ids):
+                await service.add_credits(user_id, 10 * (n + 1))
+            await BackgroundService.take_balance_snapshots(lag_seconds=0)
+            await service.deduct_credits(user_ids[0], 5)
+            await BackgroundService.take_balance_snapshots(lag_seconds=0)
+            now = datetime.now()
+            return [await service.get_balance_at(user_id, now) for user_id in user_ids]
+
+    assert run_async(scenario()) == [5, 20, 30]
+    assert database.psql(
+        f"SELECT string_agg(balance::text, ',' ORDER BY taken_at) FROM credit_snapshots WHERE user_id = {user_ids[0]}"
+    ) == "10,5"
+
+
+def test_no_snapshots_until_opening_balances_are_recorded(run_async, make_user, database, monkeypatch):
+    from app.services import background_service
+
+    user_id = make_user(500)
+    database.psql(f"DELETE FROM job_checkpoints WHERE job_name = '{OPENING_BALANCES_JOB}'")
+    monkeypatch.setattr(background_service, "OPENING_CHUNK_SQL", "SELECT no_such_column FROM credits")
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await CreditService(db).add_credits(user_id, 10)
+        await BackgroundService.take_balance_snapshots(lag_seconds=0)
+
+    run_async(scenario())
+    assert database.psql(
+        f"SELECT completed_at IS NULL FROM job_checkpoints WHERE job_name = '{OPENING_BALANCES_JOB}'"
+    ) == "t"
+    assert database.psql(f"SELECT COUNT(*) FROM credit_snapshots WHERE user_id = {user_id}") == "0"
+
+    monkeypatch.undo()
+    run_async(BackgroundService.take_balance_snapshots(lag_seconds=0))
+    assert database.psql(f"SELECT balance FROM credit_snapshots WHERE user_id = {user_id}") == "510"
+
+
+def test_history_pages_and_unknown_users(run_async, make_user):
+    from app.utils import UserNotFound
+
+    user_id, quiet_id = make_user(0), make_user(0)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            service = CreditService(db)
+            for amount in (1, 2, 3):
+                await service.add_credits(user_id, amount)
+            first, before_id = await service.get_history(user_id, limit=2)
+            second, last = await service.get_history(user_id, limit=2, before_id=before_id)
+            empty = await service.get_history(quiet_id)
+            try:
+                await service.get_history(2_000_000_000)
+            except UserNotFound as e:
+                missing = e.status_code
+            return [t.amount for t in first], [t.amount for t in second], last, empty, missing
+
+    assert run_async(scenario()) == ([3, 2], [1], None, ([], None), 404)
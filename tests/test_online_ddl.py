@@ -0,0 +1,70 @@
+import asyncio
+import time
+import uuid
+
+from app.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.schemas.schemas import ColumnDefinition, PostgreSQLType
+from app.services.credit_service import CreditService
+from app.services.schema_service import SchemaService
+
+
+async def _add_column_online(table_name: str, column_def: ColumnDefinition):
+    async with AsyncSessionLocal() as db:
+        return await SchemaService(db).add_column(table_name, column_def, online=True)
+
+
+def test_credit_traffic_runs_during_online_add_column(run_async, make_user, database, monkeypatch):
+    monkeypatch.setattr(get_settings(), "ddl_backfill_batch_size", 10)
+    user_ids = [make_user(10_000) for _ in range(4)]
+    column = ColumnDefinition(name="tier", type=PostgreSQLType.INTEGER, nullable=False, default=1)
+
+    async def scenario():
+        done = asyncio.Event()
+        latencies, errors = [], []
+
+        async def deduct(user_id: int):
+            while not done.is_set():
+                started = time.perf_counter()
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await CreditService(db).deduct_credits(user_id, 1)
+                except Exception as e:
+                    errors.append(e)
+                latencies.append(time.perf_counter() - started)
+
+        workers = [asyncio.create_task(deduct(user_id)) for user_id in user_ids]
+        await asyncio.sleep(0.2)
+        before = len(latencies)
+        try:
+            result = await _add_column_online("credits", column)
+        finally:
+            done.set()
+            await asyncio.gather(*workers)
+        return result, len(latencies) - before, errors
+
+    try:
+        result, deducts_during_ddl, errors = run_async(scenario())
+        # Every range is its own short transaction, so deducts keep committing between them.
+        assert errors == []
+        assert deducts_during_ddl > 0
+        assert result["execution"]["backfilled_rows"] == int(database.psql("SELECT COUNT(*) FROM credits"))
+        assert database.psql("SELECT COUNT(*) FROM credits WHERE tier IS NULL") == "0"
+        assert database.psql(
+            "SELECT attnotnull FROM pg_attribute WHERE attrelid = 'credits'::regclass AND attname = 'tier'"
+        ) == "t"
+    finally:
+        database.psql("ALTER TABLE credits DROP COLUMN IF EXISTS tier")
+
+
+def test_backfill_walks_pages_without_a_primary_key(run_async, database, monkeypatch):
+    monkeypatch.setattr(get_settings(), "ddl_backfill_batch_size", 100)
+    table_name = f"ddl_{uuid.uuid4().hex[:8]}"
+    database.psql(f"CREATE TABLE {table_name} AS SELECT n FROM generate_series(1, 2000) AS n")
+    database.psql(f"ANALYZE {table_name}")
+    column = ColumnDefinition(name="flag", type=PostgreSQLType.BOOLEAN, default=True)
+
+    result = run_async(_add_column_online(table_name, column))
+
+    assert result["execution"]["backfilled_rows"] == 2000
+    assert database.psql(f"SELECT COUNT(*) FROM {table_name} WHERE flag IS NULL") == "0"
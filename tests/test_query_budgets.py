@@ -0,0 +1,113 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.core.database import engine
+from app.core.query_audit import query_auditor
+from app.main import app
+
+
+@asynccontextmanager
+async def _lifespan_without_background_tasks(app):
+    # The schema is already loaded and the scheduler is not under test. The engine's pooled
+    # connections belong to the client's event loop, so they are closed before it ends.
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "query_audit_enabled", True)
+    monkeypatch.setattr(settings, "query_audit_strict", True)
+    monkeypatch.setattr(app.router, "lifespan_context", _lifespan_without_background_tasks)
+    query_auditor.reset()
+    with TestClient(app) as client:
+        yield client
+
+
+def test_every_route_stays_within_its_query_budget(client, make_user):
+    """
+    Call every route once, on its most expensive path where there is one. In strict mode a
+    route over its budget or repeating a statement raises QueryBudgetExceeded out of the client.
+    """
+    user_id, other_id = make_user(1000), make_user(0)
+    table = f"audit_{uuid.uuid4().hex[:8]}"
+    called = set()
+
+    def call(method: str, template: str, expected: int = 200, **kwargs):
+        path = template.format(user_id=user_id, table_name=table, **kwargs.pop("path_params", {}))
+        response = client.request(method, path, **kwargs)
+        assert response.status_code == expected, response.text
+        called.add((method, template))
+        return response
+
+    def key():
+        return {"Idempotency-Key": str(uuid.uuid4())}
+
+    email = f"audit-{uuid.uuid4().hex[:8]}@example.com"
+
+    call("GET", "/")
+    call("GET", "/health")
+    call("GET", "/metrics")
+
+    call("POST", "/api/users/", json={"email": email, "name": "Audit"})
+    call("GET", "/api/users/", params={"limit": 5})
+    call("GET", "/api/users/", params={"stream": "true", "after_id": user_id - 10})
+    call("POST", "/api/users/bulk", headers={"Content-Type": "application/x-ndjson"},
+         content=f'{{"email": "bulk-{email}", "name": "A"}}\n{{"email": "{email}", "name": "B"}}\n')
+    call("GET", "/api/users/summary", params={"ids": f"{user_id},{other_id}"})
+    call("GET", "/api/users/{user_id}/summary")
+    call("GET", "/api/users/{user_id}")
+
+    call("GET", "/api/credits/{user_id}")
+    call("GET", "/api/credits/{user_id}/history")
+    call("GET", "/api/credits/{user_id}/balance-at", params={"at": datetime.now().isoformat()})
+    call("POST", "/api/credits/{user_id}/add", json={"amount": 10}, headers=key())
+    call("POST", "/api/credits/{user_id}/deduct", 400, json={"amount": 1_000_000}, headers=key())
+    hold = call("POST", "/api/credits/{user_id}/holds", json={"amount": 20}, headers=key()).json()["data"]
+    call("GET", "/api/credits/holds/{hold_id}", path_params={"hold_id": hold["id"]})
+    call("POST", "/api/credits/holds/{hold_id}/capture", json={"amount": 5}, path_params={"hold_id": hold["id"]})
+    hold = call("POST", "/api/credits/{user_id}/holds", json={"amount": 20}, headers=key()).json()["data"]
+    call("POST", "/api/credits/holds/{hold_id}/release", path_params={"hold_id": hold["id"]})
+    call("PATCH", "/api/credits/{user_id}/reset", headers=key())
+    call("POST", "/api/credits/batch", json={"items": [
+        {"user_id": user_id, "op": "add", "amount": 5},
+        {"user_id": other_id, "op": "deduct", "amount": 1},
+    ], "atomic": False})
+
+    def column(name: str):
+        return {"name": name, "type": "INTEGER", "default": 0}
+
+    call("POST", "/api/schema/update", json={
+        "operation": "create_table", "table_name": table, "columns": [{"name": "id", "type": "INTEGER"}],
+    })
+    call("POST", "/api/schema/update", json={
+        "operation": "add_column", "table_name": table, "column_definition": column("a"), "online": True,
+    })
+    call("POST", "/api/schema/plan", json={"operations": [
+        {"operation": "add_column", "table_name": table, "column_definition": column("b")},
+        {"operation": "add_column", "table_name": table, "column_definition": column("c")},
+    ]})
+    call("DELETE", "/api/schema/table/{table_name}/column/{column_name}", path_params={"column_name": "c"})
+    call("GET", "/api/schema/tables")
+    call("GET", "/api/schema/table/{table_name}")
+    job = call("POST", "/api/schema/jobs", 202, json={"operation": {
+        "operation": "add_column", "table_name": table, "column_definition": column("d"),
+    }}).json()
+    call("GET", "/api/schema/jobs/{job_id}", path_params={"job_id": job["id"]})
+
+    for template in ("/jobs/daily-credits", "/cache/balances", "/cache/schema", "/db/pool",
+                     "/credits/coalescer", "/rate-limit", "/query-audit"):
+        call("GET", "/api/admin" + template)
+
+    routes = {(method, route.path) for route in app.routes if isinstance(route, APIRoute) for method in route.methods}
+    assert routes - called == set()
+    audit = query_auditor.snapshot()
+    assert audit["audited"] >= len(called)
+    assert audit["violations"] == []
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from app.config import Settings, get_settings
+from app.core.rate_limit import LocalRateLimitStore, RateLimitMiddleware
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    settings = get_settings()
+    for name, value in (("rate_limit_enabled", True), ("rate_limit_user_rate", 20.0), ("rate_limit_user_burst", 3),
+                        ("rate_limit_api_key_rate", 20.0), ("rate_limit_api_key_burst", 5)):
+        monkeypatch.setattr(settings, name, value)
+    store = LocalRateLimitStore(max_keys=100)
+    middleware = RateLimitMiddleware(_ok, store=store)
+
+    def call(path: str, api_key: str = None):
+        """
+        Send one request through the middleware and return (status, headers).
+        """
+        headers = [(b"x-api-key", api_key.encode())] if api_key else []
+        scope = {"type": "http", "method": "POST", "path": path, "query_string": b"", "headers": headers}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(middleware(scope, _receive, send))
+        start = sent[0]
+        return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}
+
+    call.store = store
+    return call
+
+
+def test_user_burst_then_429_with_retry_after(limiter):
+    statuses = [limiter("/api/credits/7/deduct")[0] for _ in range(3)]
+    status, headers = limiter("/api/credits/7/deduct")
+
+    assert statuses == [200, 200, 200]
+    assert status == 429
+    assert headers["retry-after"] == "1"
+    # Other users have their own bucket.
+    assert limiter("/api/users/8")[0] == 200
+    assert (limiter.store.allowed, limiter.store.limited) == (4, 1)
+
+
+def test_bucket_refills(limiter):
+    for _ in range(3):
+        limiter("/api/credits/7/deduct")
+    assert limiter("/api/credits/7/deduct")[0] == 429
+
+    # 20 tokens a second: two are back after 0.1s.
+    time.sleep(0.1)
+
+    assert [limiter("/api/credits/7/deduct")[0] for _ in range(3)] == [200, 200, 429]
+
+
+def test_api_key_bucket_is_separate_from_the_user_bucket(limiter):
+    # Paths without a user id only count against the key.
+    statuses = [limiter("/api/schema/tables", api_key="alpha")[0] for _ in range(6)]
+
+    assert statuses == [200] * 5 + [429]
+    assert limiter("/api/schema/tables", api_key="beta")[0] == 200
+    assert limiter("/api/schema/tables")[0] == 200
+    # A user with tokens left is still limited by an empty key bucket.
+    assert limiter("/api/credits/9/deduct", api_key="alpha")[0] == 429
+    assert limiter("/api/credits/9/deduct", api_key="beta")[0] == 200
+
+
+def test_disabled_by_default(limiter, monkeypatch):
+    assert Settings.model_fields["rate_limit_enabled"].default is False
+    monkeypatch.setattr(get_settings(), "rate_limit_enabled", False)
+
+    assert {limiter("/api/credits/7/deduct")[0] for _ in range(10)} == {200}
+    assert limiter.store.allowed == 0
@@ -0,0 +1,90 @@
+import json
+import logging
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.request_metrics import RequestMetricsMiddleware, request_metrics
+
+TEMPLATE = "/metrics-test/{item_id}"
+
+
+@asynccontextmanager
+async def _dispose_engine(app):
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    monkeypatch.setattr(get_settings(), "request_metrics_enabled", True)
+    app = FastAPI(lifespan=_dispose_engine)
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get(TEMPLATE)
+    async def known_queries(item_id: int):
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_sleep(0.05)"))
+            for n in range(3):
+                await db.execute(text("SELECT CAST(:n AS INTEGER)"), {"n": n + item_id})
+        return {"item_id": item_id}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def _sum_and_count(histogram):
+    """
+    The test route's (sum, count) in `histogram`, which other tests have added to too.
+    """
+    _, total, count = histogram._series.get((TEMPLATE, "GET"), (None, 0, 0))
+    return total, count
+
+
+def test_requests_are_labelled_by_route_template(client):
+    _, before = _sum_and_count(request_metrics.latency)
+
+    assert client.get("/metrics-test/1").status_code == 200
+    assert client.get("/metrics-test/2").status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    rendered = request_metrics.render()
+    assert f'http_request_duration_seconds_count{{route="{TEMPLATE}",method="GET"}} {before + 2}' in rendered
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"}' in rendered
+    assert "/metrics-test/1" not in rendered
+
+
+def test_db_time_and_query_count_per_request(client):
+    db_before, _ = _sum_and_count(request_metrics.db_time)
+    queries_before, count_before = _sum_and_count(request_metrics.queries)
+
+    client.get("/metrics-test/1")
+
+    db_after, _ = _sum_and_count(request_metrics.db_time)
+    queries_after, count_after = _sum_and_count(request_metrics.queries)
+    assert count_after == count_before + 1
+    assert queries_after - queries_before == 4
+    assert db_after - db_before >= 0.05
+
+
+def test_slow_requests_are_logged_with_query_fingerprints(client, monkeypatch, caplog):
+    monkeypatch.setattr(get_settings(), "slow_request_ms", 10)
+
+    with caplog.at_level(logging.WARNING):
+        client.get("/metrics-test/5")
+
+    [entry] = [json.loads(record.getMessage()) for record in caplog.records if "slow_request" in record.getMessage()]
+    assert entry["route"] == TEMPLATE
+    assert entry["path"] == "/metrics-test/5"
+    assert entry["status"] == 200
+    assert entry["queries"] == 4
+    assert entry["duration_ms"] >= entry["db_ms"] >= 50
+    assert {(f["sql"], f["count"]) for f in entry["fingerprints"]} == {
+        ("SELECT pg_sleep(?)", 1),
+        ("SELECT CAST(? AS INTEGER)", 3),
+    }
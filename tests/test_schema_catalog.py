@@ -0,0 +1,30 @@
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.services.schema_service import SchemaService
+
+
+async def _table_info(table_name: str):
+    async with AsyncSessionLocal() as db:
+        return await SchemaService(db).get_table_info(table_name)
+
+
+async def _table_names():
+    async with AsyncSessionLocal() as db:
+        return {table["table_name"] for table in (await SchemaService(db).get_all_tables())["tables"]}
+
+
+def test_catalog_finds_tables_outside_public(run_async, database):
+    # The app's tables live in credit_db, which the test database puts first on the search_path.
+    info = run_async(_table_info("credits"))
+    assert {"user_id", "credits", "held"} <= {column["name"] for column in info["columns"]}
+    assert {"users", "credits", "credit_transactions"} <= run_async(_table_names())
+
+
+def test_catalog_picks_up_ddl_run_outside_the_service(run_async, database):
+    table_name = f"catalog_{uuid.uuid4().hex[:8]}"
+    database.psql(f"CREATE TABLE credit_db.{table_name} (id BIGSERIAL PRIMARY KEY)")
+    assert [column["name"] for column in run_async(_table_info(table_name))["columns"]] == ["id"]
+
+    database.psql(f"ALTER TABLE credit_db.{table_name} ADD COLUMN note TEXT")
+    assert [column["name"] for column in run_async(_table_info(table_name))["columns"]] == ["id", "note"]
@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
+from app.utils import EmailIdAlreadyExist
+
+
+async def _signup(email: str):
+    async with AsyncSessionLocal() as db:
+        return await UserService(db).create_user(UserCreate(email=email, name="Signup"))
+
+
+def test_signup_creates_user_and_empty_credit_row(run_async, database):
+    email = f"signup-{uuid.uuid4().hex[:8]}@example.com"
+
+    user = run_async(_signup(email))
+
+    assert user.email == email
+    assert database.psql(f"SELECT credits || ',' || held FROM credits WHERE user_id = {user.user_id}") == "0,0"
+
+
+def test_parallel_signups_with_the_same_email_create_one_user(run_async, database):
+    email = f"signup-{uuid.uuid4().hex[:8]}@example.com"
+
+    async def signups():
+        async def attempt():
+            try:
+                return await _signup(email)
+            except EmailIdAlreadyExist as e:
+                return e
+        return await asyncio.gather(*(attempt() for _ in range(20)))
+
+    outcomes = run_async(signups())
+
+    created = [o for o in outcomes if not isinstance(o, Exception)]
+    rejected = [o for o in outcomes if isinstance(o, EmailIdAlreadyExist)]
+    assert (len(created), len(rejected)) == (1, 19)
+    assert database.psql(f"SELECT COUNT(*) FROM users WHERE email = '{email}'") == "1"
+    assert database.psql(
+        f"SELECT COUNT(*) FROM credits c JOIN users u USING (user_id) WHERE u.email = '{email}'"
+    ) == "1"
+
+
+def test_summary_reports_the_same_available_balance_as_the_credits_route(run_async, make_user):
+    from app.services.credit_service import CreditService
+    from app.services.hold_service import HoldService
+
+    user_id = make_user(100)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await HoldService(db).reserve(user_id, 30)
+            summary = await UserService(db).get_user_with_balance(user_id)
+            balance = await CreditService(db).get_credit_balance(user_id, use_cache=False)
+        return summary.model_dump(), balance.model_dump()
+
+    summary, balance = run_async(scenario())
+
+    assert (summary["credits"], summary["held"], summary["available"]) == (100, 30, 70)
+    assert {key: balance[key] for key in ("credits", "held", "available")} == \
+        {key: summary[key] for key in ("credits", "held", "available")}